@@ -1,18 +1,26 @@
 from pycaret.classification import *
 import mlflow
+import mlflow.sklearn
 import pandas as pd
 from typing import Optional, Tuple, Dict
-from sklearn.preprocessing import LabelEncoder
+from ..utils.categorical_encoding import CategoricalVocabulary
+from ..utils.mlflow_logging import BatchedMlflowLogger
 
-def prepare_service_data(data: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
+CATEGORICAL_FEATURES = ['pathologie', 'nom_pathologie', 'classification']
+
+def prepare_service_data(
+    data: pd.DataFrame,
+    vocabulary: Optional[CategoricalVocabulary] = None
+) -> Tuple[pd.DataFrame, CategoricalVocabulary]:
     """
     Prépare les données pour la classification des services
     
     Args:
         data: DataFrame contenant les données brutes
+        vocabulary: Vocabulaire catégoriel existant (construit à partir des données sinon)
         
     Returns:
-        DataFrame préparé et dictionnaire des encodeurs
+        DataFrame préparé et vocabulaire catégoriel
     """
     # Sélectionner les colonnes pertinentes
     features = [
@@ -25,24 +33,22 @@ def prepare_service_data(data: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
         'classification'  # target variable
     ]
     
-    df = data[features].copy()
-    
-    # Créer les encodeurs pour les variables catégorielles
-    encoders = {}
-    categorical_features = ['pathologie', 'nom_pathologie', 'classification']
+    # Vocabulaire construit une seule fois puis réutilisé (prédiction, recommandation)
+    if vocabulary is None:
+        vocabulary = CategoricalVocabulary.fit(data, CATEGORICAL_FEATURES)
     
-    for feature in categorical_features:
-        encoders[feature] = LabelEncoder()
-        df[feature] = encoders[feature].fit_transform(df[feature])
+    # Seules les colonnes catégorielles sont réécrites, les autres ne sont pas recopiées
+    df = vocabulary.encode(data[features])
     
-    return df, encoders
+    return df, vocabulary
 
 def train_service_classifier(
     data: pd.DataFrame,
     target_col: str = 'classification',
     fold: int = 5,
-    experiment_name: str = 'service_classification'
-) -> Tuple[object, Dict]:
+    experiment_name: str = 'service_classification',
+    async_logging: bool = False
+) -> Tuple[object, CategoricalVocabulary]:
     """
     Entraîne un modèle de classification pour prédire le service médical approprié
     
@@ -51,13 +57,14 @@ def train_service_classifier(
         target_col: Nom de la colonne cible (service médical)
         fold: Nombre de folds pour la validation croisée
         experiment_name: Nom de l'expérience MLflow
+        async_logging: Envoyer les logs MLflow depuis un thread d'arrière-plan
     
     Returns:
-        Le meilleur modèle entraîné et les encodeurs utilisés
+        Le meilleur modèle entraîné et le vocabulaire catégoriel utilisé
     """
     try:
         # Préparer les données
-        prepared_data, encoders = prepare_service_data(data)
+        prepared_data, vocabulary = prepare_service_data(data)
         
         # Setup PyCaret sans MLflow
         clf_setup = setup(
@@ -74,23 +81,28 @@ def train_service_classifier(
         
         # Log manuel avec MLflow
         mlflow.set_experiment(experiment_name)
-        with mlflow.start_run():
-            # Log des paramètres de base
-            mlflow.log_param("target_col", target_col)
-            mlflow.log_param("fold", fold)
-            
-            # Log des métriques de performance
-            results = pull()
-            for metric in results.columns[1:]:
-                mlflow.log_metric(metric, results.iloc[0][metric])
-        
-        return best_model, encoders
+        with mlflow.start_run() as run:
+            with BatchedMlflowLogger(run.info.run_id, asynchronous=async_logging) as tracker:
+                # Log des paramètres de base
+                tracker.log_params({"target_col": target_col, "fold": fold})
+                
+                # Log des métriques de performance
+                results = pull()
+                tracker.log_metrics(results.iloc[0][results.columns[1:]].to_dict())
+
+                # Log des encodeurs (relus par load_service_classifier)
+                tracker.log_dict(vocabulary.to_dict(), "label_encoders.json")
+
+                # Log du modèle (estimateur scikit-learn : MLflow n'a pas de saveur pycaret)
+                mlflow.sklearn.log_model(best_model, "service_classifier")
+
+        return best_model, vocabulary
             
     except Exception as e:
         print(f"Une erreur s'est produite lors de l'entraînement : {str(e)}")
         raise
 
-def load_service_classifier(run_id: str) -> Tuple[Optional[object], Optional[Dict]]:
+def load_service_classifier(run_id: str) -> Tuple[Optional[object], Optional[CategoricalVocabulary]]:
     """
     Charge un modèle de classification de service depuis MLflow
     
@@ -98,12 +110,14 @@ def load_service_classifier(run_id: str) -> Tuple[Optional[object], Optional[Dic
         run_id: ID MLflow du run contenant le modèle
     
     Returns:
-        Le modèle chargé et les encodeurs, ou None si le chargement échoue
+        Le modèle chargé et son vocabulaire catégoriel, ou None si le chargement échoue
     """
     try:
-        model = mlflow.pycaret.load_model(f"runs:/{run_id}/service_classifier")
-        encoders = mlflow.load_dict(f"runs:/{run_id}/label_encoders.json")
-        return model, encoders
+        model = mlflow.sklearn.load_model(f"runs:/{run_id}/service_classifier")
+        vocabulary = CategoricalVocabulary.from_dict(
+            mlflow.load_dict(f"runs:/{run_id}/label_encoders.json")
+        )
+        return model, vocabulary
     except Exception as e:
         print(f"Erreur lors du chargement du modèle: {str(e)}")
         return None, None
@@ -2,17 +2,24 @@ from pycaret.regression import *
 import mlflow
 import pandas as pd
 from typing import Optional, Tuple, Dict
-from sklearn.preprocessing import LabelEncoder
+from ..utils.categorical_encoding import CategoricalVocabulary
+from ..utils.mlflow_logging import BatchedMlflowLogger
 
-def prepare_duration_data(data: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
+CATEGORICAL_FEATURES = ['pathologie', 'nom_pathologie', 'classification', 'sexe']
+
+def prepare_duration_data(
+    data: pd.DataFrame,
+    vocabulary: Optional[CategoricalVocabulary] = None
+) -> Tuple[pd.DataFrame, CategoricalVocabulary]:
     """
     Prépare les données pour la prédiction de durée
     
     Args:
         data: DataFrame contenant les données brutes
+        vocabulary: Vocabulaire catégoriel existant (construit à partir des données sinon)
         
     Returns:
-        DataFrame préparé et dictionnaire des encodeurs
+        DataFrame préparé et vocabulaire catégoriel
     """
     # Sélectionner les colonnes pertinentes
     features = [
@@ -26,24 +33,22 @@ def prepare_duration_data(data: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
         'AVG_duree_hospi'  # target variable
     ]
     
-    df = data[features].copy()
+    # Vocabulaire construit une seule fois puis réutilisé (prédiction, recommandation)
+    if vocabulary is None:
+        vocabulary = CategoricalVocabulary.fit(data, CATEGORICAL_FEATURES)
     
-    # Créer les encodeurs pour les variables catégorielles
-    encoders = {}
-    categorical_features = ['pathologie', 'nom_pathologie', 'classification', 'sexe']
+    # Seules les colonnes catégorielles sont réécrites, les autres ne sont pas recopiées
+    df = vocabulary.encode(data[features])
     
-    for feature in categorical_features:
-        encoders[feature] = LabelEncoder()
-        df[feature] = encoders[feature].fit_transform(df[feature])
-    
-    return df, encoders
+    return df, vocabulary
 
 def train_duration_predictor(
     data: pd.DataFrame,
     target_col: str = 'AVG_duree_hospi',
     fold: int = 5,
-    experiment_name: str = 'duration_prediction'
-) -> Tuple[object, Dict]:
+    experiment_name: str = 'duration_prediction',
+    async_logging: bool = False
+) -> Tuple[object, CategoricalVocabulary]:
     """
     Entraîne un modèle de régression pour prédire la durée d'hospitalisation
     
@@ -52,12 +57,13 @@ def train_duration_predictor(
         target_col: Nom de la colonne cible (durée moyenne d'hospitalisation)
         fold: Nombre de folds pour la validation croisée
         experiment_name: Nom de l'expérience MLflow
+        async_logging: Envoyer les logs MLflow depuis un thread d'arrière-plan
     
     Returns:
-        Le meilleur modèle entraîné et les encodeurs utilisés
+        Le meilleur modèle entraîné et le vocabulaire catégoriel utilisé
     """
     # Préparer les données
-    prepared_data, encoders = prepare_duration_data(data)
+    prepared_data, vocabulary = prepare_duration_data(data)
     
     # Configurer MLflow
     mlflow.set_experiment(experiment_name)
@@ -83,27 +89,25 @@ def train_duration_predictor(
     tuned_model = tune_model(best_model)
     
     # Log du modèle et des métriques avec MLflow
-    with mlflow.start_run():
-        # Log des paramètres
-        mlflow.log_params(tuned_model.get_params())
-        
-        # Log du modèle
-        mlflow.pycaret.log_model(tuned_model, "duration_predictor")
-        
-        # Log des métriques de performance
-        results = pull()
-        for metric in results.columns[1:]:
-            mlflow.log_metric(metric, results.iloc[0][metric])
-        
-        # Log des encodeurs
-        mlflow.log_dict(
-            {k: v.classes_.tolist() for k, v in encoders.items()},
-            "label_encoders.json"
-        )
+    with mlflow.start_run() as run:
+        # Paramètres, métriques et encodeurs envoyés en un seul log_batch
+        with BatchedMlflowLogger(run.info.run_id, asynchronous=async_logging) as tracker:
+            # Log des paramètres
+            tracker.log_params(tuned_model.get_params())
+            
+            # Log des métriques de performance
+            results = pull()
+            tracker.log_metrics(results.iloc[0][results.columns[1:]].to_dict())
+            
+            # Log des encodeurs
+            tracker.log_dict(vocabulary.to_dict(), "label_encoders.json")
+            
+            # Log du modèle
+            mlflow.pycaret.log_model(tuned_model, "duration_predictor")
     
-    return tuned_model, encoders
+    return tuned_model, vocabulary
 
-def load_duration_predictor(run_id: str) -> Tuple[Optional[object], Optional[Dict]]:
+def load_duration_predictor(run_id: str) -> Tuple[Optional[object], Optional[CategoricalVocabulary]]:
     """
     Charge un modèle de prédiction de durée depuis MLflow
     
@@ -111,12 +115,14 @@ def load_duration_predictor(run_id: str) -> Tuple[Optional[object], Optional[Dic
         run_id: ID MLflow du run contenant le modèle
     
     Returns:
-        Le modèle chargé et les encodeurs, ou None si le chargement échoue
+        Le modèle chargé et son vocabulaire catégoriel, ou None si le chargement échoue
     """
     try:
         model = mlflow.pycaret.load_model(f"runs:/{run_id}/duration_predictor")
-        encoders = mlflow.load_dict(f"runs:/{run_id}/label_encoders.json")
-        return model, encoders
+        vocabulary = CategoricalVocabulary.from_dict(
+            mlflow.load_dict(f"runs:/{run_id}/label_encoders.json")
+        )
+        return model, vocabulary
     except Exception as e:
         print(f"Erreur lors du chargement du modèle: {str(e)}")
         return None, None
@@ -1,10 +1,9 @@
 import numpy as np
 from sklearn.metrics import (
     accuracy_score, precision_score, recall_score, f1_score,
-    mean_absolute_error, mean_squared_error, r2_score,
     confusion_matrix
 )
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Tuple
 import pandas as pd
 
 def evaluate_service_classification(
@@ -52,34 +51,91 @@ def evaluate_service_classification(
     
     return metrics
 
+# Bornes (en jours) des tranches de durée : ]-inf, 3], ]3, 7], ]7, 14], ]14, 30], ]30, +inf[
+# Clés produites : mae_0_3_days, mae_3_7_days, mae_7_14_days, mae_14_30_days, mae_30_inf_days
+# (et rmse_*) ; les tranches sont contiguës, contrairement aux anciennes clés
+# mae_4_7_days, mae_8_14_days et mae_15_30_days qui excluaient les durées non entières
+DURATION_BUCKET_EDGES = [3, 7, 14, 30]
+
 def evaluate_duration_prediction(
     y_true: np.ndarray,
-    y_pred: np.ndarray
+    y_pred: np.ndarray,
+    sample_weight: np.ndarray = None,
+    bucket_edges: List[float] = DURATION_BUCKET_EDGES
 ) -> Dict[str, float]:
     """
     Évalue les performances du modèle de prédiction de durée
     
+    Toutes les métriques (globales et par tranche de durée) sont calculées en
+    une seule passe vectorisée : les tranches sont obtenues par `np.digitize`
+    sur les durées réelles et les erreurs accumulées par `np.bincount`.
+    Chaque tranche a toujours ses clés ; une tranche vide (ou une entrée
+    vide, ou de poids total nul) donne NaN.
+    
     Args:
         y_true: Durées réelles
         y_pred: Durées prédites
+        sample_weight: Poids des observations (uniformes par défaut)
+        bucket_edges: Bornes supérieures (incluses) des tranches de durée
         
     Returns:
         Dictionnaire contenant les différentes métriques
     """
+    y_true = np.asarray(y_true, dtype=np.float64).ravel()
+    y_pred = np.asarray(y_pred, dtype=np.float64).ravel()
+    if sample_weight is None:
+        weights = np.ones_like(y_true)
+    else:
+        weights = np.asarray(sample_weight, dtype=np.float64).ravel()
+    
+    n_buckets = len(bucket_edges) + 1
+    bounds = [0] + list(bucket_edges) + [float('inf')]
+    labels = [f'{bounds[i]:g}_{bounds[i + 1]:g}' for i in range(n_buckets)]
+    
+    total_weight = weights.sum()
+    if len(y_true) == 0 or total_weight <= 0:
+        metrics = {'mae': np.nan, 'rmse': np.nan, 'r2': np.nan, 'mape': np.nan}
+        for label in labels:
+            metrics[f'mae_{label}_days'] = np.nan
+            metrics[f'rmse_{label}_days'] = np.nan
+        return metrics
+    
+    abs_errors = np.abs(y_true - y_pred)
+    weighted_abs_errors = weights * abs_errors
+    weighted_sq_errors = weighted_abs_errors * abs_errors
+    
+    sse = weighted_sq_errors.sum()
+    mean_true = (weights * y_true).sum() / total_weight
+    sst = (weights * (y_true - mean_true) ** 2).sum()
+    
+    # MAPE calculé uniquement sur les durées réelles non nulles
+    nonzero = y_true != 0
+    nonzero_weight = weights[nonzero].sum()
+    mape = (
+        (weighted_abs_errors[nonzero] / np.abs(y_true[nonzero])).sum() / nonzero_weight * 100
+        if nonzero_weight > 0 else np.nan
+    )
+    
     metrics = {
-        'mae': mean_absolute_error(y_true, y_pred),
-        'rmse': np.sqrt(mean_squared_error(y_true, y_pred)),
-        'r2': r2_score(y_true, y_pred),
-        'mape': np.mean(np.abs((y_true - y_pred) / y_true)) * 100
+        'mae': weighted_abs_errors.sum() / total_weight,
+        'rmse': np.sqrt(sse / total_weight),
+        'r2': 1 - sse / sst if sst > 0 else float(sse == 0),
+        'mape': mape
     }
     
     # Calculer les erreurs par tranche de durée
-    duration_ranges = [(0, 3), (4, 7), (8, 14), (15, 30), (30, float('inf'))]
-    for start, end in duration_ranges:
-        mask = (y_true >= start) & (y_true <= end)
-        if mask.any():
-            range_mae = mean_absolute_error(y_true[mask], y_pred[mask])
-            metrics[f'mae_{start}_{end}_days'] = range_mae
+    buckets = np.digitize(y_true, bucket_edges, right=True)
+    bucket_weights = np.bincount(buckets, weights=weights, minlength=n_buckets)
+    bucket_abs = np.bincount(buckets, weights=weighted_abs_errors, minlength=n_buckets)
+    bucket_sq = np.bincount(buckets, weights=weighted_sq_errors, minlength=n_buckets)
+    
+    for i, label in enumerate(labels):
+        if bucket_weights[i] > 0:
+            metrics[f'mae_{label}_days'] = bucket_abs[i] / bucket_weights[i]
+            metrics[f'rmse_{label}_days'] = np.sqrt(bucket_sq[i] / bucket_weights[i])
+        else:
+            metrics[f'mae_{label}_days'] = np.nan
+            metrics[f'rmse_{label}_days'] = np.nan
     
     return metrics
 
@@ -131,6 +187,12 @@ def evaluate_recommendations(
     
     return metrics
 
+def _relative_changes(previous_metrics: Dict[str, float], current_metrics: Dict[str, float]) -> Dict[str, float]:
+    return {
+        k: (v - previous_metrics[k]) / previous_metrics[k] if previous_metrics.get(k) else np.nan
+        for k, v in current_metrics.items()
+    }
+
 def evaluate_temporal_stability(
     model,
     temporal_test_sets: List[Tuple[pd.DataFrame, pd.DataFrame]],
@@ -162,12 +224,182 @@ def evaluate_temporal_stability(
         
         # Calculer le changement relatif si ce n'est pas la première période
         if previous_metrics is not None:
-            relative_change = {
-                k: (v - previous_metrics[k]) / previous_metrics[k]
-                for k, v in current_metrics.items()
-            }
+            relative_change = _relative_changes(previous_metrics, current_metrics)
             temporal_metrics['relative_changes'].append(relative_change)
         
         previous_metrics = current_metrics
     
     return temporal_metrics
+
+class RegressionAccumulator:
+    """
+    Statistiques suffisantes des métriques de régression, mises à jour par lots
+    
+    La dispersion des valeurs réelles (SST du R²) est tenue sous forme de
+    moyenne et de somme des carrés des écarts (M2), fusionnées d'un lot à
+    l'autre par la formule de Chan (Welford par lots) : contrairement à
+    `somme des carrés - carré de la somme / n`, elle reste exacte pour des
+    valeurs grandes devant leur dispersion.
+    """
+    
+    def __init__(self):
+        self.count = 0
+        self.sum_abs_error = 0.0
+        self.sum_sq_error = 0.0
+        self.mean_true = 0.0
+        self.m2_true = 0.0
+        self.sum_abs_pct_error = 0.0
+        self.count_nonzero = 0
+    
+    def update(self, y_true: np.ndarray, y_pred: np.ndarray):
+        y_true = np.asarray(y_true, dtype=np.float64).ravel()
+        y_pred = np.asarray(y_pred, dtype=np.float64).ravel()
+        if len(y_true) == 0:
+            return
+        abs_errors = np.abs(y_true - y_pred)
+        nonzero = y_true != 0
+        
+        batch_mean = y_true.mean()
+        self._merge_moments(len(y_true), batch_mean, ((y_true - batch_mean) ** 2).sum())
+        self.sum_abs_error += abs_errors.sum()
+        self.sum_sq_error += (abs_errors ** 2).sum()
+        self.sum_abs_pct_error += (abs_errors[nonzero] / np.abs(y_true[nonzero])).sum()
+        self.count_nonzero += int(nonzero.sum())
+    
+    def merge(self, other: 'RegressionAccumulator') -> 'RegressionAccumulator':
+        """
+        Ajoute les statistiques d'un autre accumulateur (lots évalués séparément)
+        """
+        if other.count == 0:
+            return self
+        self._merge_moments(other.count, other.mean_true, other.m2_true)
+        self.sum_abs_error += other.sum_abs_error
+        self.sum_sq_error += other.sum_sq_error
+        self.sum_abs_pct_error += other.sum_abs_pct_error
+        self.count_nonzero += other.count_nonzero
+        return self
+    
+    def _merge_moments(self, count: int, mean: float, m2: float):
+        # Fusion de (n, moyenne, M2) selon Chan et al.
+        total = self.count + count
+        delta = mean - self.mean_true
+        self.mean_true += delta * count / total
+        self.m2_true += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+    
+    def compute(self) -> Dict[str, float]:
+        if self.count == 0:
+            return {}
+        sst = self.m2_true
+        return {
+            'mae': self.sum_abs_error / self.count,
+            'rmse': np.sqrt(self.sum_sq_error / self.count),
+            'r2': 1 - self.sum_sq_error / sst if sst > 0 else float(self.sum_sq_error == 0),
+            'mape': (
+                self.sum_abs_pct_error / self.count_nonzero * 100
+                if self.count_nonzero > 0 else np.nan
+            )
+        }
+
+class ClassificationAccumulator:
+    """
+    Matrice de confusion construite par lots (les labels sont découverts au fil de l'eau)
+    """
+    
+    def __init__(self):
+        self.labels = pd.Index([])
+        self.confusion = np.zeros((0, 0), dtype=np.int64)
+    
+    def update(self, y_true: np.ndarray, y_pred: np.ndarray):
+        y_true = np.asarray(y_true).ravel()
+        y_pred = np.asarray(y_pred).ravel()
+        
+        # Agrandir la matrice si de nouveaux labels apparaissent
+        new_labels = pd.Index(pd.unique(np.concatenate([y_true, y_pred]))).difference(self.labels)
+        if len(new_labels) > 0:
+            self.labels = self.labels.append(new_labels)
+            pad = len(self.labels) - self.confusion.shape[0]
+            self.confusion = np.pad(self.confusion, ((0, pad), (0, pad)))
+        
+        n_labels = len(self.labels)
+        true_idx = self.labels.get_indexer(y_true)
+        pred_idx = self.labels.get_indexer(y_pred)
+        self.confusion += np.bincount(
+            true_idx * n_labels + pred_idx,
+            minlength=n_labels * n_labels
+        ).reshape(n_labels, n_labels)
+    
+    def compute(self) -> Dict[str, float]:
+        total = self.confusion.sum()
+        if total == 0:
+            return {}
+        true_pos = np.diag(self.confusion).astype(np.float64)
+        predicted = self.confusion.sum(axis=0)
+        actual = self.confusion.sum(axis=1)
+        
+        precision = np.divide(true_pos, predicted, out=np.zeros_like(true_pos), where=predicted > 0)
+        recall = np.divide(true_pos, actual, out=np.zeros_like(true_pos), where=actual > 0)
+        denominator = precision + recall
+        f1 = np.divide(2 * precision * recall, denominator, out=np.zeros_like(true_pos), where=denominator > 0)
+        
+        return {
+            'accuracy': true_pos.sum() / total,
+            'macro_precision': precision.mean(),
+            'macro_recall': recall.mean(),
+            'macro_f1': f1.mean()
+        }
+
+def evaluate_temporal_stability_streaming(
+    model,
+    temporal_test_sets: Iterable[Tuple[pd.DataFrame, pd.Series]],
+    task: str = 'regression',
+    batch_size: int = 50_000
+) -> Dict[str, List[Dict[str, float]]]:
+    """
+    Évalue la stabilité temporelle des prédictions par lots de taille fixe
+    
+    Les prédictions de chaque lot sont agrégées dans des statistiques suffisantes
+    (sommes, moyenne et M2 des valeurs réelles, matrice de confusion) puis libérées : seules les
+    métriques par période sont conservées en mémoire.
+    
+    Args:
+        model: Modèle à évaluer
+        temporal_test_sets: Itérable de tuples (X, y) pour différentes périodes
+            (peut être un générateur qui charge les périodes à la demande)
+        task: 'regression' ou 'classification'
+        batch_size: Nombre de lignes prédites par appel à `model.predict`
+        
+    Returns:
+        Dictionnaire contenant l'évolution des métriques dans le temps
+    """
+    accumulators = {
+        'regression': RegressionAccumulator,
+        'classification': ClassificationAccumulator
+    }
+    if task not in accumulators:
+        raise ValueError(f"Tâche inconnue : {task}")
+    
+    temporal_metrics = {
+        'metric_values': [],
+        'relative_changes': []
+    }
+    
+    previous_metrics = None
+    for X_test, y_test in temporal_test_sets:
+        accumulator = accumulators[task]()
+        y_test = np.asarray(y_test)
+        for start in range(0, len(X_test), batch_size):
+            stop = start + batch_size
+            accumulator.update(y_test[start:stop], model.predict(X_test.iloc[start:stop]))
+        
+        current_metrics = accumulator.compute()
+        temporal_metrics['metric_values'].append(current_metrics)
+        
+        if previous_metrics is not None:
+            temporal_metrics['relative_changes'].append(
+                _relative_changes(previous_metrics, current_metrics)
+            )
+        
+        previous_metrics = current_metrics
+    
+    return temporal_metrics
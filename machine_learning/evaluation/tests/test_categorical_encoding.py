@@ -0,0 +1,38 @@
+import unittest
+import numpy as np
+import pandas as pd
+from ...utils.categorical_encoding import CategoricalVocabulary
+
+class TestCategoricalVocabulary(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Prépare un petit jeu de données catégorielles"""
+        cls.data = pd.DataFrame({
+            'nom_pathologie': ['Tuberculose', 'Asthme', 'Tuberculose', 'Grippe'],
+            'sexe': ['Homme', 'Femme', 'Femme', 'Homme'],
+            'nbr_hospi': [10, 20, 30, 40]
+        })
+        cls.vocabulary = CategoricalVocabulary.fit(cls.data, ['nom_pathologie', 'sexe'])
+    
+    def test_encoding_matches_label_encoder_order(self):
+        """Teste que les codes suivent l'ordre trié des modalités"""
+        encoded = self.vocabulary.encode(self.data)
+        self.assertEqual(encoded['nom_pathologie'].dtype, np.int16)
+        self.assertEqual(encoded['nom_pathologie'].tolist(), [2, 0, 2, 1])
+        self.assertEqual(self.data['nom_pathologie'].iloc[0], 'Tuberculose')
+    
+    def test_unknown_values(self):
+        """Teste l'encodage et le décodage des modalités inconnues"""
+        codes = self.vocabulary.encode_column('sexe', ['Femme', 'Inconnu'])
+        self.assertEqual(codes.tolist(), [0, -1])
+        self.assertEqual(self.vocabulary.decode('sexe', codes).tolist(), ['Femme', None])
+        missing = self.vocabulary.encode_column('sexe', pd.Series(['Homme', None, np.nan]))
+        self.assertEqual(missing.tolist(), [1, -1, -1])
+    
+    def test_round_trip(self):
+        """Teste la sérialisation au format label_encoders.json"""
+        restored = CategoricalVocabulary.from_dict(self.vocabulary.to_dict())
+        self.assertEqual(restored.categories, self.vocabulary.categories)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from ..metrics import (
+    RegressionAccumulator,
+    evaluate_duration_prediction,
+    evaluate_service_classification,
+    evaluate_temporal_stability_streaming
+)
+
+class TestDurationMetrics(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Prépare des durées synthétiques couvrant toutes les tranches"""
+        rng = np.random.default_rng(42)
+        cls.y_true = rng.uniform(0.5, 60, 5000)
+        cls.y_pred = cls.y_true + rng.normal(0, 2, 5000)
+        cls.weights = rng.uniform(0.1, 3, 5000)
+    
+    def test_matches_sklearn(self):
+        """Teste la cohérence des métriques globales avec scikit-learn"""
+        metrics = evaluate_duration_prediction(self.y_true, self.y_pred, sample_weight=self.weights)
+        self.assertAlmostEqual(metrics['mae'], mean_absolute_error(self.y_true, self.y_pred, sample_weight=self.weights))
+        self.assertAlmostEqual(metrics['rmse'], np.sqrt(mean_squared_error(self.y_true, self.y_pred, sample_weight=self.weights)))
+        self.assertAlmostEqual(metrics['r2'], r2_score(self.y_true, self.y_pred, sample_weight=self.weights))
+    
+    def test_buckets_cover_all_durations(self):
+        """Teste que les tranches sont contiguës (3.5 et 7.5 jours inclus)"""
+        y_true = np.array([1.0, 3.5, 7.5, 20.0, 45.0])
+        metrics = evaluate_duration_prediction(y_true, y_true + 1)
+        for label in ['0_3', '3_7', '7_14', '14_30', '30_inf']:
+            self.assertAlmostEqual(metrics[f'mae_{label}_days'], 1.0)
+    
+    def test_mape_ignores_zero_targets(self):
+        """Teste que les durées nulles n'entraînent pas de division par zéro"""
+        metrics = evaluate_duration_prediction(np.array([0.0, 2.0]), np.array([1.0, 3.0]))
+        self.assertAlmostEqual(metrics['mape'], 50.0)
+        self.assertTrue(np.isfinite(metrics['mae']))
+
+    def test_empty_input_and_buckets(self):
+        """Teste NaN pour une entrée vide et pour les tranches sans observation"""
+        metrics = evaluate_duration_prediction(np.array([]), np.array([]))
+        self.assertTrue(np.isnan(metrics['mae']))
+        self.assertTrue(np.isnan(metrics['mae_0_3_days']))
+        
+        metrics = evaluate_duration_prediction(np.array([1.0, 2.0]), np.array([2.0, 2.0]))
+        self.assertAlmostEqual(metrics['mae_0_3_days'], 0.5)
+        for label in ['3_7', '7_14', '14_30', '30_inf']:
+            self.assertTrue(np.isnan(metrics[f'mae_{label}_days']))
+            self.assertTrue(np.isnan(metrics[f'rmse_{label}_days']))
+
+class _NoisyModel:
+    """Modèle factice : renvoie la colonne 'pred' du lot reçu"""
+    def predict(self, X):
+        return X['pred'].to_numpy()
+
+class TestTemporalStabilityStreaming(unittest.TestCase):
+    def test_regression_matches_full_evaluation(self):
+        """Teste l'équivalence entre évaluation par lots et évaluation complète"""
+        rng = np.random.default_rng(0)
+        periods = []
+        for _ in range(3):
+            y = rng.uniform(1, 30, 1000)
+            periods.append((pd.DataFrame({'pred': y + rng.normal(0, 1, 1000)}), pd.Series(y)))
+        
+        results = evaluate_temporal_stability_streaming(_NoisyModel(), periods, batch_size=128)
+        self.assertEqual(len(results['metric_values']), 3)
+        self.assertEqual(len(results['relative_changes']), 2)
+        for (X, y), streamed in zip(periods, results['metric_values']):
+            expected = evaluate_duration_prediction(y, X['pred'])
+            for key in ['mae', 'rmse', 'r2', 'mape']:
+                self.assertAlmostEqual(streamed[key], expected[key])
+    
+    def test_regression_large_offset(self):
+        """Teste le R² par lots pour des valeurs grandes devant leur dispersion"""
+        rng = np.random.default_rng(1)
+        y = 1e9 + rng.normal(0, 1, 10_000)
+        pred = y + rng.normal(0, 0.1, 10_000)
+        
+        accumulator = RegressionAccumulator()
+        for start in range(0, len(y), 999):
+            accumulator.update(y[start:start + 999], pred[start:start + 999])
+        self.assertAlmostEqual(accumulator.compute()['r2'], r2_score(y, pred), places=6)
+        
+        # Fusion d'accumulateurs évalués séparément
+        left, right = RegressionAccumulator(), RegressionAccumulator()
+        left.update(y[:3000], pred[:3000])
+        right.update(y[3000:], pred[3000:])
+        merged = left.merge(right).compute()
+        self.assertAlmostEqual(merged['r2'], r2_score(y, pred), places=6)
+        self.assertAlmostEqual(merged['mae'], mean_absolute_error(y, pred))
+    
+    def test_classification_matches_full_evaluation(self):
+        """Teste la matrice de confusion incrémentale (labels découverts en cours de route)"""
+        y = np.array(['M', 'C', 'SSR', 'M', 'PSY', 'C', 'O', 'M'] * 50)
+        pred = np.roll(y, 3)
+        X = pd.DataFrame({'pred': pred})
+        
+        results = evaluate_temporal_stability_streaming(_NoisyModel(), [(X, y)], task='classification', batch_size=7)
+        expected = evaluate_service_classification(y, pred)
+        for key, value in expected.items():
+            self.assertAlmostEqual(results['metric_values'][0][key], value)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+import argparse
+import functools
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Variables du modèle de régression de la page de prédiction
+FEATURES = ['annee', 'nom_pathologie', 'nom_region']
+
+# Modèle PyCaret sauvegardé (best_model.pkl)
+MODEL_NAME = 'best_model'
+
+Triples = Union[pd.DataFrame, Iterable[Tuple[int, str, str]]]
+
+
+def _as_frame(triples: Triples) -> pd.DataFrame:
+    # Triplets (annee, nom_pathologie, nom_region) au format d'entrée du modèle
+    if isinstance(triples, pd.DataFrame):
+        frame = triples[FEATURES]
+    else:
+        frame = pd.DataFrame(list(triples), columns=FEATURES)
+    return pd.DataFrame({
+        'annee': frame['annee'].to_numpy().astype('int64'),
+        'nom_pathologie': frame['nom_pathologie'].astype(str).to_numpy(dtype=object),
+        'nom_region': frame['nom_region'].astype(str).to_numpy(dtype=object),
+    })
+
+
+class BatchPredictor:
+    """
+    Inférence par lots du modèle de régression des hospitalisations.
+
+    Le pipeline PyCaret est séparé une fois pour toutes en prétraitement
+    (étapes ajustées à l'entraînement) et estimateur final. Une prédiction
+    par lots dédoublonne les triplets, les prétraite en un seul appel puis
+    les prédit en un seul appel vectorisé, sans le coût fixe de
+    `predict_model` (copie des données, affichage et calcul des scores).
+    """
+
+    def __init__(self, model):
+        """
+        Sépare le pipeline du modèle
+
+        Args:
+            model: Pipeline chargé par `load_model` (ou tout estimateur scikit-learn)
+        """
+        self.model = model
+        steps = getattr(model, 'steps', None)
+        if steps and len(steps) > 1:
+            self.preprocess = model[:-1]
+            self.estimator = model[-1]
+        else:
+            self.preprocess = None
+            self.estimator = model
+
+    def transform(self, frame: pd.DataFrame):
+        """
+        Applique le prétraitement ajusté (encodage, normalisation, transformation)
+        """
+        return frame if self.preprocess is None else self.preprocess.transform(frame)
+
+    def predict(self, triples: Triples) -> np.ndarray:
+        """
+        Prédit le nombre d'hospitalisations de nombreux triplets en un seul appel
+
+        Args:
+            triples: DataFrame (colonnes annee, nom_pathologie, nom_region) ou
+                itérable de triplets (annee, nom_pathologie, nom_region)
+
+        Returns:
+            Prédictions, dans l'ordre des triplets
+        """
+        frame = _as_frame(triples)
+        if frame.empty:
+            return np.empty(0, dtype='float64')
+
+        # Chaque triplet distinct n'est prétraité et prédit qu'une fois
+        # (numérotés dans l'ordre de première apparition, comme drop_duplicates)
+        codes = frame.groupby(FEATURES, sort=False).ngroup().to_numpy()
+        unique = frame.drop_duplicates(ignore_index=True)
+        predictions = np.asarray(self.estimator.predict(self.transform(unique)), dtype='float64')
+        return predictions[codes]
+
+
+@functools.lru_cache(maxsize=None)
+def load_predictor(name: str = MODEL_NAME) -> BatchPredictor:
+    """
+    Charge le modèle sauvegardé une seule fois par processus
+
+    Args:
+        name: Modèle PyCaret sauvegardé (sans l'extension .pkl)
+
+    Returns:
+        Prédicteur par lots partagé
+    """
+    from pycaret.regression import load_model
+
+    return BatchPredictor(load_model(name, verbose=False))
+
+
+def prediction_grid(regions: Iterable[str], pathologies: Iterable[str], years: Iterable[int]) -> pd.DataFrame:
+    """
+    Toutes les combinaisons (année, pathologie, région)
+
+    Returns:
+        DataFrame des colonnes `FEATURES`, une ligne par combinaison
+    """
+    grid = pd.MultiIndex.from_product([list(years), list(pathologies), list(regions)], names=FEATURES).to_frame(index=False)
+    grid['annee'] = grid['annee'].astype('int64')
+    return grid
+
+
+def pycaret_predict_one(model) -> Callable[[pd.DataFrame], np.ndarray]:
+    """
+    Prédiction requête par requête telle que la faisait la page : `predict_model` de PyCaret
+
+    Args:
+        model: Pipeline chargé par `load_model`
+
+    Returns:
+        Fonction prédisant un DataFrame de triplets
+    """
+    from pycaret.regression import predict_model
+
+    def predict_one(frame: pd.DataFrame) -> np.ndarray:
+        return predict_model(model, data=frame, verbose=False)['prediction_label'].to_numpy()
+
+    return predict_one
+
+
+def throughput_benchmark(
+    predictor: BatchPredictor,
+    grid: pd.DataFrame,
+    per_request_sample: int = 50,
+    predict_one: Optional[Callable[[pd.DataFrame], np.ndarray]] = None
+) -> pd.DataFrame:
+    """
+    Compare le débit de l'inférence par lots et de l'inférence requête par requête
+
+    La prédiction requête par requête (un DataFrame d'une ligne par appel à
+    `predict_model`, comme le faisait la page) n'est mesurée que sur un
+    échantillon, puis extrapolée à la grille complète.
+
+    Args:
+        predictor: Prédicteur par lots
+        grid: Triplets à prédire
+        per_request_sample: Nombre de triplets prédits un par un
+        predict_one: Prédiction d'une requête (par défaut `pycaret_predict_one`
+            du modèle du prédicteur)
+
+    Returns:
+        DataFrame par mode (secondes pour la grille, prédictions par seconde)
+    """
+    if predict_one is None:
+        predict_one = pycaret_predict_one(predictor.model)
+
+    start = time.perf_counter()
+    batch = predictor.predict(grid)
+    batch_seconds = time.perf_counter() - start
+
+    sample = grid.head(per_request_sample)
+    start = time.perf_counter()
+    single = np.concatenate([predict_one(sample.iloc[[i]]) for i in range(len(sample))])
+    per_request_seconds = (time.perf_counter() - start) / max(len(sample), 1) * len(grid)
+    if not np.allclose(single, batch[:len(sample)], rtol=1e-4):
+        raise AssertionError("Les prédictions par lots diffèrent des prédictions unitaires")
+
+    rows: Dict[str, Dict[str, float]] = {
+        'par_lots': {'secondes': batch_seconds, 'predictions_par_seconde': len(grid) / batch_seconds},
+        'par_requete': {'secondes': per_request_seconds, 'predictions_par_seconde': len(grid) / per_request_seconds},
+    }
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+
+if __name__ == '__main__':
+    # Depuis la racine du dépôt : python -m machine_learning.hospitalisation_prediction.batch_inference
+    from utils.prediction_table import PREDICTIONS_PATH, PREDICTION_YEARS
+
+    parser = argparse.ArgumentParser(description="Débit de l'inférence par lots du modèle de prédiction")
+    parser.add_argument('--model', default=MODEL_NAME, help="Modèle PyCaret sauvegardé (sans l'extension .pkl)")
+    parser.add_argument('--predictions', default=PREDICTIONS_PATH, help="Table des prédictions (modalités des régions et pathologies)")
+    args = parser.parse_args()
+
+    table = pd.read_parquet(args.predictions)
+    grid = prediction_grid(
+        sorted(table['nom_region'].astype(str).unique()),
+        sorted(table['nom_pathologie'].astype(str).unique()),
+        PREDICTION_YEARS
+    )
+    print(f"{len(grid):,} triplets".replace(',', ' '))
+    print(throughput_benchmark(load_predictor(args.model), grid).round(4).to_string())
@@ -0,0 +1,64 @@
+import argparse
+import os
+from typing import Iterable
+
+import pandas as pd
+from google.cloud import bigquery
+
+from machine_learning.hospitalisation_prediction.batch_inference import MODEL_NAME, load_predictor, prediction_grid
+from machine_learning.utils.categorical_encoding import CategoricalVocabulary
+from utils.schema import apply_schema, MORBIDITE_SCHEMA
+from utils.prediction_table import PREDICTIONS_PATH, PREDICTION_YEARS, compact_predictions
+
+
+def training_scope(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Périmètre du modèle : niveau régional, tous sexes confondus
+    """
+    return df[(df['niveau'] == 'Régions') & (df['sexe'] == 'Ensemble')]
+
+
+def scoring_grid(vocabulary: CategoricalVocabulary, years: Iterable[int] = PREDICTION_YEARS) -> pd.DataFrame:
+    """
+    Toutes les combinaisons (année, pathologie, région) à prédire
+
+    Args:
+        vocabulary: Modalités connues du modèle (nom_region, nom_pathologie)
+        years: Années prédites
+
+    Returns:
+        DataFrame des colonnes annee, nom_pathologie, nom_region, une ligne par combinaison
+    """
+    return prediction_grid(vocabulary.categories['nom_region'], vocabulary.categories['nom_pathologie'], years)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Précalcule les prédictions d'hospitalisations de la page de prédiction")
+    parser.add_argument('--model', default=MODEL_NAME, help="Modèle PyCaret sauvegardé (sans l'extension .pkl)")
+    parser.add_argument('--output', default=PREDICTIONS_PATH, help="Fichier Parquet de la table des prédictions")
+    args = parser.parse_args()
+
+    # Modalités connues du modèle, issues des données d'entraînement
+    print("Chargement des données...")
+    client = bigquery.Client()
+    query = """
+    SELECT * FROM projet-jbn-data-le-wagon.dbt_medical_analysis_join_total_morbidite.class_join_total_morbidite_sexe_population
+    """
+    df = apply_schema(client.query(query).to_dataframe(), MORBIDITE_SCHEMA, 'class_join_total_morbidite_sexe_population')
+    vocabulary = CategoricalVocabulary.fit(training_scope(df), ['nom_region', 'nom_pathologie'])
+    grid = scoring_grid(vocabulary)
+
+    # load_model restaure le pipeline complet (prétraitement compris) : pas de setup() à relancer ;
+    # toutes les combinaisons sont prédites en un seul appel vectorisé
+    print(f"Prédiction de {len(grid):,} combinaisons...")
+    table = compact_predictions(grid, load_predictor(args.model).predict(grid))
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    table.to_parquet(args.output, index=False)
+    print(f"Table écrite dans {args.output} : {len(table):,} lignes, "
+          f"{table.memory_usage(deep=True).sum() / 1024:.0f} Ko en mémoire")
+
+
+if __name__ == '__main__':
+    # Depuis la racine du dépôt : python -m machine_learning.hospitalisation_prediction.batch_scoring
+    main()
@@ -5,6 +5,7 @@ import numpy as np
 from typing import Dict, List
 from geopy.distance import geodesic
 from geopy.geocoders import Nominatim
+from ..utils.categorical_encoding import CategoricalVocabulary
 
 class HospitalRecommender:
     """
@@ -15,13 +16,15 @@ class HospitalRecommender:
     def __init__(self):
         self.service_classifier = None
         self.duration_predictor = None
+        self.service_vocabulary = None
+        self.duration_vocabulary = None
         self.mlflow_client = MlflowClient()
         self.hospital_data = None
         self.geolocator = Nominatim(user_agent="hospital_recommender")
         
     def load_models(self, service_run_id: str, duration_run_id: str):
         """
-        Charge les modèles entraînés depuis MLflow
+        Charge les modèles entraînés et leurs vocabulaires catégoriels depuis MLflow
         
         Args:
             service_run_id: ID MLflow du modèle de classification de service
@@ -33,6 +36,12 @@ class HospitalRecommender:
         self.duration_predictor = mlflow.pycaret.load_model(
             f"runs:/{duration_run_id}/duration_predictor"
         )
+        self.service_vocabulary = CategoricalVocabulary.from_dict(
+            mlflow.load_dict(f"runs:/{service_run_id}/label_encoders.json")
+        )
+        self.duration_vocabulary = CategoricalVocabulary.from_dict(
+            mlflow.load_dict(f"runs:/{duration_run_id}/label_encoders.json")
+        )
     
     def load_hospital_data(self, data: pd.DataFrame):
         """
@@ -62,10 +71,16 @@ class HospitalRecommender:
         patient_df = pd.DataFrame([patient_data])
         
         # 1. Prédire le service nécessaire
-        service = self.service_classifier.predict(patient_df)[0]
+        service = self.service_classifier.predict(
+            self._encode(patient_df, self.service_vocabulary)
+        )[0]
+        if self.service_vocabulary is not None and 'classification' in self.service_vocabulary:
+            service = self.service_vocabulary.decode('classification', [service])[0]
         
         # 2. Prédire la durée estimée du séjour
-        estimated_duration = self.duration_predictor.predict(patient_df)[0]
+        estimated_duration = self.duration_predictor.predict(
+            self._encode(patient_df, self.duration_vocabulary)
+        )[0]
         
         # 3. Calculer les scores pour chaque hôpital
         recommendations = self._get_hospital_recommendations(
@@ -76,6 +91,15 @@ class HospitalRecommender:
         
         return recommendations
     
+    @staticmethod
+    def _encode(patient_df: pd.DataFrame, vocabulary: CategoricalVocabulary) -> pd.DataFrame:
+        """
+        Encode les données patient avec le vocabulaire du modèle (si disponible)
+        """
+        if vocabulary is None:
+            return patient_df
+        return vocabulary.encode(patient_df)
+    
     def _calculate_distance_score(self, hospital_location: str, patient_location: str) -> float:
         """
         Calcule un score basé sur la distance entre l'hôpital et le patient
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional
+
+# Code attribué aux valeurs absentes du vocabulaire (valeur inconnue ou manquante)
+UNKNOWN_CODE = -1
+
+
+class CategoricalVocabulary:
+    """
+    Vocabulaire persistant des variables catégorielles.
+
+    Construit une seule fois à partir des données d'entraînement, il encode les
+    colonnes en codes int16 (recherche dans un `pd.Index` des modalités) et se sérialise en dictionnaire
+    {colonne: liste des modalités}, le même format que l'ancien
+    `label_encoders.json`, pour être stocké à côté du modèle dans MLflow.
+    """
+
+    def __init__(self, categories: Dict[str, List]):
+        """
+        Initialise le vocabulaire
+
+        Args:
+            categories: Dictionnaire {colonne: liste ordonnée des modalités}
+        """
+        for column, values in categories.items():
+            if len(values) > np.iinfo(np.int16).max:
+                raise ValueError(f"Trop de modalités pour un encodage int16 : {column}")
+        self.categories = {column: list(values) for column, values in categories.items()}
+        # Index des modalités, construits une fois : l'encodage est une simple recherche
+        self._indexes = {column: pd.Index(values) for column, values in self.categories.items()}
+
+    @classmethod
+    def fit(cls, data: pd.DataFrame, columns: Iterable[str]) -> 'CategoricalVocabulary':
+        """
+        Construit le vocabulaire à partir des données
+
+        Args:
+            data: DataFrame contenant les colonnes catégorielles
+            columns: Colonnes à inclure dans le vocabulaire
+
+        Returns:
+            Le vocabulaire, modalités triées comme avec un LabelEncoder
+        """
+        return cls({
+            column: sorted(pd.unique(data[column].dropna()).tolist())
+            for column in columns
+        })
+
+    @classmethod
+    def from_dict(cls, categories: Optional[Dict[str, List]]) -> Optional['CategoricalVocabulary']:
+        if categories is None:
+            return None
+        return cls(categories)
+
+    def to_dict(self) -> Dict[str, List]:
+        return {column: list(values) for column, values in self.categories.items()}
+
+    def encode(self, data: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+        """
+        Remplace les colonnes du vocabulaire par leurs codes int16
+
+        Args:
+            data: DataFrame à encoder
+            inplace: Modifier directement `data` plutôt qu'une copie superficielle
+
+        Returns:
+            DataFrame encodé ; les colonnes hors vocabulaire partagent la mémoire de `data`
+        """
+        encoded = data if inplace else data.copy(deep=False)
+        for column, values in self.categories.items():
+            if column in encoded.columns:
+                encoded[column] = self.encode_column(column, encoded[column])
+        return encoded
+
+    def encode_column(self, column: str, values: Iterable) -> np.ndarray:
+        """
+        Codes int16 des valeurs d'une colonne (`UNKNOWN_CODE` hors vocabulaire)
+        """
+        if not isinstance(values, (pd.Series, pd.Index, np.ndarray)):
+            values = np.asarray(list(values), dtype=object)
+        return self._indexes[column].get_indexer(values).astype(np.int16)
+
+    def decode(self, column: str, codes: Iterable[int]) -> np.ndarray:
+        """
+        Retrouve les modalités à partir des codes (None pour un code inconnu)
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        categories = np.asarray(self.categories[column] + [None], dtype=object)
+        codes = np.where((codes < 0) | (codes >= len(categories) - 1), len(categories) - 1, codes)
+        return categories[codes]
+
+    def __contains__(self, column: str) -> bool:
+        return column in self.categories
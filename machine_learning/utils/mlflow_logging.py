@@ -0,0 +1,157 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from mlflow.entities import Metric, Param
+from mlflow.tracking import MlflowClient
+
+# Limites imposées par l'API MLflow pour un appel log_batch
+MAX_METRICS_PER_BATCH = 1000
+MAX_PARAMS_PER_BATCH = 100
+MAX_PARAM_VALUE_LENGTH = 500
+
+# Seuils d'envoi automatique du tampon (nombre d'éléments, secondes)
+DEFAULT_BATCH_SIZE = MAX_METRICS_PER_BATCH
+DEFAULT_FLUSH_INTERVAL = 10.0
+
+
+class BatchedMlflowLogger:
+    """
+    Tampon de logging MLflow : les paramètres, métriques et artefacts sont
+    accumulés en mémoire puis envoyés par appels `log_batch` groupés.
+
+    Le tampon est envoyé dès qu'il atteint `batch_size` éléments ou que
+    `flush_interval` secondes se sont écoulées depuis le dernier envoi, et
+    à la fermeture. En mode asynchrone, ces envois se font dans un thread
+    dédié pendant que l'entraînement continue ; seul `close()` les attend.
+    """
+
+    def __init__(
+        self,
+        run_id: str,
+        asynchronous: bool = False,
+        client: Optional[MlflowClient] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: Optional[float] = DEFAULT_FLUSH_INTERVAL
+    ):
+        """
+        Initialise le tampon de logging
+
+        Args:
+            run_id: ID du run MLflow dans lequel logger
+            asynchronous: Si True, les envois sont faits dans un thread dédié
+            client: Client MLflow à utiliser (créé par défaut)
+            batch_size: Nombre d'éléments en attente déclenchant un envoi
+            flush_interval: Délai maximal entre deux envois, en secondes (None : aucun)
+        """
+        self.run_id = run_id
+        self.client = client or MlflowClient()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._params: Dict[str, str] = {}
+        self._metrics: List[Metric] = []
+        self._artifacts: List[tuple] = []
+        self._executor = ThreadPoolExecutor(max_workers=1) if asynchronous else None
+        self._pending: List[Future] = []
+        self._last_flush = time.monotonic()
+
+    def log_param(self, key: str, value: Any):
+        self._params[key] = str(value)[:MAX_PARAM_VALUE_LENGTH]
+        self._flush_if_due()
+
+    def log_params(self, params: Dict[str, Any]):
+        for key, value in params.items():
+            self.log_param(key, value)
+
+    def log_metric(self, key: str, value: float, step: int = 0):
+        timestamp = int(time.time() * 1000)
+        self._metrics.append(Metric(key, float(value), timestamp, step))
+        self._flush_if_due()
+
+    def log_metrics(self, metrics: Dict[str, float], step: int = 0):
+        for key, value in metrics.items():
+            self.log_metric(key, value, step)
+
+    def log_dict(self, dictionary: Dict, artifact_file: str):
+        self._artifacts.append((dictionary, artifact_file))
+        self._flush_if_due()
+
+    def _flush_if_due(self):
+        # Envoi dès qu'un seuil est atteint, sans attendre les envois précédents
+        size = len(self._params) + len(self._metrics) + len(self._artifacts)
+        interval_elapsed = (
+            self.flush_interval is not None
+            and time.monotonic() - self._last_flush >= self.flush_interval
+        )
+        if size >= self.batch_size or interval_elapsed:
+            self.flush()
+
+    def flush(self) -> Optional[Future]:
+        """
+        Envoie le contenu du tampon à MLflow et le vide
+
+        Returns:
+            Le Future de l'envoi en mode asynchrone, None sinon
+        """
+        params = [Param(k, v) for k, v in self._params.items()]
+        metrics, artifacts = self._metrics, self._artifacts
+        self._params, self._metrics, self._artifacts = {}, [], []
+        self._last_flush = time.monotonic()
+
+        if not (params or metrics or artifacts):
+            return None
+
+        if self._executor is None:
+            self._send(params, metrics, artifacts)
+            return None
+
+        # Les envois terminés sont retirés (une erreur est propagée dès maintenant)
+        for future in [future for future in self._pending if future.done()]:
+            self._pending.remove(future)
+            future.result()
+
+        future = self._executor.submit(self._send, params, metrics, artifacts)
+        self._pending.append(future)
+        return future
+
+    def close(self):
+        """
+        Vide le tampon et attend la fin des envois en cours
+        """
+        if self._executor is None:
+            self.flush()
+            return
+        try:
+            self.flush()
+            for future in self._pending:
+                # Propage une éventuelle erreur survenue dans le thread
+                future.result()
+        finally:
+            # Le thread d'envoi est arrêté même si un envoi a échoué
+            self._pending = []
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _send(self, params: List[Param], metrics: List[Metric], artifacts: List[tuple]):
+        # Un seul aller-retour tant que les limites de l'API sont respectées
+        n_batches = max(
+            -(-len(params) // MAX_PARAMS_PER_BATCH),
+            -(-len(metrics) // MAX_METRICS_PER_BATCH),
+            1
+        )
+        for i in range(n_batches):
+            self.client.log_batch(
+                self.run_id,
+                metrics=metrics[i * MAX_METRICS_PER_BATCH:(i + 1) * MAX_METRICS_PER_BATCH],
+                params=params[i * MAX_PARAMS_PER_BATCH:(i + 1) * MAX_PARAMS_PER_BATCH]
+            )
+
+        for dictionary, artifact_file in artifacts:
+            self.client.log_dict(self.run_id, dictionary, artifact_file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
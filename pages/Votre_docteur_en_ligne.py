@@ -1,7 +1,19 @@
 import streamlit as st
 from langchain_openai import AzureChatOpenAI
 import pandas as pd
+import uuid
 from google.cloud import bigquery
+from utils.schema import apply_schema, MORBIDITE_SCHEMA, CAPACITE_SCHEMA
+from utils.projection import project
+from utils.bigquery_loader import load_tables
+from utils.chat_context import (
+    summarize_by_year, build_fact_snippets, FactIndex, select_context, build_history, estimate_tokens
+)
+from utils.llm_streaming import stream_llm
+from utils.answer_cache import SemanticAnswerCache, is_cacheable, history_digest
+from utils.snapshot import snapshot_version
+from utils.tracing import Tracer
+from utils.worker_pool import shared_pool, PoolBusyError, LLM_REQUEST_TIMEOUT, LLM_MAX_RETRIES
 
 
 # Chargement des données
@@ -12,30 +24,39 @@ def fetch_data():
         gcp_service_account = st.secrets["gcp_service_account"]
         client = bigquery.Client.from_service_account_info(gcp_service_account)
         
-        # Chargement du dataset principal
-        df_complet = client.query('''
-            SELECT * FROM `projet-jbn-data-le-wagon.dbt_medical_analysis_join_total_morbidite.class_join_total_morbidite_population`
-        ''').to_dataframe()
+        # Chargement du dataset principal et des données de capacité :
+        # requêtes soumises ensemble, résultats téléchargés en parallèle
+        tables, _ = load_tables(client, {
+            'class_join_total_morbidite_population': '''
+                SELECT * FROM `projet-jbn-data-le-wagon.dbt_medical_analysis_join_total_morbidite.class_join_total_morbidite_population`
+            ''',
+            'class_join_total_morbidite_capacite': '''
+                SELECT * FROM `projet-jbn-data-le-wagon.dbt_medical_analysis_join_total_morbidite_capacite.class_join_total_morbidite_capacite`
+            '''
+        })
+        df_complet = tables['class_join_total_morbidite_population']
+        
+        df_complet = apply_schema(df_complet, MORBIDITE_SCHEMA, 'class_join_total_morbidite_population')
         
         # Convertir les colonnes year en datetime
         df_complet['year'] = pd.to_datetime(df_complet['year'])
         
         # Créer des vues spécifiques
-        df_nbr_hospi = df_complet[[
+        df_nbr_hospi = project(df_complet, [
             'year', 'region', 'nom_region', 'pathologie', 'nom_pathologie', 'sexe',
             'nbr_hospi', 'evolution_nbr_hospi', 'evolution_percent_nbr_hospi',
             'hospi_prog_24h', 'hospi_autres_24h', 'hospi_total_24h'
-        ]].copy()
+        ])
 
-        df_duree_hospi = df_complet[[
+        df_duree_hospi = project(df_complet, [
             'year', 'region', 'nom_region', 'pathologie', 'nom_pathologie',
             'AVG_duree_hospi', 'evolution_AVG_duree_hospi', 'evolution_percent_AVG_duree_hospi'
-        ]].copy()
+        ])
         
         # Charger les données de capacité
-        df_capacite_hospi = client.query('''
-            SELECT * FROM `projet-jbn-data-le-wagon.dbt_medical_analysis_join_total_morbidite_capacite.class_join_total_morbidite_capacite`
-        ''').to_dataframe()
+        df_capacite_hospi = tables['class_join_total_morbidite_capacite']
+        
+        df_capacite_hospi = apply_schema(df_capacite_hospi, CAPACITE_SCHEMA, 'class_join_total_morbidite_capacite')
         
         # Convertir la colonne year en datetime pour df_capacite_hospi
         df_capacite_hospi['year'] = pd.to_datetime(df_capacite_hospi['year'])
@@ -52,87 +73,78 @@ df_nbr_hospi, df_duree_hospi, df_capacite_hospi, df_complet = fetch_data()
 st.title(" Parle avec un docteur 👨‍⚕️")
 
 
-def get_data_context():
-    context = []
-    
+# Budgets de tokens du prompt (contexte de données et historique)
+CONTEXT_TOKEN_BUDGET = 1200
+HISTORY_TOKEN_BUDGET = 600
+
+# Délai maximal d'une réponse du LLM (secondes)
+LLM_TIMEOUT = 60
+
+@st.cache_resource
+def load_data_context():
+    """
+    Résumé annuel et index des faits, construits une seule fois par jeu de données chargé
+    """
+    data_by_year = summarize_by_year(df_nbr_hospi, df_duree_hospi, df_complet)
+    index = FactIndex(build_fact_snippets(df_nbr_hospi, df_duree_hospi, data_by_year))
+    return data_by_year, index
+
+def get_data_context(question):
     try:
-        if not df_nbr_hospi.empty:
-            years = sorted(df_nbr_hospi['year'].dt.year.unique())
-            
-            # Créer un dictionnaire de données par année
-            data_by_year = {}
-            for year in years:
-                year_data = {}
-                
-                # Données d'hospitalisation pour l'année
-                year_hospi = df_nbr_hospi[df_nbr_hospi['year'].dt.year == year]
-                year_data['total_hospi'] = year_hospi['nbr_hospi'].sum()
-                year_data['prog_24h'] = year_hospi['hospi_prog_24h'].sum()
-                year_data['autres_24h'] = year_hospi['hospi_autres_24h'].sum()
-                
-                # Durée moyenne pour l'année
-                year_duree = df_duree_hospi[df_duree_hospi['year'].dt.year == year]
-                year_data['avg_duration'] = year_duree['AVG_duree_hospi'].mean()
-                
-                # Top 5 régions pour l'année
-                top_regions = year_hospi.groupby('nom_region')['nbr_hospi'].sum().nlargest(5).to_dict()
-                year_data['top_regions'] = top_regions
-                
-                # Services pour l'année
-                services_data = {}
-                for code, nom in {
-                    'M': 'Médecine',
-                    'C': 'Chirurgie',
-                    'SSR': 'Soins de suite et réadaptation',
-                    'O': 'Obstétrique',
-                    'PSY': 'Psychiatrie',
-                    'ESND': 'Établissement de soin longue durée'
-                }.items():
-                    service_data = df_complet[
-                        (df_complet['classification'] == code) & 
-                        (df_complet['year'].dt.year == year)
-                    ]
-                    if not service_data.empty:
-                        services_data[nom] = service_data['nbr_hospi'].sum()
-                year_data['services'] = services_data
-                
-                # Top 10 pathologies pour l'année
-                top_pathologies = year_hospi.groupby('nom_pathologie')['nbr_hospi'].sum().nlargest(10).to_dict()
-                year_data['top_pathologies'] = top_pathologies
-                
-                data_by_year[year] = year_data
-            
-            # Information générale
-            context.append("📊 Données disponibles par année:")
-            context.append(f"- Période couverte: de {min(years)} à {max(years)}")
-            context.append("\nPour chaque année, vous avez accès aux informations suivantes:")
-            context.append("- Nombre total d'hospitalisations")
-            context.append("- Hospitalisations programmées et non programmées")
-            context.append("- Durée moyenne des séjours")
-            context.append("- Top 5 des régions")
-            context.append("- Répartition par service médical")
-            context.append("- Top 10 des pathologies")
-            context.append("\nUtilisez ces données en spécifiant l'année souhaitée dans votre réponse.")
-            
-            # Ajouter le dictionnaire de données au contexte
-            context.append("\nDonnées détaillées par année:")
-            context.append(str(data_by_year))
-    
+        if df_nbr_hospi is not None and not df_nbr_hospi.empty:
+            data_by_year, index = load_data_context()
+            return select_context(index, question, data_by_year, token_budget=CONTEXT_TOKEN_BUDGET)
     except Exception as e:
-        context.append("⚠️ Certaines données ne sont pas disponibles pour le moment.")
         st.error(f"Erreur lors de la récupération du contexte : {str(e)}")
+        return "⚠️ Certaines données ne sont pas disponibles pour le moment."
     
-    return "\n".join(context)
+    return ""
+
+@st.cache_resource
+def load_data_version():
+    """Version du jeu de données chargé, utilisée dans les clés du cache des réponses"""
+    return snapshot_version(df_complet)
+
+@st.cache_resource
+def get_answer_cache():
+    """Cache des réponses, partagé entre les sessions"""
+    return SemanticAnswerCache()
 
 def get_ai_response(prompt):
-    context = get_data_context()
+    # Trace de la question (cache, contexte, LLM) ajoutée au journal JSONL
+    tracer = Tracer('votre_docteur_en_ligne')
+    with tracer.span("question", 'question', question=prompt) as root:
+        response = answer_question(prompt, tracer, root)
+    tracer.flush()
+    return response
+
+def answer_cache_version():
+    """Version des clés du cache : données chargées et échanges précédant la question"""
+    previous = st.session_state.get("messages", [])[:-1]
+    return f"{load_data_version()}:{history_digest(previous)}"
+
+def answer_question(prompt, tracer, root):
+    # Les questions autonomes déjà posées sur les mêmes données, après le même
+    # historique (en pratique en début de conversation), sont servies depuis le cache
+    answer_cache = get_answer_cache()
+    cacheable = df_complet is not None and is_cacheable(prompt)
+    if cacheable:
+        cache_version = answer_cache_version()
+        with tracer.span("cache des réponses", 'cache') as span:
+            cached = answer_cache.get(prompt, cache_version)
+            span['attributes']['hit'] = cached is not None
+        if cached:
+            st.markdown(cached)
+            return cached
     
-    # Construire l'historique de la conversation
-    conversation_history = ""
-    if "messages" in st.session_state and len(st.session_state.messages) > 0:
-        for msg in st.session_state.messages:
-            role = "Assistant" if msg["role"] == "assistant" else "Patient"
-            conversation_history += f"{role}: {msg['content']}\n"
+    with tracer.span("sélection du contexte", 'context') as span:
+        context = get_data_context(prompt)
+        
+        # Historique glissant : derniers échanges complets et résumé des plus anciens
+        conversation_history = build_history(st.session_state.get("messages", []), token_budget=HISTORY_TOKEN_BUDGET)
+        span['attributes'].update(
+            context_tokens=estimate_tokens(context), history_tokens=estimate_tokens(conversation_history)
+        )
     
     enhanced_prompt = f"""En tant qu'assistant spécialisé dans le domaine hospitalier français, je vais vous aider en me basant sur les données suivantes :
 
@@ -165,18 +177,43 @@ Veuillez répondre de manière concise et factuelle tels un médecin."""
             azure_deployment=st.secrets["azure"]["AZURE_DEPLOYMENT_NAME"],
             azure_endpoint=st.secrets["azure"]["AZURE_ENDPOINT"],
             api_key=st.secrets["azure"]["AZURE_API_KEY"],
-            temperature=0.2
+            temperature=0.2,
+            timeout=LLM_REQUEST_TIMEOUT,
+            max_retries=LLM_MAX_RETRIES
         )
-        response = llm.invoke(enhanced_prompt)
-        return str(response.content) if hasattr(response, 'content') else str(response)
+        # Affichage de la réponse au fil de la génération
+        with tracer.span("réponse du LLM", 'llm', prompt_chars=len(enhanced_prompt)) as span:
+            # Appel exécuté dans le pool partagé (une requête à la fois par session)
+            stream = stream_llm(
+                llm, enhanced_prompt,
+                pool=shared_pool(),
+                session_id=st.session_state.setdefault("session_id", uuid.uuid4().hex),
+                timeout=LLM_TIMEOUT
+            )
+            response = st.write_stream(stream)
+            if stream.time_to_first_token is not None:
+                span['attributes']['time_to_first_token_ms'] = round(stream.time_to_first_token * 1000, 2)
+        if cacheable:
+            answer_cache.set(prompt, cache_version, response)
+        return response
+    except (PoolBusyError, TimeoutError) as e:
+        st.warning(str(e))
+        root['attributes']['error'] = str(e)
+        return None
     except Exception as e:
         st.error(f"Error: Make sure your Azure OpenAI credentials are properly set in .streamlit/secrets.toml. Error details: {str(e)}")
+        root['attributes']['error'] = str(e)
         return None
 
 # Initialize chat history
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+def ask(question):
+    """Ajoute la question à l'historique ; la réponse est diffusée sous l'historique"""
+    st.session_state.messages.append({"role": "user", "content": question})
+    st.session_state.pending_question = question
+
 # Create containers first
 chat_container = st.container()
 input_container = st.container()
@@ -189,36 +226,25 @@ col1, col2 = questions_container.columns(2)
 with col1:
     if st.button("🏥 Quelle est la tendance des hospitalisations en France ?"):
         question = "Quelle est la tendance des hospitalisations en France ?"
-        st.session_state.messages.append({"role": "user", "content": question})
-        response = get_ai_response(question)
-        if response:
-            st.session_state.messages.append({"role": "assistant", "content": response})
-        st.rerun()
+        ask(question)
     
     if st.button("📊 Quelle région a le plus d'hospitalisations ?"):
         question = "Quelle région a le plus d'hospitalisations ?"
-        st.session_state.messages.append({"role": "user", "content": question})
-        response = get_ai_response(question)
-        if response:
-            st.session_state.messages.append({"role": "assistant", "content": response})
-        st.rerun()
+        ask(question)
 
 with col2:
     if st.button("⏱️ Quelle est la durée moyenne d'hospitalisation ?"):
         question = "Quelle est la durée moyenne d'hospitalisation en Gironde ?"
-        st.session_state.messages.append({"role": "user", "content": question})
-        response = get_ai_response(question)
-        if response:
-            st.session_state.messages.append({"role": "assistant", "content": response})
-        st.rerun()
+        ask(question)
     
     if st.button("📋 Y a-t-il plus d'hospitalisations programmées ou non programmées ?"):
         question = "Y a-t-il plus d'hospitalisations programmées ou non programmées ?"
-        st.session_state.messages.append({"role": "user", "content": question})
-        response = get_ai_response(question)
-        if response:
-            st.session_state.messages.append({"role": "assistant", "content": response})
-        st.rerun()
+        ask(question)
+
+# Place the input at the bottom
+with input_container:
+    if prompt := st.chat_input("Posez votre question sur le milieu hospitalier..."):
+        ask(prompt)
 
 # Display chat messages in the chat container
 with chat_container:
@@ -226,11 +252,10 @@ with chat_container:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
-# Place the input at the bottom
-with input_container:
-    if prompt := st.chat_input("Posez votre question sur le milieu hospitalier..."):
-        st.session_state.messages.append({"role": "user", "content": prompt})
-        response = get_ai_response(prompt)
+    # Réponse diffusée sous la dernière question posée
+    if question := st.session_state.pop("pending_question", None):
+        with st.chat_message("assistant"):
+            response = get_ai_response(question)
         if response:
             st.session_state.messages.append({"role": "assistant", "content": response})
             st.rerun()
@@ -5,7 +5,6 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from google.cloud import bigquery
 from streamlit_extras.metric_cards import style_metric_cards 
-import time
 import folium
 from streamlit_folium import st_folium
 import json
@@ -13,6 +12,14 @@ from pygwalker.api.streamlit import StreamlitRenderer
 import pygwalker as pyg
 from langchain_openai import AzureChatOpenAI
 import numpy as np
+from utils.schema import apply_schema, MORBIDITE_SCHEMA, CAPACITE_SCHEMA
+from utils.evolution import evolution_table
+from utils.pathology_facts import pathology_year_facts, top_pathologies
+from utils.main_metrics import MainMetrics
+from utils.frame_cache import frame_cache, stamp_snapshot
+from utils.projection import project
+from utils.bigquery_loader import load_tables
+from utils.load_progress import LoadProgress
 
 
 # Styles CSS personnalisés
@@ -59,24 +66,39 @@ MAIN_COLOR = '#003366'  # Bleu marine principal
 SECONDARY_COLOR = '#AFDC8F'  # Vert clair complémentaire
 ACCENT_COLOR = '#3D7317'  # Vert foncé pour les accents
 
+TABLES = ['class_join_total_morbidite_sexe_population', 'class_join_total_morbidite_capacite']
+
 # Fonction de chargement des données avec gestion d'erreurs
 @st.cache_resource
-def fetch_data():
+def fetch_data(_on_stage=None):
     try:
         # Chargement des secrets
         gcp_service_account = st.secrets["gcp_service_account"]
         client = bigquery.Client.from_service_account_info(gcp_service_account)
         
-        # Chargement du dataset principal qui contient toutes les données
-        df_complet = client.query('''
-            SELECT * FROM `projet-jbn-data-le-wagon.dbt_medical_analysis_join_total_morbidite.class_join_total_morbidite_sexe_population`
-        ''').to_dataframe()
+        # Chargement du dataset principal qui contient toutes les données et des données de capacité :
+        # requêtes soumises ensemble, résultats téléchargés en parallèle
+        tables, _ = load_tables(client, {
+            'class_join_total_morbidite_sexe_population': '''
+                SELECT * FROM `projet-jbn-data-le-wagon.dbt_medical_analysis_join_total_morbidite.class_join_total_morbidite_sexe_population`
+            ''',
+            'class_join_total_morbidite_capacite': '''
+                SELECT * FROM `projet-jbn-data-le-wagon.dbt_medical_analysis_join_total_morbidite_capacite.class_join_total_morbidite_capacite`
+            '''
+        }, on_stage=_on_stage)
+        notify = _on_stage or (lambda stage, name, info: None)
+        df_complet = tables['class_join_total_morbidite_sexe_population']
+        
+        df_complet = apply_schema(df_complet, MORBIDITE_SCHEMA, 'class_join_total_morbidite_sexe_population')
         
         # Convertir les colonnes year en datetime
         df_complet['year'] = pd.to_datetime(df_complet['year'])
+        stamp_snapshot(df_complet, 'vue_globale_morbidite')
+        notify('converted', 'class_join_total_morbidite_sexe_population', {})
         
         # Créer des vues spécifiques pour maintenir la compatibilité avec le code existant
-        df_nbr_hospi = df_complet[[
+        # (projections partageant les données de df_complet, sans copie)
+        df_nbr_hospi = project(df_complet, [
             'niveau', 'year', 'region', 'nom_region', 'pathologie', 'nom_pathologie', 'sexe',
             'nbr_hospi', 'evolution_nbr_hospi', 'evolution_percent_nbr_hospi','hospi_prog_24h','hospi_autres_24h','hospi_total_24h',
             'hospi_1J','hospi_2J','hospi_3J','hospi_4J','hospi_5J','hospi_6J','hospi_7J','hospi_8J','hospi_9J','hospi_10J_19J','hospi_20J_29J',
@@ -87,15 +109,15 @@ def fetch_data():
             'tranche_age_15_24', 'tranche_age_25_34', 'tranche_age_35_44',
             'tranche_age_45_54', 'tranche_age_55_64', 'tranche_age_65_74',
             'tranche_age_75_84', 'tranche_age_85_et_plus','classification',
-        ]].copy()
+        ])
 
-        df_duree_hospi = df_complet[[
+        df_duree_hospi = project(df_complet, [
             'niveau','year', 'region', 'nom_region', 'pathologie', 'nom_pathologie', 'sexe',
             'AVG_duree_hospi', 'evolution_AVG_duree_hospi', 'evolution_percent_AVG_duree_hospi',
             'evolution_hospi_total_jj','classification',
-        ]].copy()
+        ])
 
-        df_tranche_age_hospi = df_complet[[
+        df_tranche_age_hospi = project(df_complet, [
             'niveau','year', 'region', 'nom_region', 'pathologie', 'nom_pathologie',
             'tranche_age_0_1', 'tranche_age_1_4', 'tranche_age_5_14',
             'tranche_age_15_24', 'tranche_age_25_34', 'tranche_age_35_44',
@@ -103,15 +125,17 @@ def fetch_data():
             'tranche_age_75_84', 'tranche_age_85_et_plus',
             'tx_brut_tt_age_pour_mille', 'tx_standard_tt_age_pour_mille',
             'indice_comparatif_tt_age_percent','classification'
-        ]].copy()
+        ])
         
         # Charger uniquement les données de capacité
-        df_capacite_hospi = client.query('''
-            SELECT * FROM `projet-jbn-data-le-wagon.dbt_medical_analysis_join_total_morbidite_capacite.class_join_total_morbidite_capacite`
-        ''').to_dataframe()
+        df_capacite_hospi = tables['class_join_total_morbidite_capacite']
+        
+        df_capacite_hospi = apply_schema(df_capacite_hospi, CAPACITE_SCHEMA, 'class_join_total_morbidite_capacite')
         
         # Convertir la colonne year en datetime pour df_capacite_hospi
         df_capacite_hospi['year'] = pd.to_datetime(df_capacite_hospi['year'])
+        stamp_snapshot(df_capacite_hospi, 'vue_globale_capacite')
+        notify('converted', 'class_join_total_morbidite_capacite', {})
         
         return df_nbr_hospi, df_duree_hospi, df_tranche_age_hospi, df_capacite_hospi, df_complet
         
@@ -119,24 +143,14 @@ def fetch_data():
         st.error(f"Erreur lors du chargement des données : {str(e)}")
         return None, None, None, None, None
 
-# Fonction pour calculer les métriques de la page principale
-@st.cache_data
+# Totaux annuels pour toutes les valeurs de sexe, calculés une seule fois par version des données
+@frame_cache.memoize
+def load_main_metrics(df_nbr_hospi, df_capacite_hospi):
+    return MainMetrics(df_nbr_hospi, df_capacite_hospi)
+
+# Fonction pour calculer les métriques de la page principale : simple lecture des totaux
 def calculate_main_metrics(df_nbr_hospi, df_capacite_hospi, selected_sex='Ensemble'):
-    metrics = {}
-    
-    # Calcul des hospitalisations par année
-    df_hospi_filtered = df_nbr_hospi[(df_nbr_hospi['sexe'] == selected_sex) & (df_nbr_hospi['niveau'] == 'Départements')]
-    for year in range(2018, 2023):
-        total_hospi = df_hospi_filtered["nbr_hospi"][df_hospi_filtered["year"].dt.year == year].sum()
-        metrics[f"hospi_{year}"] = total_hospi
-
-    # Calcul des lits disponibles par année
-    df_capacite_filtered = df_capacite_hospi[df_capacite_hospi['niveau'] == 'Départements']
-    lits_disponibles = df_capacite_filtered.groupby('year')['lit_hospi_complete'].sum().reset_index()
-    for year in range(2018, 2023):
-        metrics[f"lits_{year}"] = lits_disponibles[lits_disponibles['year'].dt.year == year]['lit_hospi_complete'].sum()
-    
-    return metrics
+    return load_main_metrics(df_nbr_hospi, df_capacite_hospi).for_sex(selected_sex)
 
 # Interface de chargement
 def load_with_progress():
@@ -166,9 +180,9 @@ def load_with_progress():
         progress_bar = st.progress(0, text="Initialisation du chargement...")
     
     try:
-        # Chargement des données
-        progress_bar.progress(10, text="Chargement des données...")
-        df_nbr_hospi, df_duree_hospi, df_tranche_age_hospi, df_capacite_hospi, df_complet = fetch_data()
+        # Chargement des données : la barre suit les étapes réelles (requêtes, lignes, conversion)
+        progress = LoadProgress(TABLES, progress_bar)
+        df_nbr_hospi, df_duree_hospi, df_tranche_age_hospi, df_capacite_hospi, df_complet = fetch_data(_on_stage=progress)
         
         if df_complet is None:
             gif_placeholder.empty()
@@ -176,11 +190,10 @@ def load_with_progress():
             st.stop()
         
         # Calcul des métriques
-        progress_bar.progress(80, text="Calcul des métriques...")
+        progress('metrics')
         metrics = calculate_main_metrics(df_nbr_hospi, df_capacite_hospi, 'Ensemble')
-        
-        progress_bar.progress(100, text="Chargement terminé!")
-        time.sleep(0.5)
+        progress('done')
+        progress.log_metrics()
         
         # Clear loading interface
         gif_placeholder.empty()
@@ -194,6 +207,17 @@ def load_with_progress():
         st.error(f"Erreur inattendue: {str(e)}")
         st.stop()
 
+# Tableau « Évolution des pathologies », mis en cache selon la version des données
+# et les étiquettes des lignes retenues par les filtres (valeurs non hachées)
+@frame_cache.memoize
+def get_evolution_table(df, by=('nom_pathologie',), labels=None):
+    return evolution_table(df, by, labels=labels)
+
+# Table pathologie × année des graphiques animés, construite une seule fois par version des données
+@frame_cache.memoize
+def load_pathology_year_facts(df):
+    return pathology_year_facts(df, year_col='year')
+
 def format_number(number):
     """Format un nombre en K ou M selon sa taille"""
     try:
@@ -358,10 +382,10 @@ if df_nbr_hospi is not None:
         # Affichage des lits disponibles
 
         # Graph 1 Préparation des données
-        hospi_by_year = df_nbr_hospi_filtered.groupby('year')['nbr_hospi'].sum().reset_index()
-        duree_by_year = df_duree_hospi_filtered.groupby('year')['AVG_duree_hospi'].mean().reset_index()
+        hospi_by_year = df_nbr_hospi_filtered.groupby('year', observed=True)['nbr_hospi'].sum().reset_index()
+        duree_by_year = df_duree_hospi_filtered.groupby('year', observed=True)['AVG_duree_hospi'].mean().reset_index()
 
-        capacite_by_year = df_capacite_hospi_filtered.groupby('year')[['lit_hospi_complete','place_hospi_partielle','passage_urgence']].sum().reset_index()
+        capacite_by_year = df_capacite_hospi_filtered.groupby('year', observed=True)[['lit_hospi_complete','place_hospi_partielle','passage_urgence']].sum().reset_index()
         capacite_by_year['capacite_totale'] = capacite_by_year['lit_hospi_complete'] + capacite_by_year['place_hospi_partielle']
 
         # Création du graphique pour les barres
@@ -515,7 +539,7 @@ if df_nbr_hospi is not None:
             territory_col = 'nom_region'
             territory_label = "région" if niveau_administratif == "Régions" else "département"
             
-            hospi_by_territory = df_nbr_hospi_filtered.groupby(territory_col)['nbr_hospi'].sum().reset_index()
+            hospi_by_territory = df_nbr_hospi_filtered.groupby(territory_col, observed=True)['nbr_hospi'].sum().reset_index()
             hospi_by_territory = hospi_by_territory.sort_values(by='nbr_hospi', ascending=True)
             
             fig = px.bar(hospi_by_territory, x='nbr_hospi', y=territory_col,
@@ -538,7 +562,7 @@ if df_nbr_hospi is not None:
         
         with col2:
             # Regrouper les données par territoire et calculer les proportions
-            rapport_by_territory = df_nbr_hospi_filtered.groupby(territory_col)[['hospi_total_24h', 'hospi_total_jj', 'total_hospi']].sum().reset_index()
+            rapport_by_territory = df_nbr_hospi_filtered.groupby(territory_col, observed=True)[['hospi_total_24h', 'hospi_total_jj', 'total_hospi']].sum().reset_index()
             rapport_by_territory['percent_hospi_total_24h'] = 100 * rapport_by_territory['hospi_total_24h'] / rapport_by_territory['total_hospi']
             rapport_by_territory['percent_hospi_total_jj'] = 100 * rapport_by_territory['hospi_total_jj'] / rapport_by_territory['total_hospi']
             rapport_by_territory = rapport_by_territory.sort_values(by='total_hospi', ascending=True)
@@ -643,11 +667,11 @@ if df_nbr_hospi is not None:
         n_pathologies = st.slider("Nombre de pathologies à afficher", 5, 159, 20)
         
         # Top pathologies par nombre d'hospitalisations
-        hospi_by_pathology = df_nbr_hospi_filtered.groupby('nom_pathologie')['nbr_hospi'].sum().reset_index()
+        hospi_by_pathology = df_nbr_hospi_filtered.groupby('nom_pathologie', observed=True)['nbr_hospi'].sum().reset_index()
         hospi_by_pathology = hospi_by_pathology.sort_values(by='nbr_hospi', ascending=False).head(n_pathologies)
         
         # Ajout des données de durée moyenne
-        duree_data = df_duree_hospi_filtered.groupby('nom_pathologie')['AVG_duree_hospi'].mean().reset_index()
+        duree_data = df_duree_hospi_filtered.groupby('nom_pathologie', observed=True)['AVG_duree_hospi'].mean().reset_index()
         hospi_by_pathology = pd.merge(hospi_by_pathology, duree_data, on='nom_pathologie', how='left')
 
         # Création d'une figure avec deux axes Y
@@ -710,16 +734,8 @@ if df_nbr_hospi is not None:
             st.metric(label="help", value="", help="Ce graphique montre la relation entre le nombre d'hospitalisations (barres) et la durée moyenne de séjour (ligne) pour les pathologies les plus fréquentes.")
 
         # Graphique combiné (scatter plot)
-        # Fusion des données d'hospitalisation et de durée par année
-        combined_data = pd.merge(
-            df_nbr_hospi.groupby(['nom_pathologie', 'year'])['nbr_hospi'].sum().reset_index(),
-            df_duree_hospi.groupby(['nom_pathologie', 'year'])['AVG_duree_hospi'].mean().reset_index(),
-            on=['nom_pathologie', 'year']
-        )
-        
-        # Filtrer pour garder seulement les n_pathologies plus fréquentes par année
-        top_pathologies = df_nbr_hospi_filtered.groupby('nom_pathologie')['nbr_hospi'].sum().nlargest(n_pathologies).index
-        combined_data = combined_data[combined_data['nom_pathologie'].isin(top_pathologies)]
+        # Table pathologie × année en cache, restreinte aux n_pathologies plus fréquentes
+        combined_data = top_pathologies(load_pathology_year_facts(df_complet), n_pathologies, ranking=df_nbr_hospi_filtered)
 
         # Normalisation des valeurs pour la taille des points
         max_hospi = combined_data['nbr_hospi'].max()
@@ -782,21 +798,8 @@ if df_nbr_hospi is not None:
             st.metric(label="help", value="", help="Ce graphique animé montre l'évolution de la relation entre le nombre d'hospitalisations et la durée moyenne de séjour pour chaque pathologie au fil des années. La taille des bulles représente le nombre d'hospitalisations.")
 
         # Graphique 3D
-        # Fusion des données avec les trois métriques
-        combined_data_3d = pd.merge(
-            df_nbr_hospi.groupby(['nom_pathologie', 'year'])['nbr_hospi'].sum().reset_index(),
-            df_duree_hospi.groupby(['nom_pathologie', 'year'])['AVG_duree_hospi'].mean().reset_index(),
-            on=['nom_pathologie', 'year']
-        )
-        combined_data_3d = pd.merge(
-            combined_data_3d,
-            df_tranche_age_hospi.groupby(['nom_pathologie', 'year'])['indice_comparatif_tt_age_percent'].mean().reset_index(),
-            on=['nom_pathologie', 'year']
-        )
-
-        # Filtrer pour garder seulement les n_pathologies plus fréquentes
-        top_pathologies = df_nbr_hospi_filtered.groupby('nom_pathologie')['nbr_hospi'].sum().nlargest(n_pathologies).index
-        combined_data_3d = combined_data_3d[combined_data_3d['nom_pathologie'].isin(top_pathologies)]
+        # Mêmes données avec l'indice comparatif, restreintes aux n_pathologies plus fréquentes
+        combined_data_3d = top_pathologies(load_pathology_year_facts(df_complet), n_pathologies, ranking=df_nbr_hospi_filtered)
 
         # Création du graphique 3D avec animation
         fig = go.Figure()
@@ -1011,51 +1014,12 @@ if df_nbr_hospi is not None:
         # Tableau récapitulatif détaillé
         st.subheader("Évolution des pathologies - Augmentation les plus importantes (2018-2022)")
         
-        # Calculer les évolutions année par année
-        evolutions_by_year = {}
-        years = sorted(df_filtered['annee'].unique())
-        
-        for i in range(len(years)-1):
-            current_year = years[i]
-            next_year = years[i+1]
-            
-            # Données pour l'année courante et suivante
-            current_data = df_filtered[df_filtered['annee'] == current_year].groupby('nom_pathologie')['nbr_hospi'].sum()
-            next_data = df_filtered[df_filtered['annee'] == next_year].groupby('nom_pathologie')['nbr_hospi'].sum()
-            
-            # Calculer l'évolution en pourcentage
-            evolution = ((next_data - current_data) / current_data * 100).fillna(0)
-            evolutions_by_year[f'{current_year}-{next_year}'] = evolution
-            
-        # Créer le DataFrame de base avec le nombre total d'hospitalisations
-        df_summary = df_filtered.groupby('nom_pathologie')['nbr_hospi'].sum().reset_index()
-        
-        # Ajouter les évolutions année par année
-        for period, evolution in evolutions_by_year.items():
-            df_summary = df_summary.merge(
-                evolution.reset_index().rename(columns={'nbr_hospi': f'Evolution_{period}'}),
-                on='nom_pathologie',
-                how='left'
-            )
-        
-        # Calculer l'évolution globale (2018-2022)
-        hospi_2018 = df_filtered[df_filtered['annee'] == min(years)].groupby('nom_pathologie')['nbr_hospi'].sum()
-        hospi_2022 = df_filtered[df_filtered['annee'] == max(years)].groupby('nom_pathologie')['nbr_hospi'].sum()
-        evolution_globale = ((hospi_2022 - hospi_2018) / hospi_2018 * 100).fillna(0)
-        
-        # Ajouter l'évolution globale au DataFrame
-        df_summary = df_summary.merge(
-            evolution_globale.reset_index().rename(columns={'nbr_hospi': 'Evolution_globale'}),
-            on='nom_pathologie',
-            how='left'
+        # Totaux par année en un seul pivot, évolutions calculées entre colonnes
+        df_summary = get_evolution_table(
+            df_filtered,
+            labels={'nom_pathologie': 'Pathologie', 'nbr_hospi': 'Hospitalisations'}
         )
         
-        # Trier par évolution globale décroissante
-        df_summary = df_summary.sort_values('Evolution_globale', ascending=False)
-        
-        # Renommer les colonnes pour l'affichage
-        df_summary.columns = ['Pathologie', 'Hospitalisations'] + [f'Évol. {period} (%)' for period in evolutions_by_year.keys()] + ['Évol. globale (%)']
-        
         # Colonnes d'évolution pour le gradient
         evolution_columns = [col for col in df_summary.columns if 'Évol.' in col]
 
@@ -1171,7 +1135,7 @@ if df_nbr_hospi is not None:
             st.subheader(" Évolution des taux")
             
             # Calcul de l'évolution des taux standardisés
-            evolution_taux = df_tranche_age_hospi_filtered.groupby('year').agg({
+            evolution_taux = df_tranche_age_hospi_filtered.groupby('year', observed=True).agg({
                 'tx_standard_tt_age_pour_mille': 'mean',
                 'tx_brut_tt_age_pour_mille': 'mean'
             }).reset_index()
@@ -1275,34 +1239,30 @@ if df_nbr_hospi is not None:
     @st.cache_data
     def prepare_hospi_data():
         hospi_columns = ['year', 'region', 'nom_region', 'pathologie', 'nom_pathologie', 'nbr_hospi']
-        df_hospi = df_nbr_hospi[hospi_columns].copy()
+        df_hospi = project(df_nbr_hospi, hospi_columns)
         df_hospi['year'] = pd.to_datetime(df_hospi['year']).dt.date
-        df_hospi['nbr_hospi'] = df_hospi['nbr_hospi'].astype('float32')
         return df_hospi
 
     @st.cache_data
     def prepare_duree_data():
         duree_columns = ['year', 'region', 'nom_region', 'pathologie', 'nom_pathologie', 'sexe', 'AVG_duree_hospi']
-        df_duree = df_duree_hospi[duree_columns].copy()
+        df_duree = project(df_duree_hospi, duree_columns)
         df_duree['year'] = pd.to_datetime(df_duree['year']).dt.date
-        df_duree['AVG_duree_hospi'] = df_duree['AVG_duree_hospi'].astype('float32')
         return df_duree
 
     @st.cache_data
     def prepare_age_data():
         age_columns = ['year', 'region', 'nom_region', 'pathologie', 'nom_pathologie', 
                       'tx_brut_tt_age_pour_mille', 'tx_standard_tt_age_pour_mille']
-        df_age = df_tranche_age_hospi[age_columns].copy()
+        df_age = project(df_tranche_age_hospi, age_columns)
         df_age['year'] = pd.to_datetime(df_age['year']).dt.date
-        df_age['tx_brut_tt_age_pour_mille'] = df_age['tx_brut_tt_age_pour_mille'].astype('float32')
-        df_age['tx_standard_tt_age_pour_mille'] = df_age['tx_standard_tt_age_pour_mille'].astype('float32')
         return df_age
         
     # Création d'un nouvel onglet pour l'analyse par service médical
     with tab5:
         
         # Filtrer les données pour n'avoir que les totaux par service
-        df_service = df_complet[df_complet['sexe'] == 'Ensemble'].copy()
+        df_service = df_complet[df_complet['sexe'] == 'Ensemble']
         
         col1, col2 = st.columns(2)
         
@@ -1342,7 +1302,7 @@ if df_nbr_hospi is not None:
 
         age_columns = [col for col in df_service.columns if col.startswith('tranche_age_')]
         
-        df_age_service = df_service_filtered.groupby('classification')[age_columns].mean().reset_index()
+        df_age_service = df_service_filtered.groupby('classification', observed=True)[age_columns].mean().reset_index()
         df_age_service_melted = pd.melt(
             df_age_service,
             id_vars=['classification'],
@@ -1372,7 +1332,7 @@ if df_nbr_hospi is not None:
 
         # Création du dataframe pour les tranches d'âge regroupées
         age_groups = ['Enfants (0-14)', 'Jeunes (15-24)', 'Adultes (25-44)', 'Seniors (45-64)', 'Personnes âgées (65+)']
-        df_age_grouped = df_service_filtered.groupby('classification').agg({
+        df_age_grouped = df_service_filtered.groupby('classification', observed=True).agg({
             'age_enfants': 'mean',
             'age_jeunes': 'mean',
             'age_adultes': 'mean',
@@ -1383,7 +1343,7 @@ if df_nbr_hospi is not None:
         
         # Pie chart interactif
         fig_pie = px.pie(
-            df_service_filtered.groupby('classification')['nbr_hospi'].sum().reset_index(),
+            df_service_filtered.groupby('classification', observed=True)['nbr_hospi'].sum().reset_index(),
             values='nbr_hospi',
             names='classification',
             title=f'Répartition des hospitalisations par service médical ({selected_year})',
@@ -1399,7 +1359,7 @@ if df_nbr_hospi is not None:
             st.metric(label="help", value="", help=f"Ce graphique circulaire montre la répartition des hospitalisations entre les différents services médicaux pour l'année {selected_year}.")
 
         # Évolution temporelle par service
-        df_evolution = df_service.groupby(['annee', 'classification'])['nbr_hospi'].sum().reset_index()
+        df_evolution = df_service.groupby(['annee', 'classification'], observed=True)['nbr_hospi'].sum().reset_index()
         
         fig_evolution = px.line(
             df_evolution,
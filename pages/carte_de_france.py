@@ -5,10 +5,16 @@ import json
 import pandas as pd
 import plotly.express as px
 from google.cloud import bigquery
+from utils.schema import apply_schema, rename_value, MORBIDITE_SCHEMA
+from utils.frame_cache import frame_cache, stamp_snapshot
+from utils.projection import enable_copy_on_write
 import numpy as np
 import webbrowser
 from urllib.parse import urlencode
 
+# Filtres et projections partagent les données de la table chargée (pas de copie défensive)
+enable_copy_on_write()
+
 MAIN_COLOR = "#FF4B4B"
 
 # Style CSS personnalisé
@@ -71,13 +77,15 @@ def load_data():
             FROM `projet-jbn-data-le-wagon.dbt_medical_analysis_join_total_morbidite.class_join_total_morbidite_sexe_population`
         """
         df = client.query(query).to_dataframe()
-        return df
+        df = apply_schema(df, MORBIDITE_SCHEMA, 'class_join_total_morbidite_sexe_population')
+        return stamp_snapshot(df, 'carte_de_france')
     except Exception as e:
         st.error(f"Erreur lors du chargement des données : {str(e)}")
         return None
 
-# Préparation des données pour la carte
-@st.cache_data
+# Préparation des données pour la carte, mise en cache selon la version des données et
+# les étiquettes des lignes filtrées (valeurs non hachées)
+@frame_cache.memoize
 def prepare_map_data(df_filtered, selected_service, niveau_administratif):
 
     # Filtrer par service si nécessaire
@@ -92,10 +100,10 @@ def prepare_map_data(df_filtered, selected_service, niveau_administratif):
     
     # Correction du nom de l'Île-de-France
     if niveau_administratif == "Régions":
-        df_filtered[territory_col] = df_filtered[territory_col].replace("Ile de France", "Île-de-France")
+        df_filtered = df_filtered.assign(**{territory_col: rename_value(df_filtered[territory_col], "Ile de France", "Île-de-France")})
     
     # Agrégation des données par territoire
-    hospi_by_territory = df_filtered.groupby(territory_col)['nbr_hospi'].sum().reset_index()
+    hospi_by_territory = df_filtered.groupby(territory_col, observed=True)['nbr_hospi'].sum().reset_index()
     
     # Formater les codes de département pour correspondre au GeoJSON
     if niveau_administratif == "Départements":
@@ -133,21 +141,22 @@ def generate_map(map_data, geojson_data, niveau_administratif, df_filtered, sexe
     territory_col = 'region' if niveau_administratif == "Départements" else 'nom_region'
     
     # Créer une colonne de code formaté pour le filtrage
+    # (nouveau DataFrame : celui reçu est partagé par le cache de prepare_map_data)
     if niveau_administratif == "Départements":
-        df_filtered['code_territoire'] = df_filtered[territory_col].astype(str).str.extract('(\d+)')[0].str.zfill(2)
+        df_filtered = df_filtered.assign(code_territoire=df_filtered[territory_col].astype(str).str.extract('(\d+)')[0].str.zfill(2))
     else:
-        df_filtered['code_territoire'] = df_filtered[territory_col]
+        df_filtered = df_filtered.assign(code_territoire=df_filtered[territory_col])
     
     # Pré-calcul des durées moyennes (utilisant les données déjà filtrées)
-    durees_moy = df_filtered.groupby('code_territoire')['AVG_duree_hospi'].mean()
+    durees_moy = df_filtered.groupby('code_territoire', observed=True)['AVG_duree_hospi'].mean()
     
     # Pré-calcul du taux standardisé moyen
-    taux_std_moy = df_filtered.groupby('code_territoire')['tx_standard_tt_age_pour_mille'].mean()
+    taux_std_moy = df_filtered.groupby('code_territoire', observed=True)['tx_standard_tt_age_pour_mille'].mean()
     
     # Pré-calcul des top pathologies (utilisant les données déjà filtrées)
     top_patho_dict = {}
-    for code, group in df_filtered.groupby('code_territoire'):
-        top_patho = group.groupby('nom_pathologie')['nbr_hospi'].sum().nlargest(2)
+    for code, group in df_filtered.groupby('code_territoire', observed=True):
+        top_patho = group.groupby('nom_pathologie', observed=True)['nbr_hospi'].sum().nlargest(2)
         top_patho_text = "\n".join([f" {nom}: {val:,.0f} hospitalisations /" for nom, val in top_patho.items()])
         top_patho_dict[code] = top_patho_text
     
@@ -270,7 +279,7 @@ if df is not None:
     if selected_year != "Toutes les années":
         df_filtered = df[df['annee'] == selected_year]
     else:
-        df_filtered = df.copy()
+        df_filtered = df
     
     if sexe != "Ensemble":
         df_filtered = df_filtered[df_filtered['sexe'] == sexe]
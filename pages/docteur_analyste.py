@@ -10,7 +10,14 @@ import os
 from sqlalchemy.engine import create_engine
 from sqlalchemy_bigquery import BigQueryDialect
 import time
+import uuid
 from streamlit_lottie import st_lottie
+from utils.llm_streaming import stream_agent, TracingCallbackHandler
+from utils.tracing import Tracer, current_tracer
+from utils.worker_pool import shared_pool, LLM_REQUEST_TIMEOUT, LLM_MAX_RETRIES
+from utils.sql_cache import QueryResultCache
+from utils.sql_agent_db import CachedSQLDatabase, create_duckdb_database, data_version, DEFAULT_SNAPSHOT_DIR
+from utils.answer_cache import SemanticAnswerCache
 
 MAIN_COLOR = "#FF4B4B"
 
@@ -59,10 +66,36 @@ try:
         "api_key": st.secrets["azure"]["AZURE_API_KEY"]
     }
 
+    # Cache des résultats SQL de l'agent
+    SQL_CACHE_TTL = 3600
+    SQL_CACHE_MAX_ENTRIES = 256
+    SQL_CACHE_MAX_BYTES = 20 * 1024 ** 2
+
+    # Délai maximal d'une réponse de l'agent (secondes)
+    AGENT_TIMEOUT = 120
+
+    # Moteur d'exécution de l'agent : "bigquery" (par défaut) ou "duckdb" (instantané local)
+    SQL_AGENT_CONFIG = st.secrets.get("sql_agent", {})
+    SQL_AGENT_BACKEND = SQL_AGENT_CONFIG.get("backend", "bigquery")
+    SQL_AGENT_SNAPSHOT_DIR = SQL_AGENT_CONFIG.get("snapshot_dir", DEFAULT_SNAPSHOT_DIR)
+
     @st.cache_resource
     def init_database():
         """Initialise la connexion à la base de données.""" 
         try:
+            result_cache = QueryResultCache(
+                max_entries=SQL_CACHE_MAX_ENTRIES,
+                max_bytes=SQL_CACHE_MAX_BYTES,
+                ttl=SQL_CACHE_TTL
+            )
+            
+            # Moteur local DuckDB chargé depuis l'instantané Parquet
+            # (python -m utils.sql_agent_db pour le générer)
+            if SQL_AGENT_BACKEND == "duckdb":
+                db = create_duckdb_database(SQL_AGENT_SNAPSHOT_DIR, result_cache=result_cache)
+                db.warm_schema_cache()
+                return db
+            
             # Chargement des secrets
             gcp_service_account = st.secrets["gcp_service_account"]
             project_id = gcp_service_account["project_id"]
@@ -76,8 +109,10 @@ try:
                 credentials_info=gcp_service_account
             )
             
-            # Créer la connexion SQLDatabase pour LangChain
-            db = SQLDatabase(engine)
+            # Créer la connexion SQLDatabase pour LangChain, avec schémas mémorisés
+            # et cache des résultats (clé : SQL normalisé)
+            db = CachedSQLDatabase(engine, result_cache=result_cache)
+            db.warm_schema_cache()
             
             return db
             
@@ -95,7 +130,10 @@ try:
                 azure_deployment=AZURE_CONFIG["azure_deployment"],
                 openai_api_version=AZURE_CONFIG["api_version"],
                 api_key=AZURE_CONFIG["api_key"],
-                temperature=0
+                temperature=0,
+                streaming=True,
+                timeout=LLM_REQUEST_TIMEOUT,
+                max_retries=LLM_MAX_RETRIES
             )
             
             # Initialiser la base de données
@@ -262,6 +300,75 @@ try:
         suggestions = [template for key in context for template in templates.get(key, [])]
         return suggestions if suggestions else ["Besoin d'aide pour poser une question ?"]
 
+    @st.cache_resource
+    def get_answer_cache():
+        """Cache des réponses de l'agent, partagé entre les sessions."""
+        return SemanticAnswerCache()
+
+    def stream_answer(question, placeholder):
+        """Affiche la réponse de l'agent au fil de sa génération et la retourne."""
+        # Trace de la question : cache, étapes de l'agent, outils, SQL et rendu
+        tracer = Tracer('docteur_analyste')
+        token = current_tracer.set(tracer)
+        root = tracer.start_span("question", 'question', question=question, backend=SQL_AGENT_BACKEND)
+        try:
+            # L'agent est sans mémoire : une question déjà traitée sur les mêmes données
+            # reçoit la même réponse
+            answer_cache = get_answer_cache()
+            version = data_version(SQL_AGENT_BACKEND, SQL_AGENT_SNAPSHOT_DIR)
+            with tracer.span("cache des réponses", 'cache') as span:
+                cached = answer_cache.get(question, version)
+                span['attributes']['hit'] = cached is not None
+            if cached:
+                with tracer.span("rendu", 'render'):
+                    placeholder.markdown(cached)
+                return cached
+
+            update_thinking_status(placeholder, 'validating')
+            # Exécution dans le pool partagé : une requête à la fois par session,
+            # refus au-delà de la capacité du serveur
+            stream = stream_agent(
+                st.session_state.agent, question,
+                callbacks=[TracingCallbackHandler(tracer)],
+                pool=shared_pool(),
+                session_id=st.session_state.setdefault("session_id", uuid.uuid4().hex),
+                timeout=AGENT_TIMEOUT
+            )
+            streamed = placeholder.write_stream(stream)
+            final_response = stream.output or streamed or "Je n'ai pas pu générer une réponse."
+            with tracer.span("rendu", 'render'):
+                placeholder.markdown(final_response)
+            root['attributes']['time_to_first_token_ms'] = (
+                round(stream.time_to_first_token * 1000, 2) if stream.time_to_first_token is not None else None
+            )
+            if stream.output:
+                answer_cache.set(question, version, final_response)
+            return final_response
+        except Exception as e:
+            tracer.end_span(root, status='error', error=str(e))
+            raise
+        finally:
+            tracer.end_span(root)
+            current_tracer.reset(token)
+            tracer.flush()
+            st.session_state.last_trace = tracer
+
+    def render_trace_panel():
+        """Panneau de débogage : répartition du temps de la dernière réponse."""
+        tracer = st.session_state.get("last_trace")
+        if tracer is None:
+            return
+        with st.expander("🔍 Trace de la dernière réponse"):
+            st.dataframe(tracer.summary(), use_container_width=True)
+            spans = tracer.to_dataframe()
+            columns = [
+                column for column in ['name', 'kind', 'duration_ms', 'status', 'step', 'cache_hit',
+                                      'rows', 'bytes_scanned', 'sql', 'error']
+                if column in spans.columns
+            ]
+            st.dataframe(spans[columns], use_container_width=True)
+            st.caption(f"Trace {tracer.trace_id} enregistrée dans {tracer.log_path}")
+
     def main():
         # Initialiser l'historique des messages
         if "messages" not in st.session_state:
@@ -293,13 +400,7 @@ try:
                     message_placeholder = st.empty()
                     
                     try:
-
-                        update_thinking_status(message_placeholder, 'validating')
-                        response = st.session_state.agent.invoke(prompt)
-
-
-                        final_response = response.get('output', "Je n'ai pas pu générer une réponse.")
-                        message_placeholder.markdown(final_response)
+                        final_response = stream_answer(prompt, message_placeholder)
                         
                         # Ajouter la réponse à l'historique
                         st.session_state.messages.append({"role": "assistant", "content": final_response})
@@ -329,15 +430,33 @@ try:
                                 with st.chat_message("assistant"):
                                     message_placeholder = st.empty()
                                     try:
-                                        response = st.session_state.agent.invoke(prompt)
-
-                                        final_response = response.get('output', "Je n'ai pas pu générer une réponse.")
-                                        message_placeholder.markdown(final_response)
+                                        final_response = stream_answer(suggestion, message_placeholder)
                                         st.session_state.messages.append({"role": "assistant", "content": final_response})
                                         st.rerun()
                                     except Exception as e:
                                         message_placeholder.markdown(f"❌ Désolé, une erreur s'est produite : {str(e)}")
 
+        render_trace_panel()
+
+        # Statistiques du cache SQL
+        db = init_database()
+        if db is not None:
+            stats = db.result_cache.stats()
+            st.sidebar.caption(
+                f"🗄️ Cache SQL : {stats['entries']} résultats, "
+                f"taux de succès {stats['hit_rate']:.0%} ({stats['hits']}/{stats['hits'] + stats['misses']})"
+            )
+        answer_stats = get_answer_cache().stats()
+        st.sidebar.caption(
+            f"💬 Cache des réponses : {answer_stats['entries']} réponses, "
+            f"taux de succès {answer_stats['hit_rate']:.0%}"
+        )
+        pool_stats = shared_pool().stats()
+        st.sidebar.caption(
+            f"⚙️ Requêtes LLM : {pool_stats['running']} en cours, {pool_stats['waiting']} en attente, "
+            f"{pool_stats['rejected']} refusées"
+        )
+
         # Bouton pour nouvelle conversation
         if st.button("🔄 Nouvelle conversation"):
             st.session_state.messages = []
@@ -4,6 +4,13 @@ import plotly.express as px
 import plotly.graph_objects as go
 from google.cloud import bigquery
 from pygwalker.api.streamlit import StreamlitRenderer
+from utils.schema import apply_schema, MORBIDITE_SCHEMA
+from utils.frame_cache import frame_cache, stamp_snapshot, SNAPSHOT_ATTR
+from utils.projection import project
+from utils.explorer_data import GRANULARITIES, EXPLORER_MAX_ROWS, explorer_dataset
+
+# Spécification PyGWalker partagée par les explorateurs
+SPEC_PATH = "./config.json"
 
 # Fonction de chargement des données
 @st.cache_resource
@@ -19,16 +26,11 @@ def load_data():
         '''
         df = client.query(query).to_dataframe()
         
-        # Conversion des types de données pour optimisation
-        date_columns = ['year']
-        numeric_columns = [col for col in df.columns if any(x in col.lower() for x in ['hospi', 'tx_', 'lit_', 'place_', 'evolution'])]
-        
-        for col in date_columns:
-            df[col] = pd.to_datetime(df[col]).dt.date
-        for col in numeric_columns:
-            df[col] = df[col].astype('float32')
+        # Conversion des types de données selon le schéma commun
+        df = apply_schema(df, MORBIDITE_SCHEMA, 'class_join_total_morbidite_sexe_population')
+        df['year'] = pd.to_datetime(df['year']).dt.date
             
-        return df
+        return stamp_snapshot(df, 'graph_generator')
     except Exception as e:
         st.error(f"Erreur lors du chargement des données: {str(e)}")
         return None
@@ -37,43 +39,51 @@ def load_data():
 df_main = load_data()
 
 if df_main is not None:
-    # Création des vues spécifiques
-    @st.cache_data
+    # Création des vues spécifiques, mises en cache selon la version des données
+    @frame_cache.memoize
     def create_specific_views(df):
         # Vue Hospitalisations de base
-        df_hospi_base = df[[
+        df_hospi_base = project(df, [
             'year', 'region', 'nom_region', 'sexe', 'pathologie', 'nom_pathologie',
             'nbr_hospi', 'hospi_prog_24h', 'hospi_autres_24h', 'hospi_total_24h'
-        ]].copy()
+        ])
         
         # Vue Durées d'hospitalisation
-        df_duree = df[[
+        df_duree = project(df, [
             'year', 'region', 'nom_region', 'sexe', 'pathologie', 'nom_pathologie',
             'AVG_duree_hospi', 'hospi_1J', 'hospi_2J', 'hospi_3J', 'hospi_4J',
             'hospi_5J', 'hospi_6J', 'hospi_7J', 'hospi_8J', 'hospi_9J',
             'hospi_10J_19J', 'hospi_20J_29J', 'hospi_30J'
-        ]].copy()
+        ])
         
         # Vue Taux et population
-        df_taux = df[[
+        df_taux = project(df, [
             'year', 'region', 'nom_region', 'sexe', 'pathologie', 'nom_pathologie',
             'tx_brut_tt_age_pour_mille', 'tx_standard_tt_age_pour_mille',
             'population'
-        ]].copy()
+        ])
         
         # Vue Évolutions
-        df_evolution = df[[
+        df_evolution = project(df, [
             'year', 'region', 'nom_region', 'pathologie', 'nom_pathologie',
             'evolution_nbr_hospi', 'evolution_percent_nbr_hospi',
             'evolution_hospi_total_24h', 'evolution_hospi_total_jj',
             'evolution_AVG_duree_hospi'
-        ]].copy()
+        ])
         
         return df_hospi_base, df_duree, df_taux, df_evolution
 
     # Création des vues
     df_hospi_base, df_duree, df_taux, df_evolution = create_specific_views(df_main)
 
+    # Vues de l'explorateur PyGWalker : libellé -> (titre, données)
+    EXPLORER_VIEWS = {
+        "Hospitalisations": ("Données d'hospitalisation de base", df_hospi_base),
+        "Durées de séjour": ("Durées d'hospitalisation", df_duree),
+        "Taux et population": ("Taux et population", df_taux),
+        "Évolutions": ("Évolutions des indicateurs", df_evolution),
+    }
+
     # Add Title
     st.markdown("<h1 class='main-title' style='margin-top: -50px;'>📊 Générateur de Graphiques</h1>", unsafe_allow_html=True)
 
@@ -85,31 +95,37 @@ if df_main is not None:
     )
 
     if viz_type == "PyGWalker":
-        # Création des onglets pour chaque vue
-        tab_hospi, tab_duree, tab_taux, tab_evolution = st.tabs([
-            "Hospitalisations", "Durées de séjour", "Taux et population", 
-            "Évolutions"
-        ])
+        # Données de l'explorateur : agrégées à la granularité choisie plutôt
+        # que toutes les lignes sérialisées vers le navigateur
+        granularity = st.sidebar.selectbox("Granularité", list(GRANULARITIES))
+        server_side = st.sidebar.checkbox(
+            "Calcul côté serveur (DuckDB)", value=True,
+            help="Les requêtes de PyGWalker s'exécutent sur le serveur : le navigateur ne reçoit que les résultats agrégés"
+        )
 
-        with tab_hospi:
-            st.header("Données d'hospitalisation de base")
-            walker_hospi = StreamlitRenderer(df_hospi_base, spec="./config.json", spec_io_mode="json_file")
-            walker_hospi.explorer()
-
-        with tab_duree:
-            st.header("Durées d'hospitalisation")
-            walker_duree = StreamlitRenderer(df_duree, spec="./config.json", spec_io_mode="json_file")
-            walker_duree.explorer()
-
-        with tab_taux:
-            st.header("Taux et population")
-            walker_taux = StreamlitRenderer(df_taux, spec="./config.json", spec_io_mode="json_file")
-            walker_taux.explorer()
-
-        with tab_evolution:
-            st.header("Évolutions des indicateurs")
-            walker_evolution = StreamlitRenderer(df_evolution, spec="./config.json", spec_io_mode="json_file")
-            walker_evolution.explorer()
+        # Renderer PyGWalker créé une seule fois par instantané, vue, granularité et
+        # mode de calcul : la clé ne contient que des scalaires (aucun DataFrame
+        # haché), la vue n'est agrégée et sérialisée qu'à la création
+        @st.cache_resource
+        def get_renderer(snapshot_version, view, granularity, kernel_computation):
+            # Sans calcul côté serveur, les lignes transmises au navigateur sont plafonnées
+            max_rows = None if kernel_computation else EXPLORER_MAX_ROWS
+            dataset = explorer_dataset(EXPLORER_VIEWS[view][1], GRANULARITIES[granularity], max_rows)
+            renderer = StreamlitRenderer(
+                dataset, spec=SPEC_PATH, spec_io_mode="json_file", kernel_computation=kernel_computation
+            )
+            return renderer, len(dataset)
+
+        # Seule la vue sélectionnée est préparée et rendue (les onglets
+        # st.tabs exécutaient les quatre explorateurs à chaque rerun)
+        selected_view = st.radio("Vue", list(EXPLORER_VIEWS), horizontal=True, label_visibility="collapsed")
+        header, df_view = EXPLORER_VIEWS[selected_view]
+        st.header(header)
+
+        renderer, dataset_rows = get_renderer(df_main.attrs[SNAPSHOT_ATTR], selected_view, granularity, server_side)
+        if dataset_rows < len(df_view):
+            st.caption(f"{dataset_rows:,} lignes transmises sur {len(df_view):,}".replace(',', ' '))
+        renderer.explorer()
 
     else:
         # Menu déroulant pour sélectionner le type de graphique
@@ -4,9 +4,17 @@ import plotly.express as px
 from plotly.subplots import make_subplots
 import plotly.graph_objects as go
 from google.cloud import bigquery
+from utils.schema import apply_schema, MORBIDITE_SCHEMA, CAPACITE_SCHEMA
+from utils.evolution import evolution_table
+from utils.pathology_facts import pathology_year_facts, top_pathologies
+from utils.frame_cache import frame_cache, stamp_snapshot
+from utils.projection import enable_copy_on_write
 from streamlit_extras.metric_cards import style_metric_cards 
 
 
+# Filtres et projections partagent les données de la table chargée (pas de copie défensive)
+enable_copy_on_write()
+
 # Définition des couleurs du thème
 MAIN_COLOR = '#003366'  # Bleu marine principal
 SECONDARY_COLOR = '#AFDC8F'  # Vert clair complémentaire
@@ -59,7 +67,8 @@ def load_data():
             WHERE classification = 'M' AND niveau = 'Départements'
         """).to_dataframe()
 
-        return df
+        df = apply_schema(df, MORBIDITE_SCHEMA, 'class_join_total_morbidite_sexe_population')
+        return stamp_snapshot(df, 'medecine')
         
     except Exception as e:
         st.error(f"Erreur lors du chargement des données : {str(e)}")
@@ -68,6 +77,17 @@ def load_data():
 # Chargement des données
 df = load_data()
 
+# Tableau « Évolution des pathologies », mis en cache selon la version des données
+# et les étiquettes des lignes retenues par les filtres (valeurs non hachées)
+@frame_cache.memoize
+def get_evolution_table(df, by=('nom_pathologie',), labels=None):
+    return evolution_table(df, by, labels=labels)
+
+# Table pathologie × année des graphiques animés, mise en cache de la même façon
+@frame_cache.memoize
+def get_pathology_year_facts(df):
+    return pathology_year_facts(df)
+
 def format_number(number):
     """Format un nombre en K ou M selon sa taille"""
     try:
@@ -166,7 +186,7 @@ if df is not None:
     st.query_params['pathologie'] = selected_pathology if selected_pathology != "Toutes les pathologies" else None
 
     # Filtrage des données selon les sélections
-    df_filtered = df.copy()
+    df_filtered = df
     
     # Filtre par sexe
     if selected_sex != "Ensemble":
@@ -237,7 +257,7 @@ if df is not None:
         n_pathologies = st.slider("Nombre de pathologies à afficher", 5, 70, 20)
         
         # Top pathologies par nombre d'hospitalisations
-        hospi_by_pathology = df_filtered.groupby('nom_pathologie').agg({
+        hospi_by_pathology = df_filtered.groupby('nom_pathologie', observed=True).agg({
             'nbr_hospi': 'sum',
             'AVG_duree_hospi': 'mean'
         }).reset_index()
@@ -303,27 +323,17 @@ if df is not None:
         with col_help:
             st.metric(label="help", value="", help="Ce graphique montre la relation entre le nombre d'hospitalisations (barres) et la durée moyenne de séjour (ligne) pour les pathologies médicales les plus fréquentes.")
 
-        # Préparation des DataFrames pour les graphiques
-        df_nbr_hospi = df_filtered.copy()
-        df_duree_hospi = df_filtered.copy()
-        df_tranche_age_hospi = df_filtered.copy()
+        # Table pathologie × année commune aux graphiques animés
+        facts = get_pathology_year_facts(df_filtered)
 
         st.markdown("---")
         # Graphique combiné (scatter plot)
-        # Fusion des données d'hospitalisation et de durée par année
-        combined_data = pd.merge(
-            df_nbr_hospi.groupby(['nom_pathologie', 'annee'])['nbr_hospi'].sum().reset_index(),
-            df_duree_hospi.groupby(['nom_pathologie', 'annee'])['AVG_duree_hospi'].mean().reset_index(),
-            on=['nom_pathologie', 'annee']
-        )
-        
-        # Filtrer pour garder seulement les n_pathologies plus fréquentes par année
-        top_pathologies = df_nbr_hospi.groupby('nom_pathologie')['nbr_hospi'].sum().nlargest(n_pathologies).index
-        combined_data = combined_data[combined_data['nom_pathologie'].isin(top_pathologies)]
+        # Table pathologie × année en cache, restreinte aux n_pathologies plus fréquentes
+        combined_data = top_pathologies(facts, n_pathologies)
 
         # Calcul des marges pour les axes en prenant en compte les maximums par année
-        max_hospi_by_year = combined_data.groupby('annee')['nbr_hospi'].max().max()
-        max_duree_by_year = combined_data.groupby('annee')['AVG_duree_hospi'].max().max()
+        max_hospi_by_year = combined_data.groupby('annee', observed=True)['nbr_hospi'].max().max()
+        max_duree_by_year = combined_data.groupby('annee', observed=True)['AVG_duree_hospi'].max().max()
         
         x_margin = max_hospi_by_year * 0.2  # Augmentation de la marge à 20%
         y_margin = max_duree_by_year * 0.2  # Augmentation de la marge à 20%
@@ -412,21 +422,8 @@ if df is not None:
             st.metric(label="help", value="", help="Ce graphique animé montre l'évolution de la relation entre le nombre d'hospitalisations et la durée moyenne de séjour pour chaque pathologie au fil des années. La taille des bulles représente le nombre d'hospitalisations.")
         st.markdown("---")
         # Graphique 3D
-        # Fusion des données avec les trois métriques
-        combined_data_3d = pd.merge(
-            df_nbr_hospi.groupby(['nom_pathologie', 'annee'])['nbr_hospi'].sum().reset_index(),
-            df_duree_hospi.groupby(['nom_pathologie', 'annee'])['AVG_duree_hospi'].mean().reset_index(),
-            on=['nom_pathologie', 'annee']
-        )
-        combined_data_3d = pd.merge(
-            combined_data_3d,
-            df_tranche_age_hospi.groupby(['nom_pathologie', 'annee'])['indice_comparatif_tt_age_percent'].mean().reset_index(),
-            on=['nom_pathologie', 'annee']
-        )
-
-        # Filtrer pour garder seulement les n_pathologies plus fréquentes
-        top_pathologies = df_nbr_hospi.groupby('nom_pathologie')['nbr_hospi'].sum().nlargest(n_pathologies).index
-        combined_data_3d = combined_data_3d[combined_data_3d['nom_pathologie'].isin(top_pathologies)]
+        # Mêmes données avec l'indice comparatif, restreintes aux n_pathologies plus fréquentes
+        combined_data_3d = top_pathologies(facts, n_pathologies)
 
         # Création du graphique 3D avec animation
         fig = go.Figure()
@@ -639,51 +636,12 @@ if df is not None:
         # Tableau récapitulatif détaillé
         st.subheader("Évolution des pathologies - Augmentation les plus importantes (2018-2022)")
         
-        # Calculer les évolutions année par année
-        evolutions_by_year = {}
-        years = sorted(df_filtered['annee'].unique())
-        
-        for i in range(len(years)-1):
-            current_year = years[i]
-            next_year = years[i+1]
-            
-            # Données pour l'année courante et suivante
-            current_data = df_filtered[df_filtered['annee'] == current_year].groupby('nom_pathologie')['nbr_hospi'].sum()
-            next_data = df_filtered[df_filtered['annee'] == next_year].groupby('nom_pathologie')['nbr_hospi'].sum()
-            
-            # Calculer l'évolution en pourcentage
-            evolution = ((next_data - current_data) / current_data * 100).fillna(0)
-            evolutions_by_year[f'{current_year}-{next_year}'] = evolution
-            
-        # Créer le DataFrame de base avec le nombre total d'hospitalisations
-        df_summary = df_filtered.groupby('nom_pathologie')['nbr_hospi'].sum().reset_index()
-        
-        # Ajouter les évolutions année par année
-        for period, evolution in evolutions_by_year.items():
-            df_summary = df_summary.merge(
-                evolution.reset_index().rename(columns={'nbr_hospi': f'Evolution_{period}'}),
-                on='nom_pathologie',
-                how='left'
-            )
-        
-        # Calculer l'évolution globale (2018-2022)
-        hospi_2018 = df_filtered[df_filtered['annee'] == min(years)].groupby('nom_pathologie')['nbr_hospi'].sum()
-        hospi_2022 = df_filtered[df_filtered['annee'] == max(years)].groupby('nom_pathologie')['nbr_hospi'].sum()
-        evolution_globale = ((hospi_2022 - hospi_2018) / hospi_2018 * 100).fillna(0)
-        
-        # Ajouter l'évolution globale au DataFrame
-        df_summary = df_summary.merge(
-            evolution_globale.reset_index().rename(columns={'nbr_hospi': 'Evolution_globale'}),
-            on='nom_pathologie',
-            how='left'
+        # Totaux par année en un seul pivot, évolutions calculées entre colonnes
+        df_summary = get_evolution_table(
+            df_filtered,
+            labels={'nom_pathologie': 'Pathologie', 'nbr_hospi': 'Hospitalisations'}
         )
         
-        # Trier par évolution globale décroissante
-        df_summary = df_summary.sort_values('Evolution_globale', ascending=False)
-        
-        # Renommer les colonnes pour l'affichage
-        df_summary.columns = ['Pathologie', 'Hospitalisations'] + [f'Évol. {period} (%)' for period in evolutions_by_year.keys()] + ['Évol. globale (%)']
-        
         # Colonnes d'évolution pour le gradient
         evolution_columns = [col for col in df_summary.columns if 'Évol.' in col]
 
@@ -745,7 +703,7 @@ if df is not None:
                     FROM `projet-jbn-data-le-wagon.dbt_medical_analysis_join_total_morbidite_capacite.class_join_total_morbidite_capacite_kpi`
                     WHERE classification = 'M' AND niveau = 'Départements'
                 """).to_dataframe()
-                return df_capacity
+                return apply_schema(df_capacity, CAPACITE_SCHEMA, 'class_join_total_morbidite_capacite_kpi')
             except Exception as e:
                 st.error(f"Erreur lors du chargement des données de capacité : {str(e)}")
                 return None
@@ -780,7 +738,7 @@ if df is not None:
                 st.metric("Taux d'équipement", f"{taux_equip} lits pour 1000 Habitants")
 
             # Calculer le nombre total d'hospitalisations par département
-            total_hospi_by_dept = df_capacity.groupby('nom_region').agg({
+            total_hospi_by_dept = df_capacity.groupby('nom_region', observed=True).agg({
                 'hospi_total_24h': 'sum',
                 'hospi_1J': 'sum',
                 'hospi_2J': 'sum',
@@ -816,8 +774,8 @@ if df is not None:
                 value=20
             )
             
-            # Créer une copie des données pour les visualisations filtrées par le slider
-            df_capacity_filtered = df_capacity.copy()
+            # Données des visualisations filtrées par le slider
+            df_capacity_filtered = df_capacity
             
             # Filtrer les départements selon le slider
             top_departements = total_hospi_by_dept['nom_region'].head(n_departements).tolist()
@@ -825,7 +783,7 @@ if df is not None:
 
             # Pour la suite du code, utiliser df_capacity_filtered au lieu de df_capacity
             # Scatter plot animé avec Plotly Express
-            df_scatter = df_capacity_filtered.groupby(['annee', 'nom_region']).agg({
+            df_scatter = df_capacity_filtered.groupby(['annee', 'nom_region'], observed=True).agg({
                 'taux_occupation': 'first',
                 'lit_hospi_complete': 'sum',
                 'sejour_hospi_complete': 'sum'
@@ -934,7 +892,7 @@ if df is not None:
                 )
 
             # Préparer les données pour le graphique de répartition par durée
-            df_duree = df_capacity_filtered.groupby('annee').agg({
+            df_duree = df_capacity_filtered.groupby('annee', observed=True).agg({
                 'hospi_total_24h': 'sum',
                 'hospi_1J': 'sum',
                 'hospi_2J': 'sum',
@@ -1035,7 +993,7 @@ if df is not None:
                 )
 
             # Préparer les données pour le graphique de répartition par lits
-            df_equip = df_capacity_filtered.groupby('annee').agg({
+            df_equip = df_capacity_filtered.groupby('annee', observed=True).agg({
                 'lit_hospi_complete': 'sum',
                 'place_hospi_partielle': 'sum',
                 'taux_equipement': 'mean'
@@ -1113,7 +1071,7 @@ if df is not None:
         if selected_year != "Toutes les années":
             df_filtered = df[df['annee'] == int(selected_year)]
         else:
-            df_filtered = df.copy()
+            df_filtered = df
 
         # Filtrer par département si sélectionné
         if selected_region != "Tous les départements":
@@ -1128,7 +1086,7 @@ if df is not None:
             df_filtered = df_filtered
 
             # Trouver toutes les pathologies disponibles
-            all_patho = df_filtered.groupby('nom_pathologie')['nbr_hospi'].sum().sort_values(ascending=False)
+            all_patho = df_filtered.groupby('nom_pathologie', observed=True)['nbr_hospi'].sum().sort_values(ascending=False)
 
             # Slider pour sélectionner le nombre de pathologies
             nb_patho = st.slider(
@@ -1180,7 +1138,7 @@ if df is not None:
         df_graph = pd.DataFrame(graph_data)
 
         # Grouper les données par année, pathologie et tranche d'âge
-        df_scatter = df_graph.groupby(['annee', 'pathologie', 'tranche_age'])['hospitalisations'].sum().reset_index()
+        df_scatter = df_graph.groupby(['annee', 'pathologie', 'tranche_age'], observed=True)['hospitalisations'].sum().reset_index()
 
         # Ajouter une colonne avec le nombre d'hospitalisations formaté
         df_scatter['hospitalisations_format'] = df_scatter['hospitalisations'].apply(format_number)
@@ -1299,51 +1257,14 @@ if df is not None:
         st.subheader("Évolution des pathologies par Sexe - Augmentation les plus importantes (2018-2022)")
         
         # Données filtrées selon le sexe
-        df_filtered = df_filtered[df_filtered['sexe'] == selected_sexe]
-
-        # Calculer les évolutions année par année
-        evolutions_sexe_by_year = {}
-        years = sorted(df_filtered['annee'].unique())
-
-        for i in range(len(years) - 1):
-            current_year_sexe = years[i]
-            next_year_sexe = years[i + 1]
-            
-            # Données pour l'année courante et suivante
-            current_data_sexe = df_filtered[df_filtered['annee'] == current_year_sexe].groupby(['sexe', 'nom_pathologie'])['nbr_hospi'].sum()
-            next_data_sexe = df_filtered[df_filtered['annee'] == next_year_sexe].groupby(['sexe', 'nom_pathologie'])['nbr_hospi'].sum()
-            
-            # Calculer l'évolution en pourcentage
-            evolution_sexe = ((next_data_sexe - current_data_sexe) / current_data_sexe * 100).fillna(0)
-            evolutions_sexe_by_year[f'{current_year_sexe}-{next_year_sexe}'] = evolution_sexe.dropna()
-
-        # Créer le DataFrame de base avec le nombre total d'hospitalisations
-        df_summary_sexe = df_filtered.groupby(['sexe', 'nom_pathologie'])['nbr_hospi'].sum().reset_index()
-
-        # Ajouter les évolutions année par année
-        for period, evolution_sexe in evolutions_sexe_by_year.items():
-            df_summary_sexe = df_summary_sexe.merge(
-                evolution_sexe.reset_index().rename(columns={'nbr_hospi': f'Évol. {period} (%)'}),
-                on=['sexe', 'nom_pathologie'],
-                how='left'
-            )
-
-        # Calculer l'évolution globale (2018-2022)
-        hospi_2018_sexe = df_filtered[df_filtered['annee'] == min(years)].groupby(['sexe', 'nom_pathologie'])['nbr_hospi'].sum()
-        hospi_2022_sexe = df_filtered[df_filtered['annee'] == max(years)].groupby(['sexe', 'nom_pathologie'])['nbr_hospi'].sum()
-        evolution_globale_sexe = ((hospi_2022_sexe - hospi_2018_sexe) / hospi_2018_sexe * 100).fillna(0)
-        
+        df_filtered = df_filtered[df_filtered['sexe'] == selected_sex]
 
-        # Ajouter l'évolution globale au DataFrame
-        df_summary_sexe = df_summary_sexe.merge(
-            evolution_globale_sexe.reset_index().rename(columns={'nbr_hospi': 'Évol. globale (%)'}),
-            on=['sexe', 'nom_pathologie'],
-            how='left'
+        # Totaux par sexe et par année en un seul pivot
+        df_summary_sexe = get_evolution_table(
+            df_filtered,
+            by=('sexe', 'nom_pathologie')
         )
 
-        # Trier par évolution globale décroissante
-        df_summary_sexe = df_summary_sexe.sort_values('Évol. globale (%)', ascending=False)
-
         # Colonnes d'évolution pour le gradient
         evolution_sexe_columns = [col for col in df_summary_sexe.columns if 'Évol.' in col]
 
@@ -2,8 +2,11 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from google.cloud import bigquery
 import numpy as np
+from utils.schema import apply_schema, CAPACITE_SCHEMA
+from utils.frame_cache import frame_cache, stamp_snapshot
+from utils.forecasting import HospitalForecasts, HORIZONS, SERVICES, ALL_REGIONS, ALL_SERVICES
 
 # CSS personnalisé
 st.markdown("""
@@ -31,6 +34,32 @@ ACCENT_COLOR = '#3D7317'  # Vert foncé pour les accents
 # Titre principal
 st.markdown("<h1 class='main-title' style='margin-top: -70px;'>🎲 Prédictions Hospitalières</h1>", unsafe_allow_html=True)
 
+# Chargement de l'historique régional par spécialité (mart de capacité)
+@st.cache_resource
+def load_history():
+    try:
+        client = bigquery.Client.from_service_account_info(st.secrets["gcp_service_account"])
+        df = client.query("""
+            SELECT nom_region, classification, annee, nbr_hospi, lit_hospi_complete
+            FROM `projet-jbn-data-le-wagon.dbt_medical_analysis_join_total_morbidite_capacite.class_join_total_morbidite_capacite_kpi`
+            WHERE niveau = 'Régions' AND sexe = 'Ensemble'
+        """).to_dataframe()
+        df = apply_schema(df, CAPACITE_SCHEMA, 'class_join_total_morbidite_capacite_kpi')
+        return stamp_snapshot(df, 'predictions')
+    except Exception as e:
+        st.error(f"Erreur lors du chargement des données : {str(e)}")
+        return None
+
+# Modèles ajustés et prévisions de tous les horizons, calculés une fois par version des données
+@frame_cache.memoize
+def load_forecasts(df):
+    return HospitalForecasts(df)
+
+df_history = load_history()
+if df_history is None:
+    st.stop()
+forecasts = load_forecasts(df_history)
+
 # Sélecteur de type de prédiction
 prediction_type = st.selectbox(
     "Choisissez le type de prédiction",
@@ -40,20 +69,22 @@ prediction_type = st.selectbox(
 # Filtres communs
 col1, col2, col3 = st.columns(3)
 with col1:
-    region = st.selectbox("Région", ["Toutes les régions", "Île-de-France", "Auvergne-Rhône-Alpes", "Nouvelle-Aquitaine"])
+    regions = sorted(name for name in forecasts.history.index.get_level_values('nom_region').unique() if name != ALL_REGIONS)
+    region = st.selectbox("Région", [ALL_REGIONS] + regions)
 with col2:
-    specialite = st.selectbox("Spécialité", ["Toutes les spécialités", "Médecine", "Chirurgie", "Obstétrique", "SSR", "Psychiatrie"])
+    specialite = st.selectbox("Spécialité", [ALL_SERVICES] + list(SERVICES))
 with col3:
-    horizon = st.selectbox("Horizon de prédiction", ["1 mois", "3 mois", "6 mois", "1 an"])
+    horizon = st.selectbox("Horizon de prédiction", list(HORIZONS))
 
-# Fonction pour générer des données simulées
-def generate_mock_data(days=365):
-    dates = [datetime.now() + timedelta(days=x) for x in range(days)]
-    values = np.random.normal(100, 15, days) + np.sin(np.array(range(days))/30.0)*20
-    return pd.DataFrame({
-        'Date': dates,
-        'Valeur': values
-    })
+# Mesure prévue selon le type de prédiction
+MEASURE_BY_TYPE = {"Besoins en lits": 'lit_hospi_complete', "Tendances d'hospitalisation": 'nbr_hospi'}
+MEASURE_UNITS = {'lit_hospi_complete': "lits", 'nbr_hospi': "hospitalisations"}
+
+# Historique et prévisions précalculées de la série sélectionnée (simple lecture)
+def selected_series(measure):
+    history = forecasts.history_for(region, specialite, measure)
+    forecast = forecasts.forecast_for(region, specialite, measure, horizon)
+    return history, forecast
 
 # Affichage selon le type de prédiction
 if prediction_type == "Besoins en lits":
@@ -68,22 +99,22 @@ if prediction_type == "Besoins en lits":
     # Graphique de prédiction
     col_chart, col_help = st.columns([1, 0.01])
     with col_chart:
-        df = generate_mock_data()
+        history, forecast = selected_series('lit_hospi_complete')
         fig = go.Figure()
         fig.add_trace(go.Scatter(
-            x=df['Date'][:180],
-            y=df['Valeur'][:180],
+            x=history['date'],
+            y=history['valeur'],
             name='Données historiques',
             line=dict(color=MAIN_COLOR)
         ))
         fig.add_trace(go.Scatter(
-            x=df['Date'][180:],
-            y=df['Valeur'][180:],
+            x=[history['date'].iloc[-1]] + forecast['date'].tolist(),
+            y=[history['valeur'].iloc[-1]] + forecast['prevision'].tolist(),
             name='Prédictions',
             line=dict(color=SECONDARY_COLOR, dash='dash')
         ))
         fig.update_layout(
-            title='Prédiction des besoins en lits',
+            title=f'Prédiction des besoins en lits - {region}, {specialite}',
             xaxis_title='Date',
             yaxis_title='Nombre de lits nécessaires',
             template='plotly_white'
@@ -101,8 +132,7 @@ if prediction_type == "Besoins en lits":
             
             Le modèle prend en compte :
             - Les tendances historiques
-            - Les variations saisonnières
-            - Les facteurs démographiques
+            - Le niveau récent de la série
             
             Utilisez les filtres en haut pour affiner les prédictions par région et spécialité."""
         )
@@ -119,19 +149,27 @@ elif prediction_type == "Tendances d'hospitalisation":
     # Graphique des tendances
     col_chart, col_help = st.columns([1, 0.01])
     with col_chart:
-        df = generate_mock_data()
-        fig = px.line(df, x='Date', y='Valeur',
-                     title='Tendances d\'hospitalisation prévues')
-        fig.update_traces(line_color=MAIN_COLOR)
-        fig.add_hrect(
-            y0=df['Valeur'].mean() - df['Valeur'].std(),
-            y1=df['Valeur'].mean() + df['Valeur'].std(),
+        history, forecast = selected_series('nbr_hospi')
+        fig = px.line(history, x='date', y='valeur',
+                     title=f'Tendances d\'hospitalisation prévues - {region}, {specialite}')
+        fig.update_traces(line_color=MAIN_COLOR, name='Données historiques', showlegend=True)
+        # Intervalle de prévision à 95 %
+        fig.add_trace(go.Scatter(
+            x=forecast['date'].tolist() + forecast['date'].tolist()[::-1],
+            y=forecast['borne_haute'].tolist() + forecast['borne_basse'].tolist()[::-1],
+            fill='toself',
             fillcolor=SECONDARY_COLOR,
-            opacity=0.2,
-            layer="below",
-            line_width=0,
-        )
-        fig.update_layout(template='plotly_white')
+            opacity=0.3,
+            line=dict(width=0),
+            name='Intervalle à 95 %'
+        ))
+        fig.add_trace(go.Scatter(
+            x=[history['date'].iloc[-1]] + forecast['date'].tolist(),
+            y=[history['valeur'].iloc[-1]] + forecast['prevision'].tolist(),
+            name='Prévision',
+            line=dict(color=MAIN_COLOR, dash='dash')
+        ))
+        fig.update_layout(template='plotly_white', xaxis_title='Date', yaxis_title='Hospitalisations (rythme annuel)')
         st.plotly_chart(fig, use_container_width=True)
     
     with col_help:
@@ -140,15 +178,15 @@ elif prediction_type == "Tendances d'hospitalisation":
             value="",
             help="""📈 Analyse des tendances d'hospitalisation :
 
-            - Ligne bleue : évolution prévue des hospitalisations
-            - Zone colorée : intervalle de confiance
+            - Ligne continue : hospitalisations annuelles observées
+            - Ligne pointillée : évolution prévue des hospitalisations
+            - Zone colorée : intervalle de prévision à 95 %
             
             Le graphique montre :
-            - Les variations saisonnières attendues
-            - Les tendances à long terme
-            - Les périodes de forte/faible activité
+            - La tendance à long terme de la région et de la spécialité
+            - L'incertitude croissante avec l'horizon
             
-            La zone colorée représente la plage de valeurs probable (±1 écart-type)."""
+            Les valeurs sont exprimées en rythme annuel."""
         )
 
 else:  # Durées de séjour
@@ -196,29 +234,32 @@ else:  # Durées de séjour
             Ces prévisions aident à optimiser la gestion des lits."""
         )
 
-# Métriques de performance
+# Métriques de performance : prévision de la dernière année observée à partir des précédentes
+measure = MEASURE_BY_TYPE.get(prediction_type)
 st.markdown("### 📊 Modèle de prédiction", unsafe_allow_html=True)
-col1, col2, col3, col_help = st.columns([1, 1, 1, 0.01])
-with col1:
-    st.metric("Précision du modèle", "87%", "↑ 2%")
-with col2:
-    st.metric("MAE", "4.3 jours", "↓ 0.5")
-with col3:
-    st.metric("R²", "0.83", "↑ 0.02")
-with col_help:
-    st.metric(
-        label="help",
-        value="",
-        help="""📊 Indicateurs de performance du modèle :
-        
-        - Précision : pourcentage de prédictions correctes (±10% de marge)
-        - MAE (Mean Absolute Error) : erreur moyenne en jours
-        - R² : qualité d'ajustement du modèle (0 à 1)
-        
-        Les flèches indiquent l'évolution par rapport au mois précédent :
-        ↑ : amélioration
-        ↓ : diminution"""
-    )
+if measure is not None:
+    backtest = forecasts.backtest[measure]
+    col1, col2, col3, col_help = st.columns([1, 1, 1, 0.01])
+    with col1:
+        st.metric("Précision du modèle", f"{backtest['precision']:.0%}")
+    with col2:
+        st.metric("MAE", f"{backtest['mae']:,.0f} {MEASURE_UNITS[measure]}".replace(',', ' '))
+    with col3:
+        st.metric("R²", f"{backtest['r2']:.2f}")
+    with col_help:
+        st.metric(
+            label="help",
+            value="",
+            help=f"""📊 Indicateurs de performance du modèle :
+            
+            Évalués en prévoyant l'année {forecasts.years[-1]} à partir des années précédentes,
+            sur l'ensemble des séries région × spécialité :
+            - Précision : part des prévisions à ±10 % de la valeur observée
+            - MAE (Mean Absolute Error) : erreur absolue moyenne
+            - R² : qualité d'ajustement du modèle (0 à 1)"""
+        )
+else:
+    st.write("Les indicateurs de performance sont disponibles pour les besoins en lits et les tendances d'hospitalisation.")
 
 # Résultats
 st.markdown("### 📈 Résultats", unsafe_allow_html=True)
@@ -237,20 +278,21 @@ with st.expander("📝 Notes méthodologiques"):
     st.markdown("""
     ### Méthodologie de prédiction
     
-    Notre modèle utilise une combinaison de :
-    - Séries temporelles avancées (SARIMA, Prophet)
-    - Machine Learning (Random Forest, XGBoost)
-    - Facteurs externes (données démographiques, épidémiologiques)
+    Chaque série annuelle (région × spécialité, pour les hospitalisations et les lits)
+    est modélisée par un lissage exponentiel de Holt (niveau et tendance linéaire) :
+    - Les paramètres de lissage sont choisis par série, en minimisant l'erreur de prévision à un an
+    - Toutes les séries sont ajustées ensemble, en un seul calcul vectorisé
+    - Les prévisions mensuelles sont interpolées sur la tendance annuelle, avec un intervalle à 95 %
     
     ### Sources de données
     - Historique des hospitalisations (PMSI)
-    - Données démographiques (INSEE)
-    - Facteurs saisonniers
+    - Capacités d'accueil des établissements de santé
     
     ### Limitations
     - Les prédictions sont des estimations basées sur les données historiques
+    - Les données étant annuelles, les variations saisonnières ne sont pas modélisées
     - Les événements exceptionnels peuvent impacter la précision
-    - Mise à jour mensuelle des modèles
+    - Modèles recalculés à chaque nouvelle version des données
     """)
 
 # Avertissement
@@ -0,0 +1,70 @@
+import unittest
+from unittest import mock
+import pandas as pd
+from utils.answer_cache import SemanticAnswerCache, normalize_question, is_cacheable, history_digest
+from utils.snapshot import snapshot_version
+
+QUESTION = "Quelle région a le plus d'hospitalisations ?"
+
+class TestAnswerCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = SemanticAnswerCache(max_entries=2)
+        self.cache.set(QUESTION, 'v1', "Île-de-France")
+
+    def test_exact_and_near_matches(self):
+        """Teste les questions identiques après normalisation et les variantes proches"""
+        self.assertEqual(normalize_question(QUESTION), normalize_question("quelles regions ont le PLUS d'hospitalisation"))
+        self.assertEqual(self.cache.get("Quelle est la région avec le plus d'hospitalisations ?", 'v1'), "Île-de-France")
+        self.assertEqual(self.cache.get("Quelle région a le plus d'hospitalisatons ?", 'v1'), "Île-de-France")
+        stats = self.cache.stats()
+        self.assertEqual((stats['exact_hits'], stats['near_hits']), (1, 1))
+
+    def test_different_questions(self):
+        """Teste que les questions au sens différent ne partagent pas la réponse"""
+        self.assertIsNone(self.cache.get("Quelle région a le moins d'hospitalisations ?", 'v1'))
+        self.assertIsNone(self.cache.get("Quelle région a le plus d'hospitalisations en 2019 ?", 'v1'))
+        self.assertIsNone(self.cache.get(QUESTION, 'v2'))
+        self.assertFalse(is_cacheable("2"))
+        self.assertTrue(is_cacheable(QUESTION))
+
+    def test_eviction_and_ttl(self):
+        """Teste l'éviction LRU et l'expiration"""
+        self.cache.set("Durée moyenne de séjour en Gironde ?", 'v1', "5 jours")
+        self.cache.get(QUESTION, 'v1')
+        self.cache.set("Nombre de lits en Corse ?", 'v1', "1 000")
+        self.assertIsNone(self.cache.get("Durée moyenne de séjour en Gironde ?", 'v1'))
+        self.assertEqual(self.cache.get(QUESTION, 'v1'), "Île-de-France")
+
+        cache = SemanticAnswerCache(ttl=10)
+        with mock.patch('utils.answer_cache.time.monotonic', return_value=0.0):
+            cache.set(QUESTION, 'v1', "Île-de-France")
+        with mock.patch('utils.answer_cache.time.monotonic', return_value=11.0):
+            self.assertIsNone(cache.get(QUESTION, 'v1'))
+
+    def test_slots_are_reused(self):
+        """Teste la réutilisation des lignes de l'index vectoriel préalloué"""
+        for i in range(10):
+            self.cache.set(f"Nombre de lits en région numéro {i} ?", 'v1', str(i))
+        self.assertEqual(self.cache.stats()['entries'], 2)
+        self.assertEqual(self.cache._vectors.shape[0], 2)
+        self.assertEqual(self.cache.get("Nombre de lits en région numéro 9 ?", 'v1'), '9')
+        self.assertIsNone(self.cache.get("Nombre de lits en région numéro 0 ?", 'v1'))
+        self.cache.clear()
+        self.assertIsNone(self.cache.get("Nombre de lits en région numéro 9 ?", 'v1'))
+
+    def test_history_digest(self):
+        """Teste l'empreinte de l'historique : vide en début de conversation, propre à chaque échange sinon"""
+        self.assertEqual(history_digest([]), '')
+        first = [{'role': 'user', 'content': 'Tendance en Corse ?'}, {'role': 'assistant', 'content': 'En hausse'}]
+        other = [{'role': 'user', 'content': 'Tendance en Bretagne ?'}, {'role': 'assistant', 'content': 'En baisse'}]
+        self.assertNotEqual(history_digest(first), history_digest(other))
+        self.assertEqual(history_digest(first), history_digest(list(first)))
+
+    def test_snapshot_version(self):
+        """Teste l'empreinte des données"""
+        df = pd.DataFrame({'nom_region': pd.Categorical(['Corse', 'Bretagne']), 'nbr_hospi': [1, 2]})
+        self.assertEqual(snapshot_version(df), snapshot_version(df.copy()))
+        self.assertNotEqual(snapshot_version(df), snapshot_version(df.assign(nbr_hospi=[1, 3])))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from machine_learning.hospitalisation_prediction.batch_inference import (
+    BatchPredictor, prediction_grid, throughput_benchmark
+)
+
+class TestBatchInference(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Pipeline de régression ajusté sur des données régionales synthétiques"""
+        rng = np.random.default_rng(6)
+        cls.regions = [f'Région {i}' for i in range(13)]
+        cls.pathologies = [f'Pathologie {i}' for i in range(40)]
+        train = prediction_grid(cls.regions, cls.pathologies, [2018, 2019])
+        target = rng.uniform(100, 10_000, len(train))
+        cls.model = Pipeline([
+            ('prep', ColumnTransformer([
+                ('cat', OneHotEncoder(handle_unknown='ignore'), ['nom_pathologie', 'nom_region']),
+                ('num', StandardScaler(), ['annee'])
+            ])),
+            ('actual_estimator', LinearRegression())
+        ]).fit(train, target)
+        cls.grid = prediction_grid(cls.regions, cls.pathologies, [2023, 2024, 2025, 2026])
+
+    def test_grid_covers_all_combinations(self):
+        """Teste la grille régions × pathologies × années"""
+        self.assertEqual(len(self.grid), 13 * 40 * 4)
+        self.assertEqual(list(self.grid.columns), ['annee', 'nom_pathologie', 'nom_region'])
+        self.assertFalse(self.grid.duplicated().any())
+
+    def test_pipeline_is_split(self):
+        """Teste la séparation du prétraitement et de l'estimateur"""
+        predictor = BatchPredictor(self.model)
+        self.assertIsInstance(predictor.estimator, LinearRegression)
+        self.assertEqual(len(predictor.preprocess.steps), 1)
+
+    def test_batch_matches_pipeline(self):
+        """Teste l'égalité avec le pipeline complet, y compris pour des triplets répétés"""
+        predictor = BatchPredictor(self.model)
+        triples = pd.concat([self.grid, self.grid.iloc[::-7]], ignore_index=True)
+        np.testing.assert_allclose(predictor.predict(triples), self.model.predict(triples))
+
+    def test_accepts_tuples(self):
+        """Teste l'entrée sous forme de triplets (annee, nom_pathologie, nom_region)"""
+        predictor = BatchPredictor(self.model)
+        triples = [(2024, 'Pathologie 3', 'Région 5'), (2023, 'Pathologie 0', 'Région 12')]
+        expected = self.model.predict(pd.DataFrame(triples, columns=['annee', 'nom_pathologie', 'nom_region']))
+        np.testing.assert_allclose(predictor.predict(triples), expected)
+        self.assertEqual(len(predictor.predict([])), 0)
+
+    def test_estimator_without_pipeline(self):
+        """Teste un estimateur sans étape de prétraitement"""
+        predictor = BatchPredictor(self.model)
+        bare = BatchPredictor(predictor.estimator)
+        self.assertIsNone(bare.preprocess)
+
+    def test_throughput_benchmark(self):
+        """Teste le banc de débit : l'inférence par lots est plus rapide que requête par requête"""
+        # Sans PyCaret, le pipeline scikit-learn remplace predict_model pour les requêtes unitaires
+        report = throughput_benchmark(
+            BatchPredictor(self.model), self.grid, per_request_sample=20, predict_one=self.model.predict
+        )
+        self.assertEqual(list(report.index), ['par_lots', 'par_requete'])
+        self.assertGreater(report.loc['par_lots', 'predictions_par_seconde'], report.loc['par_requete', 'predictions_par_seconde'])
@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+from pycaret.regression import setup, create_model, finalize_model, predict_model
+from machine_learning.hospitalisation_prediction.batch_inference import (
+    BatchPredictor, prediction_grid, pycaret_predict_one, throughput_benchmark
+)
+
+class TestBatchInferencePycaret(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Pipeline PyCaret (prétraitement et estimateur) ajusté sur des données synthétiques"""
+        rng = np.random.default_rng(6)
+        regions = [f'Région {i}' for i in range(5)]
+        pathologies = [f'Pathologie {i}' for i in range(8)]
+        train = prediction_grid(regions, pathologies, range(2015, 2023))
+        train['nbr_hospi'] = rng.uniform(100, 10_000, len(train))
+        setup(
+            data=train, target='nbr_hospi', categorical_features=['nom_pathologie', 'nom_region'],
+            session_id=123, verbose=False, html=False
+        )
+        cls.model = finalize_model(create_model('lr', verbose=False))
+        cls.grid = prediction_grid(regions, pathologies, [2023, 2024, 2025, 2026])
+
+    def test_pipeline_is_split(self):
+        """Teste la séparation du pipeline PyCaret en prétraitement et estimateur final"""
+        predictor = BatchPredictor(self.model)
+        self.assertIsNotNone(predictor.preprocess)
+        self.assertIs(predictor.estimator, self.model.steps[-1][1])
+
+    def test_batch_matches_predict_model(self):
+        """Teste l'égalité avec predict_model, y compris pour des triplets répétés"""
+        predictor = BatchPredictor(self.model)
+        triples = self.grid.iloc[np.r_[0:len(self.grid), 0:len(self.grid):3]].reset_index(drop=True)
+        expected = predict_model(self.model, data=triples, verbose=False)['prediction_label'].to_numpy()
+        np.testing.assert_allclose(predictor.predict(triples), expected, rtol=1e-4)
+
+    def test_throughput_against_predict_model(self):
+        """Teste le banc de débit contre predict_model requête par requête"""
+        predictor = BatchPredictor(self.model)
+        report = throughput_benchmark(predictor, self.grid, per_request_sample=5)
+        self.assertGreater(report.loc['par_lots', 'predictions_par_seconde'], report.loc['par_requete', 'predictions_par_seconde'])
+        single = pycaret_predict_one(self.model)(self.grid.iloc[[0]])
+        self.assertEqual(single.shape, (1,))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import threading
+import time
+import types
+import unittest
+import pandas as pd
+from utils.bigquery_loader import load_tables
+
+class _FakeJob:
+    """Job BigQuery simulé : exécution de `delay` secondes"""
+    def __init__(self, rows, delay):
+        self.rows = rows
+        self.delay = delay
+        self.total_bytes_processed = rows * 10
+
+    def result(self):
+        time.sleep(self.delay)
+        return types.SimpleNamespace(total_rows=self.rows)
+
+    def to_dataframe(self, create_bqstorage_client=True):
+        return pd.DataFrame({'nbr_hospi': range(self.rows)})
+
+class _FakeClient:
+    def __init__(self):
+        self.submitted = []
+
+    def query(self, sql):
+        self.submitted.append(sql)
+        rows = int(sql.split()[-1])
+        return _FakeJob(rows, delay=0.2)
+
+class TestBigQueryLoader(unittest.TestCase):
+    def test_concurrent_loading(self):
+        """Teste le chargement simultané et les durées par table"""
+        client = _FakeClient()
+        start = time.perf_counter()
+        frames, timings = load_tables(client, {'a': 'SELECT 3', 'b': 'SELECT 5', 'c': 'SELECT 7'})
+        elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(len(client.submitted), 3)
+        self.assertEqual({name: len(df) for name, df in frames.items()}, {'a': 3, 'b': 5, 'c': 7})
+        self.assertEqual(timings.loc['b', 'rows'], 5)
+        self.assertEqual(timings.loc['c', 'bytes_processed'], 70)
+        self.assertTrue((timings['query_s'] >= 0.2).all())
+
+    def test_stage_callbacks(self):
+        """Teste les étapes notifiées, depuis le thread appelant"""
+        events = []
+        thread = threading.get_ident()
+        def on_stage(stage, name, info):
+            self.assertEqual(threading.get_ident(), thread)
+            events.append((stage, name, info))
+        load_tables(_FakeClient(), {'a': 'SELECT 3', 'b': 'SELECT 5'}, on_stage=on_stage)
+
+        self.assertEqual([event[0] for event in events[:2]], ['submitted', 'submitted'])
+        self.assertIn(('executed', 'b', {'total_rows': 5}), events)
+        self.assertIn(('downloaded', 'a', {'rows': 3}), events)
+        stages = [stage for stage, name, _ in events if name == 'a']
+        self.assertEqual(stages, ['submitted', 'executed', 'downloaded'])
+
+if __name__ == '__main__':
+    unittest.main()
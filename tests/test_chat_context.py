@@ -0,0 +1,66 @@
+import unittest
+import pandas as pd
+from utils.chat_context import (
+    summarize_by_year, build_fact_snippets, FactIndex, select_context, build_history, estimate_tokens
+)
+
+class TestChatContext(unittest.TestCase):
+    def setUp(self):
+        """Crée un jeu de données sur deux années"""
+        self.df = pd.DataFrame({
+            'year': pd.to_datetime(['2018-12-31'] * 3 + ['2019-12-31'] * 3),
+            'nom_region': pd.Categorical(['Bretagne', 'Corse', 'Bretagne', 'Bretagne', 'Corse', 'Corse']),
+            'nom_pathologie': ['Asthme', 'Asthme', 'Grippe', 'Asthme', 'Grippe', 'Grippe'],
+            'classification': ['M', 'C', 'M', 'PSY', 'M', 'X'],
+            'nbr_hospi': [10, 20, 30, 40, 50, 60],
+            'hospi_prog_24h': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+            'hospi_autres_24h': [1.0, 1.0, 1.0, 1.0, 1.0, 1.0],
+            'AVG_duree_hospi': [2.0, 4.0, 6.0, 1.0, 2.0, 3.0]
+        })
+
+    def test_summary_by_year(self):
+        """Teste les indicateurs annuels"""
+        summary = summarize_by_year(self.df, self.df, self.df)
+        self.assertEqual(list(summary), [2018, 2019])
+        self.assertEqual(summary[2018]['total_hospi'], 60)
+        self.assertEqual(summary[2019]['prog_24h'], 15.0)
+        self.assertAlmostEqual(summary[2018]['avg_duration'], 4.0)
+        self.assertEqual(summary[2018]['top_regions'], {'Bretagne': 40, 'Corse': 20})
+        self.assertEqual(list(summary[2019]['top_regions']), ['Corse', 'Bretagne'])
+        self.assertEqual(summary[2019]['top_pathologies'], {'Grippe': 110, 'Asthme': 40})
+        self.assertEqual(summary[2018]['services'], {'Médecine': 40, 'Chirurgie': 20})
+        self.assertEqual(summary[2019]['services'], {'Médecine': 50, 'Psychiatrie': 40})
+
+    def test_fact_index_search(self):
+        """Teste la sélection des faits pertinents"""
+        summary = summarize_by_year(self.df, self.df, self.df)
+        index = FactIndex(build_fact_snippets(self.df, self.df, summary))
+        facts = index.search("Combien d'hospitalisations en Corse en 2019 ?", top_k=1)
+        self.assertEqual(facts, ["Année 2019 — Corse : 110 hospitalisations, durée moyenne de séjour 2.5 jours."])
+        self.assertEqual(index.search("xyz"), [])
+
+    def test_select_context_budget(self):
+        """Teste le repli sur la vue nationale et le budget de tokens"""
+        summary = summarize_by_year(self.df, self.df, self.df)
+        index = FactIndex(build_fact_snippets(self.df, self.df, summary))
+        context = select_context(index, "xyz", summary)
+        self.assertIn("de 2018 à 2019", context)
+        self.assertIn("Année 2018 — France entière : 60 hospitalisations", context)
+        self.assertNotIn("np.", context)
+        small = select_context(index, "Corse Bretagne Asthme Grippe", summary, token_budget=60)
+        self.assertLessEqual(estimate_tokens(small), 60)
+
+    def test_build_history(self):
+        """Teste l'historique glissant"""
+        messages = [
+            {'role': 'user' if i % 2 == 0 else 'assistant', 'content': f"message {i} " + "mot " * 100}
+            for i in range(10)
+        ]
+        history = build_history(messages, token_budget=300)
+        self.assertLessEqual(estimate_tokens(history), 300)
+        self.assertIn("Résumé des échanges précédents", history)
+        self.assertIn("message 9", history)
+        self.assertEqual(build_history([{'role': 'user', 'content': 'Bonjour'}]), "Patient: Bonjour")
+
+if __name__ == '__main__':
+    unittest.main()
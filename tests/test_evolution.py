@@ -0,0 +1,68 @@
+import unittest
+import numpy as np
+import pandas as pd
+from utils.evolution import evolution_table
+
+def _reference_table(df):
+    """Implémentation historique : filtres et fusions année par année"""
+    evolutions_by_year = {}
+    years = sorted(df['annee'].unique())
+    for current_year, next_year in zip(years[:-1], years[1:]):
+        current_data = df[df['annee'] == current_year].groupby('nom_pathologie', observed=True)['nbr_hospi'].sum()
+        next_data = df[df['annee'] == next_year].groupby('nom_pathologie', observed=True)['nbr_hospi'].sum()
+        evolutions_by_year[f'{current_year}-{next_year}'] = ((next_data - current_data) / current_data * 100).fillna(0)
+    df_summary = df.groupby('nom_pathologie', observed=True)['nbr_hospi'].sum().reset_index()
+    for period, evolution in evolutions_by_year.items():
+        df_summary = df_summary.merge(
+            evolution.reset_index().rename(columns={'nbr_hospi': f'Évol. {period} (%)'}),
+            on='nom_pathologie', how='left'
+        )
+    hospi_first = df[df['annee'] == min(years)].groupby('nom_pathologie', observed=True)['nbr_hospi'].sum()
+    hospi_last = df[df['annee'] == max(years)].groupby('nom_pathologie', observed=True)['nbr_hospi'].sum()
+    evolution_globale = ((hospi_last - hospi_first) / hospi_first * 100).fillna(0)
+    df_summary = df_summary.merge(
+        evolution_globale.reset_index().rename(columns={'nbr_hospi': 'Évol. globale (%)'}),
+        on='nom_pathologie', how='left'
+    )
+    return df_summary.sort_values('Évol. globale (%)', ascending=False)
+
+class TestEvolution(unittest.TestCase):
+    def setUp(self):
+        """Données de plusieurs régions, dont une pathologie absente en 2019"""
+        rng = np.random.default_rng(0)
+        rows = []
+        for year in range(2018, 2023):
+            for patho in ['Asthme', 'Grippe', 'Tuberculose']:
+                if patho == 'Grippe' and year == 2019:
+                    continue
+                for sexe in ['Homme', 'Femme']:
+                    for region in ['Bretagne', 'Corse']:
+                        rows.append((year, patho, sexe, region, int(rng.integers(1, 500))))
+        self.df = pd.DataFrame(rows, columns=['annee', 'nom_pathologie', 'sexe', 'nom_region', 'nbr_hospi'])
+        self.df['nom_pathologie'] = self.df['nom_pathologie'].astype('category')
+        self.df['sexe'] = self.df['sexe'].astype('category')
+
+    def test_matches_reference(self):
+        """Teste l'égalité avec le calcul historique par boucles et fusions"""
+        expected = _reference_table(self.df)
+        result = evolution_table(self.df)
+        self.assertEqual(list(result.columns), list(expected.columns))
+        self.assertEqual(list(result['nom_pathologie']), list(expected['nom_pathologie']))
+        np.testing.assert_allclose(
+            result.drop(columns='nom_pathologie').to_numpy(dtype=float),
+            expected.drop(columns='nom_pathologie').to_numpy(dtype=float)
+        )
+
+    def test_by_sexe_and_labels(self):
+        """Teste la variante par sexe et le renommage pour l'affichage"""
+        result = evolution_table(
+            self.df, by=['sexe', 'nom_pathologie'],
+            labels={'nom_pathologie': 'Pathologie', 'nbr_hospi': 'Hospitalisations'}
+        )
+        self.assertEqual(len(result), 6)
+        self.assertEqual(list(result.columns[:3]), ['sexe', 'Pathologie', 'Hospitalisations'])
+        self.assertEqual(result['Hospitalisations'].sum(), self.df['nbr_hospi'].sum())
+        self.assertTrue(result['Évol. globale (%)'].is_monotonic_decreasing)
+
+if __name__ == '__main__':
+    unittest.main()
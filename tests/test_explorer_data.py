@@ -0,0 +1,72 @@
+import unittest
+import numpy as np
+import pandas as pd
+from utils.explorer_data import aggregate_view, downsample, explorer_dataset, measure_rule
+
+class TestExplorerData(unittest.TestCase):
+    def setUp(self):
+        """Lignes par région, sexe, pathologie et année, population commune aux pathologies"""
+        rng = np.random.default_rng(3)
+        rows = []
+        for year in range(2018, 2021):
+            for region, nom_region in [('53', 'Bretagne'), ('94', 'Corse')]:
+                for sexe in ['Homme', 'Femme']:
+                    population = int(rng.integers(100_000, 1_000_000))
+                    for patho in ['Asthme', 'Grippe', 'Tuberculose']:
+                        rows.append((year, region, nom_region, sexe, patho,
+                                     int(rng.integers(1, 500)), float(rng.uniform(1, 10)),
+                                     float(rng.uniform(1, 5)), population,
+                                     float(rng.uniform(-50, 50)), float(rng.uniform(-20, 20))))
+        self.df = pd.DataFrame(rows, columns=[
+            'year', 'region', 'nom_region', 'sexe', 'nom_pathologie', 'nbr_hospi', 'AVG_duree_hospi',
+            'tx_brut_tt_age_pour_mille', 'population', 'evolution_nbr_hospi', 'evolution_percent_nbr_hospi'
+        ])
+        self.df['nom_pathologie'] = self.df['nom_pathologie'].astype('category')
+        self.df.attrs['snapshot_version'] = 'v1'
+
+    def test_measure_rules(self):
+        """Teste les règles d'agrégation des mesures"""
+        columns = self.df.columns
+        self.assertEqual(measure_rule('nbr_hospi', columns), 'sum')
+        self.assertEqual(measure_rule('AVG_duree_hospi', columns), 'weighted')
+        self.assertEqual(measure_rule('AVG_duree_hospi', ['AVG_duree_hospi']), 'mean')
+        self.assertEqual(measure_rule('evolution_nbr_hospi', columns), 'sum')
+        self.assertEqual(measure_rule('evolution_percent_nbr_hospi', columns), 'mean')
+        self.assertEqual(measure_rule('evolution_AVG_duree_hospi', columns), 'mean')
+
+    def test_region_year_pathology(self):
+        """Teste l'agrégation région × année × pathologie (somme sur les sexes)"""
+        result = aggregate_view(self.df, ['year', 'nom_region', 'nom_pathologie'])
+        self.assertEqual(len(result), 3 * 2 * 3)
+        self.assertNotIn('sexe', result.columns)
+        self.assertNotIn('region', result.columns)
+
+        group = self.df[(self.df['year'] == 2019) & (self.df['nom_region'] == 'Corse') & (self.df['nom_pathologie'] == 'Grippe')]
+        row = result[(result['year'] == 2019) & (result['nom_region'] == 'Corse') & (result['nom_pathologie'] == 'Grippe')].iloc[0]
+        self.assertEqual(row['nbr_hospi'], group['nbr_hospi'].sum())
+        self.assertEqual(row['population'], group['population'].sum())
+        self.assertAlmostEqual(row['AVG_duree_hospi'], np.average(group['AVG_duree_hospi'], weights=group['nbr_hospi']))
+        self.assertAlmostEqual(row['tx_brut_tt_age_pour_mille'], np.average(group['tx_brut_tt_age_pour_mille'], weights=group['population']))
+        self.assertAlmostEqual(row['evolution_percent_nbr_hospi'], group['evolution_percent_nbr_hospi'].mean())
+
+    def test_population_not_repeated_per_pathology(self):
+        """Teste que la population n'est comptée qu'une fois par territoire, sexe et année"""
+        result = aggregate_view(self.df, ['year', 'nom_region'])
+        expected = self.df.drop_duplicates(['year', 'region', 'sexe']).groupby(['year', 'nom_region'])['population'].sum()
+        np.testing.assert_array_equal(result['population'].to_numpy(), expected.to_numpy())
+        self.assertEqual(result['nbr_hospi'].sum(), self.df['nbr_hospi'].sum())
+
+    def test_downsample(self):
+        """Teste le plafond de lignes reproductible"""
+        self.assertIs(downsample(self.df, len(self.df)), self.df)
+        sample = downsample(self.df, 10)
+        self.assertEqual(len(sample), 10)
+        pd.testing.assert_frame_equal(sample, downsample(self.df, 10))
+        self.assertTrue(sample.index.is_monotonic_increasing)
+
+    def test_explorer_dataset_keeps_version(self):
+        """Teste la conservation de la version de l'instantané"""
+        dataset = explorer_dataset(self.df, ('year', 'nom_pathologie'))
+        self.assertEqual(len(dataset), 9)
+        self.assertEqual(dataset.attrs['snapshot_version'], 'v1')
+        self.assertIs(explorer_dataset(self.df, None, None), self.df)
@@ -0,0 +1,82 @@
+import unittest
+import numpy as np
+import pandas as pd
+from utils.forecasting import (
+    HospitalForecasts, HORIZONS, ALL_REGIONS, ALL_SERVICES,
+    build_series, fit_holt, forecast_holt, backtest_metrics
+)
+
+class TestForecasting(unittest.TestCase):
+    def setUp(self):
+        """Mart régional : tendances linéaires par région et spécialité, plus un service hors page"""
+        rows = []
+        for i, region in enumerate(['Bretagne', 'Corse', 'Occitanie']):
+            for j, code in enumerate(['M', 'C', 'O', 'SSR', 'PSY', 'ESND']):
+                for year in range(2018, 2023):
+                    rows.append((region, code, year, 1000 * (i + 1) + 50 * j * (year - 2018), 100 + 10 * i - j * (year - 2018)))
+        self.df = pd.DataFrame(rows, columns=['nom_region', 'classification', 'annee', 'nbr_hospi', 'lit_hospi_complete'])
+        self.df['nom_region'] = self.df['nom_region'].astype('category')
+        self.df['classification'] = self.df['classification'].astype('category')
+
+    def test_series_include_totals(self):
+        """Teste les séries par région et spécialité et les totaux (service ESND exclu)"""
+        series = build_series(self.df)
+        self.assertEqual(len(series), (3 + 1) * (5 + 1))
+        scope = self.df[self.df['classification'] != 'ESND']
+        total = scope.groupby('annee')['nbr_hospi'].sum()
+        np.testing.assert_array_equal(series.loc[(ALL_REGIONS, ALL_SERVICES), 'nbr_hospi'].to_numpy(), total.to_numpy())
+        corse = scope[scope['nom_region'] == 'Corse'].groupby('annee')['lit_hospi_complete'].sum()
+        np.testing.assert_array_equal(series.loc[('Corse', ALL_SERVICES), 'lit_hospi_complete'].to_numpy(), corse.to_numpy())
+
+    def test_linear_trend_is_extrapolated(self):
+        """Teste l'extrapolation exacte d'une tendance linéaire, sans incertitude"""
+        values = np.array([[10., 20., 30., 40., 50.], [5., 5., 5., 5., 5.]])
+        fit = fit_holt(values)
+        mean, low, high = forecast_holt(fit, np.array([0.5, 1.0, 2.0]))
+        np.testing.assert_allclose(mean, [[55., 60., 70.], [5., 5., 5.]])
+        np.testing.assert_allclose(low, mean)
+        np.testing.assert_allclose(high, mean)
+
+    def test_batch_fit_matches_single_series(self):
+        """Teste que l'ajustement en lot donne les mêmes paramètres que série par série"""
+        rng = np.random.default_rng(4)
+        values = rng.uniform(50, 150, size=(20, 5)).cumsum(axis=1)
+        batch = fit_holt(values)
+        for i in range(len(values)):
+            single = fit_holt(values[i:i + 1])
+            self.assertEqual(batch.alpha[i], single.alpha[0])
+            self.assertEqual(batch.beta[i], single.beta[0])
+            self.assertAlmostEqual(batch.level[i], single.level[0])
+
+    def test_interval_widens_with_horizon(self):
+        """Teste l'élargissement de l'intervalle de prévision avec l'horizon"""
+        rng = np.random.default_rng(5)
+        values = 100 + rng.normal(0, 10, size=(10, 5))
+        _, low, high = forecast_holt(fit_holt(values), np.array([1 / 12, 0.5, 1.0, 2.0]))
+        self.assertTrue((np.diff(high - low, axis=1) >= 0).all())
+
+    def test_backtest_on_exact_trend(self):
+        """Teste les métriques de validation sur des tendances exactes"""
+        values = np.array([[10., 20., 30., 40., 50.], [50., 40., 30., 20., 10.]])
+        metrics = backtest_metrics(values)
+        self.assertEqual(metrics['precision'], 1.0)
+        self.assertAlmostEqual(metrics['mae'], 0.0)
+        self.assertAlmostEqual(metrics['r2'], 1.0)
+
+    def test_forecasts_precomputed_per_horizon(self):
+        """Teste les prévisions mensuelles précalculées de chaque horizon"""
+        forecasts = HospitalForecasts(self.df)
+        self.assertEqual(set(forecasts.forecasts), set(HORIZONS))
+        for label, months in HORIZONS.items():
+            forecast = forecasts.forecast_for('Bretagne', 'Médecine', 'nbr_hospi', label)
+            self.assertEqual(len(forecast), months)
+            self.assertEqual(forecast['date'].iloc[0], pd.Timestamp('2023-01-31'))
+            self.assertTrue(forecast['date'].is_monotonic_increasing)
+
+        # Tendance exacte : 1000 hospitalisations par an, sans pente pour la médecine
+        year_ahead = forecasts.forecast_for('Bretagne', 'Médecine', 'nbr_hospi', '1 an')
+        self.assertAlmostEqual(year_ahead['prevision'].iloc[-1], 1000.0)
+        history = forecasts.history_for('Corse', 'Chirurgie', 'nbr_hospi')
+        self.assertEqual(history['valeur'].tolist(), [2000, 2050, 2100, 2150, 2200])
+        year_ahead = forecasts.forecast_for('Corse', 'Chirurgie', 'nbr_hospi', '1 an')
+        self.assertAlmostEqual(year_ahead['prevision'].iloc[-1], 2250.0)
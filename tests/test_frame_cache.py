@@ -0,0 +1,100 @@
+import unittest
+import pandas as pd
+from utils.frame_cache import SnapshotCache, frame_token, stamp_snapshot, SNAPSHOT_ATTR
+
+class TestFrameCache(unittest.TestCase):
+    def setUp(self):
+        """Instantané marqué d'une version et cache dédié"""
+        self.df = pd.DataFrame({
+            'annee': [2018, 2019, 2018, 2019],
+            'sexe': ['Homme', 'Homme', 'Femme', 'Femme'],
+            'nbr_hospi': [10, 20, 30, 40]
+        })
+        self.df.attrs[SNAPSHOT_ATTR] = 'v1'
+        self.cache = SnapshotCache(max_entries=8)
+        self.calls = 0
+
+        @self.cache.memoize
+        def total(df, column='nbr_hospi'):
+            self.calls += 1
+            return df[column].sum()
+        self.total = total
+
+    def test_token_follows_filters(self):
+        """Teste une clé identique pour un même filtre et différente pour d'autres lignes"""
+        hommes = frame_token(self.df[self.df['sexe'] == 'Homme'])
+        self.assertEqual(hommes, frame_token(self.df[self.df['sexe'] == 'Homme']))
+        self.assertNotEqual(hommes, frame_token(self.df[self.df['sexe'] == 'Femme']))
+        self.assertNotEqual(frame_token(self.df), frame_token(self.df[['annee', 'nbr_hospi']]))
+        self.assertEqual(hommes.version, 'v1')
+
+    def test_memoize(self):
+        """Teste la réutilisation du résultat sans nouveau calcul"""
+        self.assertEqual(self.total(self.df[self.df['annee'] == 2018]), 40)
+        self.assertEqual(self.total(self.df[self.df['annee'] == 2018]), 40)
+        self.assertEqual(self.total(self.df[self.df['annee'] == 2019]), 60)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.cache.stats(), {'entries': 2, 'hits': 1, 'misses': 2})
+
+    def test_invalidation_on_new_version(self):
+        """Teste la suppression des entrées de l'ancienne version d'une source"""
+        self.cache.set_version('source', 'v1')
+        self.total(self.df)
+        self.cache.set_version('source', 'v1')
+        self.assertEqual(self.cache.stats()['entries'], 1)
+
+        reloaded = self.df.assign(nbr_hospi=self.df['nbr_hospi'] * 2)
+        reloaded.attrs[SNAPSHOT_ATTR] = 'v2'
+        self.cache.set_version('source', 'v2')
+        self.assertEqual(self.cache.stats()['entries'], 0)
+        self.assertEqual(self.total(reloaded), 200)
+
+    def test_unstamped_frame(self):
+        """Teste le repli sur le contenu pour un DataFrame non marqué"""
+        df = pd.DataFrame({'nbr_hospi': [1, 2]})
+        self.assertEqual(self.total(df), 3)
+        df2 = pd.DataFrame({'nbr_hospi': [1, 5]})
+        self.assertEqual(self.total(df2), 6)
+        self.assertEqual(self.calls, 2)
+
+    def test_derived_frames_same_shape(self):
+        """Teste des clés distinctes pour des DataFrames dérivés de même forme et de valeurs différentes"""
+        par_annee = self.df.groupby('annee', as_index=False)['nbr_hospi'].sum()
+        par_sexe = self.df.groupby('sexe', as_index=False)['nbr_hospi'].sum().rename(columns={'sexe': 'annee'})
+        self.assertEqual(par_annee.attrs[SNAPSHOT_ATTR], par_sexe.attrs[SNAPSHOT_ATTR])
+        self.assertNotEqual(frame_token(par_annee), frame_token(par_sexe))
+
+        doubled = self.df.assign(nbr_hospi=self.df['nbr_hospi'] * 2)
+        self.assertEqual(self.total(self.df), 100)
+        self.assertEqual(self.total(doubled), 200)
+
+    def test_results_are_copies(self):
+        """Teste qu'une modification du résultat rendu n'altère pas le cache"""
+        @self.cache.memoize
+        def par_annee(df):
+            return df.groupby('annee')['nbr_hospi'].sum().to_frame()
+
+        first = par_annee(self.df)
+        first.loc[2018, 'nbr_hospi'] = -1
+        first['autre'] = 0
+        second = par_annee(self.df)
+        self.assertEqual(second.loc[2018, 'nbr_hospi'], 40)
+        self.assertNotIn('autre', second.columns)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_filters_of_stamped_snapshot_hash_row_labels(self):
+        """Teste la clé par étiquettes de lignes pour les filtres d'un instantané marqué, et le repli sur le contenu sinon"""
+        snapshot = stamp_snapshot(self.df.copy(), 'test_frame_cache')
+        hommes = snapshot[snapshot['sexe'] == 'Homme'][['annee', 'nbr_hospi']]
+        self.assertTrue(frame_token(hommes).digest.startswith('lignes:'))
+        self.assertEqual(frame_token(hommes), frame_token(snapshot[snapshot['sexe'] == 'Homme'][['annee', 'nbr_hospi']]))
+
+        # Agrégats et colonnes recalculées héritent de la version mais pas des lignes de l'instantané
+        par_annee = snapshot.groupby('annee', as_index=False)['nbr_hospi'].sum()
+        self.assertTrue(frame_token(par_annee).digest.startswith('contenu:'))
+        doubled = snapshot.assign(nbr_hospi=snapshot['nbr_hospi'] * 2)
+        self.assertTrue(frame_token(doubled).digest.startswith('contenu:'))
+        self.assertNotEqual(frame_token(doubled), frame_token(snapshot))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import time
+import unittest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from utils.llm_streaming import stream_llm, stream_agent, TracingCallbackHandler
+from utils.tracing import Tracer
+from utils.worker_pool import SessionWorkerPool
+
+class _FakeAgent:
+    """Agent minimal : diffuse la réponse du LLM avec les callbacks reçus"""
+    def __init__(self, llm):
+        self.llm = llm
+
+    def invoke(self, prompt, config=None):
+        text = ''.join(chunk.content for chunk in self.llm.stream(prompt, config=config))
+        return {'output': text}
+
+class _FailingAgent:
+    def invoke(self, prompt, config=None):
+        raise RuntimeError("échec de l'agent")
+
+class _SlowAgent:
+    def invoke(self, prompt, config=None):
+        time.sleep(0.5)
+        return {'output': "trop tard"}
+
+class _EndlessLlm:
+    """LLM diffusant des tokens sans fin ; compte les tokens produits"""
+    def __init__(self):
+        self.produced = 0
+
+    def stream(self, prompt):
+        while True:
+            time.sleep(0.01)
+            self.produced += 1
+            yield 'token '
+
+class TestLlmStreaming(unittest.TestCase):
+    def test_stream_llm(self):
+        """Teste la diffusion token par token et la mesure du premier token"""
+        llm = GenericFakeChatModel(messages=iter(["Les hospitalisations augmentent en 2022"]))
+        stream = stream_llm(llm, "Quelle tendance ?")
+        chunks = list(stream)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(''.join(chunks), "Les hospitalisations augmentent en 2022")
+        self.assertEqual(stream.output, stream.text)
+        self.assertIsNotNone(stream.time_to_first_token)
+        self.assertGreaterEqual(stream.total_time, stream.time_to_first_token)
+
+    def test_stream_agent(self):
+        """Teste la diffusion des tokens de l'agent via les callbacks"""
+        llm = GenericFakeChatModel(messages=iter(["La Corse compte 110 hospitalisations"]))
+        stream = stream_agent(_FakeAgent(llm), "Combien en Corse ?")
+        chunks = list(stream)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(stream.output, "La Corse compte 110 hospitalisations")
+        self.assertEqual(stream.text, stream.output)
+
+    def test_stream_agent_tracing(self):
+        """Teste l'enregistrement d'un span par appel au LLM de l'agent"""
+        tracer = Tracer(log_path=None)
+        llm = GenericFakeChatModel(messages=iter(["Réponse"]))
+        list(stream_agent(_FakeAgent(llm), "question", callbacks=[TracingCallbackHandler(tracer)]))
+        self.assertEqual([span['kind'] for span in tracer.spans], ['llm'])
+        self.assertEqual(tracer.spans[0]['attributes']['step'], 1)
+
+    def test_stream_agent_pool_and_timeout(self):
+        """Teste l'exécution dans le pool et le délai maximal"""
+        pool = SessionWorkerPool(max_workers=1)
+        llm = GenericFakeChatModel(messages=iter(["Réponse du pool"]))
+        stream = stream_agent(_FakeAgent(llm), "question", pool=pool, session_id='a')
+        self.assertEqual(''.join(stream), "Réponse du pool")
+        with self.assertRaises(TimeoutError):
+            list(stream_agent(_SlowAgent(), "question", pool=pool, session_id='a', timeout=0.1))
+        pool.shutdown()
+
+    def test_abandoned_stream_is_cancelled(self):
+        """Teste l'interruption de l'appel quand le lecteur abandonne le flux"""
+        pool = SessionWorkerPool(max_workers=1)
+        llm = _EndlessLlm()
+        tokens = iter(stream_llm(llm, "question", pool=pool, session_id='a'))
+        next(tokens)
+        tokens.close()
+        time.sleep(0.1)
+        produced = llm.produced
+        time.sleep(0.1)
+        self.assertEqual(llm.produced, produced)
+
+        # Le thread du pool est libéré pour la requête suivante
+        llm = GenericFakeChatModel(messages=iter(["Suite"]))
+        self.assertEqual(''.join(stream_llm(llm, "question", pool=pool, session_id='a', timeout=5)), "Suite")
+        pool.shutdown()
+
+    def test_stream_agent_error(self):
+        """Teste la remontée des erreurs de l'agent"""
+        with self.assertRaises(RuntimeError):
+            list(stream_agent(_FailingAgent(), "question"))
+
+if __name__ == '__main__':
+    unittest.main()
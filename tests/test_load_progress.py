@@ -0,0 +1,69 @@
+import types
+import unittest
+import pandas as pd
+from utils.bigquery_loader import load_tables
+from utils.load_progress import LoadProgress
+
+class _FakeJob:
+    def __init__(self, rows):
+        self.rows = rows
+        self.total_bytes_processed = rows * 10
+
+    def result(self):
+        return types.SimpleNamespace(total_rows=self.rows)
+
+    def to_dataframe(self, create_bqstorage_client=True):
+        return pd.DataFrame({'nbr_hospi': range(self.rows)})
+
+class _FakeClient:
+    def query(self, sql):
+        return _FakeJob(int(sql.split()[-1]))
+
+class _FakeProgressBar:
+    """Barre de progression simulée : enregistre les valeurs affichées"""
+    def __init__(self):
+        self.values = []
+        self.texts = []
+
+    def progress(self, value, text=None):
+        self.values.append(value)
+        self.texts.append(text)
+
+class TestLoadProgress(unittest.TestCase):
+    def test_progress_follows_stages(self):
+        """Teste une progression croissante pilotée par les étapes de chargement"""
+        bar = _FakeProgressBar()
+        progress = LoadProgress(['a', 'b'], bar)
+        load_tables(_FakeClient(), {'a': 'SELECT 3', 'b': 'SELECT 5'}, on_stage=progress)
+        self.assertEqual(bar.values[-1], 70)
+
+        progress('converted', 'a')
+        progress('converted', 'b')
+        progress('metrics')
+        progress('done')
+        self.assertEqual(bar.values, sorted(bar.values))
+        self.assertEqual(bar.values[-1], 100)
+        self.assertEqual(bar.texts[-1], "Chargement terminé !")
+
+    def test_startup_metrics(self):
+        """Teste les durées d'étapes publiées comme métriques de démarrage"""
+        progress = LoadProgress(['a', 'b'])
+        load_tables(_FakeClient(), {'a': 'SELECT 3', 'b': 'SELECT 5'}, on_stage=progress)
+        progress('done')
+        metrics = progress.log_metrics()
+        self.assertEqual(metrics['rows'], 8)
+        self.assertIn('a_s', metrics)
+        self.assertLessEqual(metrics['queries_executed_s'], metrics['downloads_done_s'])
+        self.assertGreaterEqual(metrics['metrics_done_s'], metrics['downloads_done_s'])
+
+    def test_cached_load(self):
+        """Teste le cas où les données sont en cache : aucune étape de chargement reçue"""
+        bar = _FakeProgressBar()
+        progress = LoadProgress(['a'], bar)
+        progress('metrics')
+        progress('done')
+        self.assertEqual(bar.values, [85, 100])
+        self.assertNotIn('downloads_done_s', progress.metrics())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import pandas as pd
+from utils.main_metrics import MainMetrics
+
+class TestMainMetrics(unittest.TestCase):
+    def setUp(self):
+        """Hospitalisations par sexe et capacités, sur deux niveaux administratifs"""
+        rows = []
+        for year in range(2018, 2023):
+            for niveau in ['Régions', 'Départements']:
+                for i, sexe in enumerate(['Ensemble', 'Homme', 'Femme']):
+                    rows.append((f'{year}-12-31', niveau, sexe, year + i))
+        self.df_nbr_hospi = pd.DataFrame(rows, columns=['year', 'niveau', 'sexe', 'nbr_hospi'])
+        self.df_nbr_hospi['year'] = pd.to_datetime(self.df_nbr_hospi['year'])
+        self.df_nbr_hospi['sexe'] = self.df_nbr_hospi['sexe'].astype('category')
+        self.df_capacite_hospi = pd.DataFrame({
+            'year': pd.to_datetime([f'{year}-12-31' for year in range(2018, 2022) for _ in range(2)]),
+            'niveau': ['Départements', 'Régions'] * 4,
+            'lit_hospi_complete': [100, 1000] * 4
+        })
+
+    def test_matches_filtered_sums(self):
+        """Teste l'égalité avec le calcul historique (un filtre par année)"""
+        metrics = MainMetrics(self.df_nbr_hospi, self.df_capacite_hospi)
+        for sexe in ['Ensemble', 'Homme', 'Femme']:
+            result = metrics.for_sex(sexe)
+            df = self.df_nbr_hospi[(self.df_nbr_hospi['sexe'] == sexe) & (self.df_nbr_hospi['niveau'] == 'Départements')]
+            for year in range(2018, 2023):
+                self.assertEqual(result[f'hospi_{year}'], df['nbr_hospi'][df['year'].dt.year == year].sum())
+        self.assertEqual(result['lits_2018'], 100)
+        self.assertEqual(result['lits_2022'], 0)
+
+    def test_all_rows(self):
+        """Teste la somme de toutes les valeurs de sexe sans filtre de niveau"""
+        metrics = MainMetrics(self.df_nbr_hospi, self.df_capacite_hospi, niveau=None)
+        self.assertEqual(metrics.for_sex(None)['hospi_2018'], 2 * (2018 + 2019 + 2020))
+        self.assertEqual(metrics.for_sex(None)['lits_2019'], 1100)
+        self.assertEqual(metrics.for_sex('Inconnu')['hospi_2018'], 0)
+
+    def test_lits_from_date_column(self):
+        """Teste la somme réelle des lits pour une colonne year de dates (type DATE de BigQuery)"""
+        df_capacite_hospi = self.df_capacite_hospi.assign(year=self.df_capacite_hospi['year'].dt.date)
+        self.assertEqual(df_capacite_hospi['year'].dtype, object)
+        result = MainMetrics(self.df_nbr_hospi, df_capacite_hospi).for_sex('Ensemble')
+        self.assertEqual([result[f'lits_{year}'] for year in range(2018, 2023)], [100, 100, 100, 100, 0])
+
+        lits = MainMetrics(self.df_nbr_hospi, df_capacite_hospi, niveau=None).lits
+        self.assertEqual(lits.to_dict(), {2018: 1100, 2019: 1100, 2020: 1100, 2021: 1100})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import threading
+import unittest
+from unittest import mock
+from mlflow.tracking import MlflowClient
+from machine_learning.utils.mlflow_logging import (
+    BatchedMlflowLogger, MAX_METRICS_PER_BATCH, MAX_PARAMS_PER_BATCH
+)
+
+class TestBatchedMlflowLogger(unittest.TestCase):
+    def setUp(self):
+        """Client MLflow simulé (log_batch et log_dict enregistrent leurs appels)"""
+        self.client = mock.create_autospec(MlflowClient, instance=True)
+
+    def batches(self):
+        return [call.kwargs for call in self.client.log_batch.call_args_list]
+
+    def test_single_batch(self):
+        """Teste l'envoi des paramètres et métriques en un seul log_batch à la fermeture"""
+        with BatchedMlflowLogger('run', client=self.client) as tracker:
+            tracker.log_params({'target_col': 'classification', 'fold': 5})
+            tracker.log_metrics({'Accuracy': 0.9, 'F1': 0.8})
+            self.client.log_batch.assert_not_called()
+
+        self.assertEqual(self.client.log_batch.call_count, 1)
+        batch = self.batches()[0]
+        self.assertEqual({param.key: param.value for param in batch['params']}, {'target_col': 'classification', 'fold': '5'})
+        self.assertEqual([metric.key for metric in batch['metrics']], ['Accuracy', 'F1'])
+
+    def test_chunking_to_api_limits(self):
+        """Teste le découpage aux limites de l'API log_batch"""
+        tracker = BatchedMlflowLogger('run', client=self.client, batch_size=10_000, flush_interval=None)
+        tracker.log_params({f'p{i}': i for i in range(MAX_PARAMS_PER_BATCH + 1)})
+        tracker.log_metrics({f'm{i}': i for i in range(2 * MAX_METRICS_PER_BATCH + 1)})
+        tracker.close()
+
+        batches = self.batches()
+        self.assertEqual(len(batches), 3)
+        self.assertTrue(all(len(batch['metrics']) <= MAX_METRICS_PER_BATCH for batch in batches))
+        self.assertTrue(all(len(batch['params']) <= MAX_PARAMS_PER_BATCH for batch in batches))
+        self.assertEqual(sum(len(batch['metrics']) for batch in batches), 2 * MAX_METRICS_PER_BATCH + 1)
+        self.assertEqual(sum(len(batch['params']) for batch in batches), MAX_PARAMS_PER_BATCH + 1)
+
+    def test_flush_at_batch_size(self):
+        """Teste l'envoi automatique dès que le tampon atteint batch_size éléments"""
+        tracker = BatchedMlflowLogger('run', client=self.client, batch_size=3, flush_interval=None)
+        for step in range(7):
+            tracker.log_metric('loss', 1 / (step + 1), step=step)
+        self.assertEqual(self.client.log_batch.call_count, 2)
+        tracker.close()
+        self.assertEqual([len(batch['metrics']) for batch in self.batches()], [3, 3, 1])
+
+    def test_flush_at_interval(self):
+        """Teste l'envoi automatique une fois le délai écoulé"""
+        tracker = BatchedMlflowLogger('run', client=self.client, flush_interval=0)
+        tracker.log_metric('loss', 0.5)
+        self.assertEqual(self.client.log_batch.call_count, 1)
+        tracker.close()
+        self.assertEqual(self.client.log_batch.call_count, 1)
+
+    def test_artifact_path(self):
+        """Teste l'envoi des artefacts dans le run, sous leur chemin"""
+        with BatchedMlflowLogger('run', client=self.client) as tracker:
+            tracker.log_dict({'sexe': ['Femme', 'Homme']}, 'label_encoders.json')
+        self.client.log_dict.assert_called_once_with('run', {'sexe': ['Femme', 'Homme']}, 'label_encoders.json')
+
+    def test_asynchronous_flush_does_not_block(self):
+        """Teste qu'un envoi asynchrone se fait pendant que l'appelant continue"""
+        release = threading.Event()
+        self.client.log_batch.side_effect = lambda *args, **kwargs: release.wait(5)
+
+        tracker = BatchedMlflowLogger('run', asynchronous=True, client=self.client, batch_size=2, flush_interval=None)
+        tracker.log_metrics({'a': 1, 'b': 2})
+        tracker.log_metric('c', 3)
+        self.assertEqual(len(tracker._metrics), 1)
+        release.set()
+        tracker.close()
+        self.assertEqual(self.client.log_batch.call_count, 2)
+
+    def test_asynchronous_error_is_raised(self):
+        """Teste la propagation d'une erreur d'envoi survenue dans le thread"""
+        self.client.log_batch.side_effect = RuntimeError('MLflow indisponible')
+        tracker = BatchedMlflowLogger('run', asynchronous=True, client=self.client)
+        tracker.log_metric('loss', 0.5)
+        executor = tracker._executor
+        with self.assertRaises(RuntimeError):
+            tracker.close()
+
+        # Le thread d'envoi est arrêté malgré l'erreur
+        self.assertIsNone(tracker._executor)
+        self.assertTrue(executor._shutdown)
+        self.assertFalse(any(thread.is_alive() for thread in executor._threads))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import ast
+import builtins
+import os
+import unittest
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pages')
+
+
+def undefined_names(path):
+    """
+    Noms lus dans un script de page sans être définis, importés ni intégrés
+
+    Analyse statique (streamlit n'est pas importé) : tout nom défini quelque
+    part dans le fichier compte comme défini, ce qui suffit à repérer une
+    fonction appelée mais jamais écrite.
+    """
+    with open(path, encoding='utf-8') as source:
+        tree = ast.parse(source.read(), filename=path)
+
+    defined = set(dir(builtins))
+    loaded = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            if isinstance(node.ctx, ast.Load):
+                loaded.setdefault(node.id, node.lineno)
+            else:
+                defined.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            defined.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                defined.add((alias.asname or alias.name).split('.')[0])
+        elif isinstance(node, ast.arg):
+            defined.add(node.arg)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            defined.add(node.name)
+    return {name: line for name, line in loaded.items() if name not in defined}
+
+
+class TestPages(unittest.TestCase):
+    def test_prediction_pages_define_their_names(self):
+        """Teste que les pages de prédiction et l'explorateur n'appellent aucun nom indéfini"""
+        for page in ['predictions.py', 'prediction.py', 'graph_generator.py']:
+            with self.subTest(page=page):
+                self.assertEqual(undefined_names(os.path.join(PAGES_DIR, page)), {})
+
+    def test_service_pages_filter_evolution_on_their_sex_variable(self):
+        """Teste que les tableaux d'évolution par sexe filtrent sur la variable de sexe de la page"""
+        for page in ['chirurgie.py', 'medecine.py', 'esnd.py']:
+            with self.subTest(page=page):
+                self.assertEqual(undefined_names(os.path.join(PAGES_DIR, page)), {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+import pandas as pd
+from utils.pathology_facts import pathology_year_facts, top_pathologies
+
+class TestPathologyFacts(unittest.TestCase):
+    def setUp(self):
+        """Lignes par région et par année pour trois pathologies"""
+        rng = np.random.default_rng(1)
+        rows = []
+        for year in range(2018, 2023):
+            for patho in ['Asthme', 'Grippe', 'Tuberculose']:
+                for region in ['Bretagne', 'Corse', 'Occitanie']:
+                    rows.append((year, patho, region, int(rng.integers(1, 500)),
+                                 float(rng.uniform(1, 10)), float(rng.uniform(50, 150))))
+        self.df = pd.DataFrame(rows, columns=[
+            'annee', 'nom_pathologie', 'nom_region', 'nbr_hospi', 'AVG_duree_hospi', 'indice_comparatif_tt_age_percent'
+        ])
+        self.df['nom_pathologie'] = self.df['nom_pathologie'].astype('category')
+
+    def test_matches_merged_groupbys(self):
+        """Teste l'égalité avec les trois groupby fusionnés des graphiques"""
+        expected = pd.merge(
+            self.df.groupby(['nom_pathologie', 'annee'], observed=True)['nbr_hospi'].sum().reset_index(),
+            self.df.groupby(['nom_pathologie', 'annee'], observed=True)['AVG_duree_hospi'].mean().reset_index(),
+            on=['nom_pathologie', 'annee']
+        ).merge(
+            self.df.groupby(['nom_pathologie', 'annee'], observed=True)['indice_comparatif_tt_age_percent'].mean().reset_index(),
+            on=['nom_pathologie', 'annee']
+        )
+        pd.testing.assert_frame_equal(pathology_year_facts(self.df), expected)
+
+    def test_top_pathologies(self):
+        """Teste la restriction aux pathologies les plus fréquentes"""
+        facts = pathology_year_facts(self.df)
+        totals = self.df.groupby('nom_pathologie', observed=True)['nbr_hospi'].sum()
+        top = top_pathologies(facts, 2)
+        self.assertEqual(set(top['nom_pathologie']), set(totals.nlargest(2).index))
+        self.assertEqual(len(top), 10)
+
+        # Classement calculé sur d'autres données (ex. données filtrées)
+        ranking = self.df[self.df['nom_pathologie'] == 'Grippe']
+        self.assertEqual(set(top_pathologies(facts, 1, ranking=ranking)['nom_pathologie']), {'Grippe'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+import numpy as np
+import pandas as pd
+from utils.prediction_table import PredictionTable, compact_predictions
+
+class TestPredictionTable(unittest.TestCase):
+    def setUp(self):
+        """Grille complète (année, pathologie, région) et prédictions connues"""
+        grid = pd.MultiIndex.from_product(
+            [[2023, 2024, 2025, 2026], ['Asthme', 'Grippe', 'Tuberculose'], ['Bretagne', 'Corse']],
+            names=['annee', 'nom_pathologie', 'nom_region']
+        ).to_frame(index=False)
+        self.grid = grid
+        self.predictions = np.arange(len(grid), dtype='float64') * 10.5
+        self.table = compact_predictions(grid, self.predictions)
+
+    def test_compact_format(self):
+        """Teste les types compacts de la table"""
+        self.assertEqual(len(self.table), 24)
+        self.assertIsInstance(self.table['nom_region'].dtype, pd.CategoricalDtype)
+        self.assertIsInstance(self.table['nom_pathologie'].dtype, pd.CategoricalDtype)
+        self.assertEqual(self.table['annee'].dtype, np.int16)
+        self.assertEqual(self.table['prediction'].dtype, np.float32)
+
+    def test_lookup_matches_predictions(self):
+        """Teste que chaque consultation renvoie la prédiction de sa combinaison"""
+        lookup = PredictionTable(self.table)
+        for row, prediction in zip(self.grid.itertuples(index=False), self.predictions):
+            value = lookup.lookup(row.nom_region, row.nom_pathologie, [row.annee])[0]
+            self.assertAlmostEqual(value, prediction, places=3)
+        values = lookup.lookup('Corse', 'Grippe', [2023, 2024, 2025])
+        self.assertEqual(len(values), 3)
+
+    def test_unknown_values(self):
+        """Teste les combinaisons absentes de la table"""
+        lookup = PredictionTable(self.table.iloc[1:])
+        first = self.grid.iloc[0]
+        self.assertTrue(np.isnan(lookup.lookup(first['nom_region'], first['nom_pathologie'], [2023])[0]))
+        with self.assertRaises(KeyError):
+            lookup.lookup('Normandie', 'Grippe', [2023])
+        with self.assertRaises(KeyError):
+            lookup.lookup('Corse', 'Grippe', [2030])
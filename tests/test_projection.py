@@ -0,0 +1,36 @@
+import unittest
+import numpy as np
+import pandas as pd
+from utils.projection import project, projection_benchmark
+
+class TestProjection(unittest.TestCase):
+    def setUp(self):
+        """Table dont les colonnes numériques sont regroupées dans un seul bloc"""
+        n = 100_000
+        self.df = pd.DataFrame(np.ones((n, 6)), columns=[f'c{i}' for i in range(6)]).copy()
+        self.df['nom_pathologie'] = pd.Categorical(np.where(np.arange(n) % 2, 'Asthme', 'Grippe'))
+        self.df.attrs['snapshot_version'] = 'v1'
+
+    def test_shares_buffers(self):
+        """Teste le partage des données et la conservation des attributs"""
+        view = project(self.df, ['c0', 'c3', 'nom_pathologie', 'c0'])
+        self.assertEqual(list(view.columns), ['c0', 'c3', 'nom_pathologie'])
+        self.assertTrue(np.shares_memory(view['c3'].to_numpy(), self.df['c3'].to_numpy()))
+        self.assertEqual(view.attrs['snapshot_version'], 'v1')
+
+    def test_copy_on_write(self):
+        """Teste qu'une écriture dans la projection ne modifie pas la table de base"""
+        view = project(self.df, ['c0', 'c3'])
+        view.loc[0, 'c0'] = 42.0
+        view['c3'] = view['c3'] * 2
+        self.assertEqual(self.df.loc[0, 'c0'], 1.0)
+        self.assertEqual(self.df['c3'].sum(), len(self.df))
+
+    def test_benchmark(self):
+        """Teste que les projections partagées n'allouent presque rien"""
+        report = projection_benchmark(self.df, {'a': ['c0', 'c2', 'c4'], 'b': ['c1', 'nom_pathologie']})
+        self.assertGreater(report.loc['TOTAL', 'Mo_copie'], 3)
+        self.assertLess(report.loc['TOTAL', 'Mo_partage'], 0.1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+import pandas as pd
+from utils.schema import apply_schema, memory_report, rename_value, MORBIDITE_SCHEMA, CAPACITE_SCHEMA
+
+class TestSchema(unittest.TestCase):
+    def setUp(self):
+        """Simule un résultat BigQuery (colonnes object et float64)"""
+        self.df = pd.DataFrame({
+            'niveau': ['Régions', 'Départements', 'Régions'],
+            'nom_pathologie': ['Tuberculose', 'Asthme', 'Tuberculose'],
+            'annee': pd.array([2018, 2019, 2022], dtype='Int64'),
+            'nbr_hospi': pd.array([10, 20, 30], dtype='Int64'),
+            'hospi_1J': pd.array([1, None, 3], dtype='Int64'),
+            'AVG_duree_hospi': [1.5, 2.5, 3.5],
+            'lit_hospi_complete': [100.0, 200.0, 300.0],
+            'taux_occupation': [0.5, 0.7, 0.9],
+            'year': ['2018-12-31', '2019-12-31', '2022-12-31']
+        })
+    
+    def test_declared_dtypes(self):
+        """Teste les types appliqués au chargement"""
+        df = apply_schema(self.df, CAPACITE_SCHEMA)
+        self.assertIsInstance(df['niveau'].dtype, pd.CategoricalDtype)
+        self.assertEqual(df['annee'].dtype, np.int16)
+        self.assertEqual(df['nbr_hospi'].dtype, np.int32)
+        self.assertEqual(df['lit_hospi_complete'].dtype, np.int32)
+        self.assertEqual(df['AVG_duree_hospi'].dtype, np.float32)
+        self.assertEqual(df['year'].iloc[0], '2018-12-31')
+    
+    def test_nullable_counts_fall_back_to_float(self):
+        """Teste qu'une colonne entière avec valeurs manquantes passe en float32"""
+        df = apply_schema(self.df, MORBIDITE_SCHEMA)
+        self.assertEqual(df['hospi_1J'].dtype, np.float32)
+        self.assertTrue(np.isnan(df['hospi_1J'].iloc[1]))
+    
+    def test_memory_report(self):
+        """Teste le rapport d'empreinte mémoire avant/après"""
+        before = pd.DataFrame({'dtype': ['object'], 'octets': [1000]}, index=['sexe'])
+        after = pd.DataFrame({'dtype': ['category'], 'octets': [250]}, index=['sexe'])
+        report = memory_report(before, after)
+        self.assertAlmostEqual(report.loc['TOTAL', 'gain_percent'], 75.0)
+
+    def test_rename_value_in_categorical(self):
+        """Teste la correction d'un nom dans une colonne catégorielle"""
+        names = pd.Series(['Ile de France', 'Corse', 'Ile de France'], dtype='category')
+        renamed = rename_value(names, 'Ile de France', 'Île-de-France')
+        self.assertIsInstance(renamed.dtype, pd.CategoricalDtype)
+        self.assertEqual(renamed.tolist(), ['Île-de-France', 'Corse', 'Île-de-France'])
+
+        # La valeur corrigée existe déjà : les deux catégories sont fusionnées
+        mixed = pd.Series(['Ile de France', 'Île-de-France', 'Corse'], dtype='category')
+        merged = rename_value(mixed, 'Ile de France', 'Île-de-France')
+        self.assertEqual(merged.tolist(), ['Île-de-France', 'Île-de-France', 'Corse'])
+        self.assertNotIn('Ile de France', merged.cat.categories)
+
+        # Valeur absente ou colonne texte
+        self.assertIs(rename_value(names, 'Bretagne', 'Normandie'), names)
+        self.assertEqual(rename_value(pd.Series(['Ile de France']), 'Ile de France', 'Île-de-France').tolist(), ['Île-de-France'])
+
+if __name__ == '__main__':
+    unittest.main()
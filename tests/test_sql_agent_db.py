@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+import duckdb
+from utils.sql_agent_db import AGENT_TABLES, DuckDBSQLDatabase, create_duckdb_database
+from utils.sql_cache import QueryResultCache
+
+# Table de morbidité réduite : (année, région, sexe, hospitalisations)
+ROWS = [
+    ('2018-12-31', 'Bretagne', 'Ensemble', 100),
+    ('2019-12-31', 'Bretagne', 'Ensemble', 120),
+    ('2019-12-31', 'Bretagne', 'Homme', 70),
+    ('2019-12-31', 'Corse', 'Ensemble', 30),
+    ('2019-12-31', 'Corse', 'Ensemble', 5),
+]
+
+class TestDuckDBSQLDatabase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Instantané Parquet des tables de l'agent dans un répertoire temporaire"""
+        cls.tmp = tempfile.TemporaryDirectory()
+        values = ', '.join(f"(DATE '{year}', '{region}', '{sexe}', {nbr})" for year, region, sexe, nbr in ROWS)
+        connection = duckdb.connect()
+        for name in AGENT_TABLES:
+            path = os.path.join(cls.tmp.name, f"{name}.parquet")
+            connection.execute(
+                f"COPY (SELECT * FROM (VALUES {values}) AS t(year, nom_region, sexe, nbr_hospi)) "
+                f"TO '{path}' (FORMAT parquet)"
+            )
+        connection.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_translated_query_and_cache(self):
+        """Teste une requête BigQuery traduite sur l'instantané, puis servie par le cache"""
+        cache = QueryResultCache()
+        db = create_duckdb_database(self.tmp.name, result_cache=cache)
+        self.assertIsInstance(db, DuckDBSQLDatabase)
+        self.assertEqual(sorted(db.get_usable_table_names()), sorted(AGENT_TABLES))
+
+        sql = (
+            "SELECT nom_region, CAST(SUM(nbr_hospi) AS INT64) AS total "
+            "FROM `projet-jbn-data-le-wagon.dataset.class_join_total_morbidite_sexe_population` "
+            "WHERE EXTRACT(YEAR FROM year) = 2019 AND sexe = \"Ensemble\" "
+            "GROUP BY nom_region ORDER BY nom_region"
+        )
+        first = db.run(sql)
+        self.assertEqual(first, str([('Bretagne', 120), ('Corse', 35)]))
+        self.assertEqual((cache.stats()['hits'], cache.stats()['misses']), (0, 1))
+
+        # Même requête aux espaces près : servie par le cache
+        self.assertEqual(db.run(sql.replace(' FROM ', '\n  FROM ')), first)
+        self.assertEqual((cache.stats()['hits'], cache.stats()['misses']), (1, 1))
+
+if __name__ == '__main__':
+    unittest.main()
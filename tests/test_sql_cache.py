@@ -0,0 +1,47 @@
+import unittest
+from unittest import mock
+from utils.sql_cache import QueryResultCache, normalize_sql, is_read_query
+
+class TestSqlCache(unittest.TestCase):
+    def test_normalize_sql(self):
+        """Teste la normalisation des requêtes (casse, espaces, commentaires)"""
+        a = "SELECT nom_region, SUM(nbr_hospi)\n  FROM t -- total\nWHERE nom_region = 'Corse' ;"
+        b = "select nom_region,sum( nbr_hospi ) from t where nom_region='Corse'"
+        self.assertEqual(normalize_sql(a), normalize_sql(b))
+        self.assertNotEqual(normalize_sql(b), normalize_sql(b.replace("'Corse'", "'corse'")))
+        self.assertTrue(is_read_query("  WITH x AS (SELECT 1) SELECT * FROM x"))
+        self.assertFalse(is_read_query("DELETE FROM t"))
+
+    def test_hits_and_size_eviction(self):
+        """Teste les statistiques et l'éviction LRU"""
+        cache = QueryResultCache(max_entries=2)
+        cache.set('a', '1')
+        cache.set('b', '2')
+        self.assertEqual(cache.get('a'), '1')
+        cache.set('c', '3')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), '3')
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (2, 1, 1))
+        self.assertAlmostEqual(cache.hit_rate, 2 / 3)
+
+        small = QueryResultCache(max_bytes=10)
+        small.set('a', 'x' * 6)
+        small.set('b', 'y' * 6)
+        self.assertIsNone(small.get('a'))
+        small.set('c', 'z' * 20)
+        self.assertIsNone(small.get('c'))
+
+    def test_ttl(self):
+        """Teste l'expiration des entrées"""
+        cache = QueryResultCache(ttl=10)
+        with mock.patch('utils.sql_cache.time.monotonic', return_value=100.0):
+            cache.set('a', '1')
+        with mock.patch('utils.sql_cache.time.monotonic', return_value=105.0):
+            self.assertEqual(cache.get('a'), '1')
+        with mock.patch('utils.sql_cache.time.monotonic', return_value=111.0):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from utils.sql_dialect import bigquery_to_duckdb
+
+class TestSqlDialect(unittest.TestCase):
+    def test_identifiers_and_literals(self):
+        """Teste la traduction des backticks et des guillemets doubles"""
+        sql = 'SELECT `nom_region` FROM `projet.dataset.class_join_total_morbidite_capacite_kpi` WHERE sexe = "Ensemble"'
+        self.assertEqual(
+            bigquery_to_duckdb(sql),
+            """SELECT "nom_region" FROM "class_join_total_morbidite_capacite_kpi" WHERE sexe = 'Ensemble'"""
+        )
+
+    def test_functions_and_types(self):
+        """Teste la traduction des fonctions et des types BigQuery"""
+        sql = "SELECT SAFE_DIVIDE(a, b), safe_cast(c AS FLOAT64), COUNTIF(d > 0) FROM t WHERE DATE(year) > DATE '2019-01-01'"
+        self.assertEqual(
+            bigquery_to_duckdb(sql),
+            "SELECT bq_safe_divide(a, b), TRY_CAST(c AS DOUBLE), count_if(d > 0) FROM t WHERE bq_date(year) > DATE '2019-01-01'"
+        )
+
+    def test_cast_types_only(self):
+        """Teste que seuls les types des CAST sont traduits, pas les alias"""
+        sql = "SELECT CAST('2019' AS INT64) AS string, SAFE_CAST(ROUND(x) AS STRING) AS bool FROM t"
+        self.assertEqual(
+            bigquery_to_duckdb(sql),
+            "SELECT CAST('2019' AS BIGINT) AS string, TRY_CAST(ROUND(x) AS VARCHAR) AS bool FROM t"
+        )
+
+    def test_date_from_parts(self):
+        """Teste DATE(année, mois, jour), traduit en make_date"""
+        sql = "SELECT DATE(annee, 1, 1), DATE(CAST(d AS STRING)) FROM t"
+        self.assertEqual(
+            bigquery_to_duckdb(sql),
+            "SELECT make_date(annee, 1, 1), bq_date(CAST(d AS VARCHAR)) FROM t"
+        )
+
+    def test_string_literals_untouched(self):
+        """Teste que le contenu des chaînes n'est pas traduit"""
+        sql = "SELECT * FROM t WHERE nom = 'DATE(`x`) AS INT64'"
+        self.assertEqual(bigquery_to_duckdb(sql), sql)
+
+if __name__ == '__main__':
+    unittest.main()
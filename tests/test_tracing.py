@@ -0,0 +1,48 @@
+import json
+import os
+import tempfile
+import unittest
+from utils.tracing import Tracer, current_tracer, annotate_current_span
+
+class TestTracing(unittest.TestCase):
+    def test_nested_spans(self):
+        """Teste l'imbrication des spans et les attributs du span courant"""
+        tracer = Tracer(log_path=None)
+        token = current_tracer.set(tracer)
+        try:
+            with tracer.span("question", 'question') as root:
+                tracer.start_span("outil", 'tool', key='run-1')
+                with tracer.span("requête SQL", 'sql'):
+                    annotate_current_span(rows=3, bytes_scanned=None)
+                tracer.end_span('run-1')
+        finally:
+            current_tracer.reset(token)
+
+        spans = {span['name']: span for span in tracer.spans}
+        self.assertEqual(spans['outil']['parent_id'], root['span_id'])
+        self.assertEqual(spans['requête SQL']['parent_id'], spans['outil']['span_id'])
+        self.assertEqual(spans['requête SQL']['attributes'], {'rows': 3})
+        self.assertTrue(all(span['duration_ms'] >= 0 for span in tracer.spans))
+
+        summary = tracer.summary()
+        self.assertEqual(summary.loc['sql', 'spans'], 1)
+        self.assertIn('rows', tracer.to_dataframe().columns)
+
+    def test_error_and_jsonl_log(self):
+        """Teste le statut d'erreur et l'écriture du journal"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'traces', 'agent.jsonl')
+            tracer = Tracer('test', log_path=path)
+            with self.assertRaises(ValueError):
+                with tracer.span("requête SQL", 'sql'):
+                    raise ValueError("table inconnue")
+            tracer.flush()
+            with open(path, encoding='utf-8') as log:
+                lines = [json.loads(line) for line in log]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]['status'], 'error')
+        self.assertEqual(lines[0]['trace'], 'test')
+        self.assertEqual(lines[0]['attributes']['error'], "table inconnue")
+
+if __name__ == '__main__':
+    unittest.main()
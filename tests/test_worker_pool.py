@@ -0,0 +1,54 @@
+import threading
+import time
+import unittest
+from utils.worker_pool import SessionWorkerPool, PoolBusyError
+
+class TestWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = SessionWorkerPool(max_workers=2, max_pending=3, max_pending_per_session=2)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_sessions_run_in_parallel(self):
+        """Teste l'exécution simultanée de deux sessions"""
+        barrier = threading.Barrier(2, timeout=2)
+        futures = [self.pool.submit(session, barrier.wait) for session in ('a', 'b')]
+        for future in futures:
+            future.result(timeout=2)
+
+    def test_session_requests_are_sequential(self):
+        """Teste l'ordre des requêtes d'une même session"""
+        order = []
+        release = threading.Event()
+        first = self.pool.submit('a', lambda: (release.wait(2), order.append(1)))
+        second = self.pool.submit('a', order.append, 2)
+        time.sleep(0.05)
+        self.assertEqual(self.pool.stats()['waiting'], 1)
+        release.set()
+        first.result(timeout=2)
+        second.result(timeout=2)
+        self.assertEqual(order, [1, 2])
+
+    def test_backpressure(self):
+        """Teste le refus des requêtes au-delà des limites"""
+        release = threading.Event()
+        self.pool.submit('a', release.wait, 2)
+        self.pool.submit('a', lambda: None)
+        with self.assertRaises(PoolBusyError):
+            self.pool.submit('a', lambda: None)
+        self.pool.submit('b', release.wait, 2)
+        with self.assertRaises(PoolBusyError):
+            self.pool.submit('c', lambda: None)
+        self.assertEqual(self.pool.stats()['rejected'], 2)
+        release.set()
+
+    def test_errors_are_propagated(self):
+        """Teste la remontée des erreurs et la libération de la place"""
+        future = self.pool.submit('a', int, 'x')
+        with self.assertRaises(ValueError):
+            future.result(timeout=2)
+        self.assertEqual(self.pool.submit('a', int, '3').result(timeout=2), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,216 @@
+import hashlib
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.chat_context import tokenize
+
+# Mots sans incidence sur le sens de la question ; « plus », « moins » et les
+# négations sont conservés car ils changent la réponse attendue
+QUESTION_STOPWORDS = {
+    'le', 'la', 'les', 'l', 'un', 'une', 'des', 'de', 'du', 'd', 'au', 'aux',
+    'a', 'ont', 'est', 'sont', 'y', 'il', 't', 'quel', 'quelle', 'quels',
+    'quelles', 'qu', 'que', 'ce', 'cette', 'ces', 'me', 'moi', 'svp', 'en', 'avec'
+}
+
+# Nombre minimal de termes pour qu'une question soit autonome (hors relances du type « 2 » ou « et en 2020 ? »)
+MIN_QUESTION_TERMS = 3
+
+# Dimension des vecteurs de questions (hachage des mots et trigrammes de caractères)
+VECTOR_DIM = 4096
+
+
+def normalize_question(question: str) -> str:
+    """
+    Forme canonique d'une question : minuscules, sans accents, ponctuation
+    ni mots vides, termes triés
+    """
+    return ' '.join(sorted(set(tokenize(question, QUESTION_STOPWORDS))))
+
+
+def is_cacheable(question: str) -> bool:
+    return len(normalize_question(question).split()) >= MIN_QUESTION_TERMS
+
+
+def history_digest(messages: Iterable[Dict[str, str]]) -> str:
+    """
+    Empreinte des échanges précédant une question, à inclure dans la version
+    des clés du cache : une relance ne reçoit jamais la réponse donnée dans
+    une autre conversation. Vide pour une première question.
+    """
+    digest = hashlib.sha1()
+    empty = True
+    for message in messages:
+        empty = False
+        digest.update(f"{message['role']}\x00{message['content']}\x01".encode('utf-8'))
+    return '' if empty else digest.hexdigest()[:16]
+
+
+def _trigrams(term: str) -> List[str]:
+    padded = f"#{term}#"
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def _vectorize(normalized: str) -> np.ndarray:
+    vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+    for term in normalized.split():
+        vector[zlib.crc32(term.encode('utf-8')) % VECTOR_DIM] += 1.0
+        for trigram in _trigrams(term):
+            vector[zlib.crc32(trigram.encode('utf-8')) % VECTOR_DIM] += 0.5
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _term_similarity(a: str, b: str) -> float:
+    trigrams_a, trigrams_b = set(_trigrams(a)), set(_trigrams(b))
+    return len(trigrams_a & trigrams_b) / len(trigrams_a | trigrams_b)
+
+
+def _is_variant(a: str, b: str, min_term_similarity: float) -> bool:
+    """
+    Deux questions sont des variantes si chaque terme propre à l'une a un terme
+    proche (faute de frappe, flexion) dans l'autre : « Corse » et « Bretagne »
+    ne sont pas interchangeables, pas plus que deux années différentes.
+    """
+    terms_a, terms_b = set(a.split()), set(b.split())
+    for own, other in ((terms_a - terms_b, terms_b), (terms_b - terms_a, terms_a)):
+        for term in own:
+            if term.isdigit() or not any(
+                _term_similarity(term, candidate) >= min_term_similarity for candidate in other
+            ):
+                return False
+    return True
+
+
+class SemanticAnswerCache:
+    """
+    Cache des réponses du chat, indexé par question normalisée et version des données.
+
+    Une question identique après normalisation est servie directement ; sinon
+    la question stockée la plus proche (cosinus sur un index vectoriel local)
+    est réutilisée si elle n'en diffère que par des variantes de termes. Les
+    entrées les moins récemment utilisées sont évincées au-delà de
+    `max_entries`, et expirent après `ttl` secondes.
+
+    Les vecteurs occupent une matrice préallouée de `max_entries` lignes :
+    une entrée ajoutée ou évincée réutilise une ligne libre, sans recopier
+    l'index.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float = 24 * 3600,
+        similarity_threshold: float = 0.7,
+        min_term_similarity: float = 0.5
+    ):
+        """
+        Initialise le cache
+
+        Args:
+            max_entries: Nombre maximum de réponses conservées
+            ttl: Durée de vie d'une réponse en secondes
+            similarity_threshold: Cosinus minimal entre deux questions proches
+            min_term_similarity: Similarité minimale (trigrammes) entre deux termes variantes
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.min_term_similarity = min_term_similarity
+        self._entries: 'OrderedDict[Tuple[str, str], tuple]' = OrderedDict()
+        # Ligne de la matrice des vecteurs occupée par chaque entrée (None : ligne libre)
+        self._keys: List[Optional[Tuple[str, str]]] = [None] * max_entries
+        self._slots: Dict[Tuple[str, str], int] = {}
+        self._free: List[int] = list(range(max_entries - 1, -1, -1))
+        self._vectors = np.zeros((max_entries, VECTOR_DIM), dtype=np.float32)
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    def get(self, question: str, version: str) -> Optional[str]:
+        """
+        Retourne la réponse en cache pour la question, ou None
+        """
+        normalized = normalize_question(question)
+        with self._lock:
+            self._expire()
+            key = (version, normalized)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return self._entries[key][0]
+
+            match = self._nearest(normalized, version)
+            if match is not None:
+                self._entries.move_to_end(match)
+                self.near_hits += 1
+                return self._entries[match][0]
+
+            self.misses += 1
+            return None
+
+    def set(self, question: str, version: str, answer: str):
+        normalized = normalize_question(question)
+        if not normalized or not answer:
+            return
+        key = (version, normalized)
+        with self._lock:
+            if key not in self._entries:
+                # Cache plein : l'entrée la moins récemment utilisée libère sa ligne
+                while not self._free:
+                    self._remove(next(iter(self._entries)))
+                slot = self._free.pop()
+                self._keys[slot] = key
+                self._slots[key] = slot
+                self._vectors[slot] = _vectorize(normalized)
+            self._entries[key] = (answer, time.monotonic())
+            self._entries.move_to_end(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys = [None] * self.max_entries
+            self._slots = {}
+            self._free = list(range(self.max_entries - 1, -1, -1))
+            self._vectors[:] = 0.0
+
+    def _nearest(self, normalized: str, version: str) -> Optional[Tuple[str, str]]:
+        if not self._entries or not normalized:
+            return None
+        # Les lignes libres sont nulles : leur score (0) reste sous le seuil
+        scores = self._vectors @ _vectorize(normalized)
+        for i in np.argsort(-scores):
+            if scores[i] < self.similarity_threshold:
+                break
+            key = self._keys[i]
+            if key is not None and key[0] == version and _is_variant(normalized, key[1], self.min_term_similarity):
+                return key
+        return None
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [key for key, (_, created) in self._entries.items() if now - created > self.ttl]
+        for key in expired:
+            self._remove(key)
+
+    def _remove(self, key: Tuple[str, str]):
+        del self._entries[key]
+        slot = self._slots.pop(key)
+        self._keys[slot] = None
+        self._vectors[slot] = 0.0
+        self._free.append(slot)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.exact_hits + self.near_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'exact_hits': self.exact_hits,
+            'near_hits': self.near_hits,
+            'misses': self.misses,
+            'hit_rate': (self.exact_hits + self.near_hits) / total if total else 0.0
+        }
@@ -0,0 +1,84 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Callback de progression : (étape, table, informations)
+StageCallback = Callable[[str, str, Dict[str, Any]], None]
+
+
+def _execute(job: Any) -> int:
+    # Attente de la fin du job ; renvoie le nombre de lignes du résultat
+    return job.result().total_rows
+
+
+def _download(job: Any) -> pd.DataFrame:
+    # Téléchargement du résultat via l'API Storage Read (Arrow)
+    return job.to_dataframe(create_bqstorage_client=True)
+
+
+def load_tables(
+    client: Any,
+    queries: Dict[str, str],
+    on_stage: Optional[StageCallback] = None
+) -> Tuple[Dict[str, pd.DataFrame], pd.DataFrame]:
+    """
+    Exécute plusieurs requêtes BigQuery en parallèle
+
+    Tous les jobs sont soumis avant d'attendre le moindre résultat, puis les
+    résultats sont téléchargés simultanément (un thread par table) : la durée
+    de chargement est celle de la requête la plus longue et non leur somme.
+
+    `on_stage` est appelé depuis le thread appelant (il peut donc mettre à jour
+    l'interface Streamlit) aux étapes 'submitted', 'executed' (avec
+    `total_rows`) et 'downloaded' (avec `rows`) de chaque table.
+
+    Args:
+        client: Client BigQuery
+        queries: Dictionnaire {nom de la table: requête SQL}
+        on_stage: Callback de progression
+
+    Returns:
+        Tuple (DataFrames par nom, durées par table : requête, téléchargement,
+        total, lignes et octets traités)
+    """
+    notify = on_stage or (lambda stage, name, info: None)
+    start = time.perf_counter()
+    jobs, timings = {}, {}
+    for name, query in queries.items():
+        jobs[name] = client.query(query)
+        timings[name] = {'submitted_at': time.perf_counter()}
+        notify('submitted', name, {})
+
+    frames = {}
+    with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix='bigquery') as executor:
+        pending = {executor.submit(_execute, job): ('executed', name) for name, job in jobs.items()}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, name = pending.pop(future)
+                now = time.perf_counter()
+                timing = timings[name]
+                if stage == 'executed':
+                    timing['query_s'] = now - timing['submitted_at']
+                    timing['executed_at'] = now
+                    notify('executed', name, {'total_rows': future.result()})
+                    pending[executor.submit(_download, jobs[name])] = ('downloaded', name)
+                else:
+                    frames[name] = future.result()
+                    timing['download_s'] = now - timing['executed_at']
+                    timing['total_s'] = now - timing['submitted_at']
+                    timing['rows'] = len(frames[name])
+                    timing['bytes_processed'] = jobs[name].total_bytes_processed
+                    notify('downloaded', name, {'rows': len(frames[name])})
+
+    timings = pd.DataFrame(timings).T.drop(columns=['submitted_at', 'executed_at'])
+    logger.info(
+        "%d tables chargées en %.2f s (somme des durées : %.2f s)\n%s",
+        len(frames), time.perf_counter() - start, timings['total_s'].sum(), timings.to_string()
+    )
+    return {name: frames[name] for name in queries}, timings
@@ -0,0 +1,324 @@
+import re
+import unicodedata
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Set
+
+# Libellés des services médicaux utilisés dans le contexte du chat
+SERVICES = {
+    'M': 'Médecine',
+    'C': 'Chirurgie',
+    'SSR': 'Soins de suite et réadaptation',
+    'O': 'Obstétrique',
+    'PSY': 'Psychiatrie',
+    'ESND': 'Établissement de soin longue durée'
+}
+
+
+def _to_python(value):
+    """Convertit les scalaires numpy en types Python (représentation compacte dans le prompt)"""
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _top_by_year(df: pd.DataFrame, years: pd.Series, column: str, n: int) -> Dict[int, Dict[str, float]]:
+    """
+    Top n des modalités de `column` par année, en un seul groupby
+    """
+    totals = df.groupby([years, column], observed=True)['nbr_hospi'].sum()
+    top = totals.sort_values(ascending=False).groupby(level=0, sort=False).head(n)
+    result = {}
+    for (year, key), value in top.items():
+        result.setdefault(year, {})[key] = _to_python(value)
+    return result
+
+
+def summarize_by_year(
+    df_nbr_hospi: pd.DataFrame,
+    df_duree_hospi: pd.DataFrame,
+    df_complet: pd.DataFrame
+) -> Dict[int, Dict]:
+    """
+    Calcule le résumé annuel utilisé comme contexte du chat
+
+    Chaque indicateur est obtenu par un groupby sur l'année (croisée avec la
+    région, le service ou la pathologie) au lieu de refiltrer les DataFrames
+    pour chaque année.
+
+    Returns:
+        Dictionnaire {année: {total_hospi, prog_24h, autres_24h, avg_duration,
+        top_regions, services, top_pathologies}}
+    """
+    hospi_years = df_nbr_hospi['year'].dt.year.rename('annee_contexte')
+    duree_years = df_duree_hospi['year'].dt.year.rename('annee_contexte')
+    complet_years = df_complet['year'].dt.year.rename('annee_contexte')
+
+    totals = df_nbr_hospi.groupby(hospi_years)[['nbr_hospi', 'hospi_prog_24h', 'hospi_autres_24h']].sum()
+    durations = df_duree_hospi.groupby(duree_years)['AVG_duree_hospi'].mean()
+    top_regions = _top_by_year(df_nbr_hospi, hospi_years, 'nom_region', 5)
+    top_pathologies = _top_by_year(df_nbr_hospi, hospi_years, 'nom_pathologie', 10)
+
+    services = df_complet[df_complet['classification'].isin(list(SERVICES))]
+    services_totals = services.groupby(
+        [complet_years[services.index], 'classification'], observed=True
+    )['nbr_hospi'].sum()
+
+    data_by_year = {}
+    for year in sorted(totals.index):
+        services_data = {}
+        if year in services_totals.index.get_level_values(0):
+            year_services = services_totals.loc[year]
+            for code, nom in SERVICES.items():
+                if code in year_services.index:
+                    services_data[nom] = _to_python(year_services[code])
+
+        data_by_year[_to_python(year)] = {
+            'total_hospi': _to_python(totals.loc[year, 'nbr_hospi']),
+            'prog_24h': _to_python(totals.loc[year, 'hospi_prog_24h']),
+            'autres_24h': _to_python(totals.loc[year, 'hospi_autres_24h']),
+            'avg_duration': _to_python(durations.get(year)),
+            'top_regions': top_regions.get(year, {}),
+            'services': services_data,
+            'top_pathologies': top_pathologies.get(year, {})
+        }
+
+    return data_by_year
+
+
+# --- Sélection du contexte par recherche (TF-IDF) ---
+
+STOPWORDS = {
+    'le', 'la', 'les', 'un', 'une', 'des', 'de', 'du', 'd', 'l', 'et', 'ou', 'en',
+    'a', 'au', 'aux', 'est', 'sont', 'quel', 'quelle', 'quels', 'quelles', 'qui',
+    'que', 'quoi', 'y', 'il', 'elle', 'on', 'pour', 'par', 'sur', 'dans', 'avec',
+    'plus', 'moins', 'ce', 'cette', 'ces', 'se', 'sa', 'son', 'ses', 'je', 'vous',
+    'nous', 't', 'the'
+}
+
+# Approximation du nombre de tokens (environ 4 caractères par token)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def tokenize(text: str, stopwords: Set[str] = STOPWORDS) -> List[str]:
+    """
+    Découpe un texte en termes normalisés (minuscules, sans accents, sans pluriel simple)
+    """
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    terms = []
+    for term in re.findall(r'\w+', text):
+        if term in stopwords:
+            continue
+        if len(term) > 3 and term.endswith('s'):
+            term = term[:-1]
+        terms.append(term)
+    return terms
+
+
+def _format_number(value) -> str:
+    return f"{value:,.0f}".replace(',', ' ')
+
+
+def build_fact_snippets(
+    df_nbr_hospi: pd.DataFrame,
+    df_duree_hospi: pd.DataFrame,
+    data_by_year: Dict[int, Dict]
+) -> List[str]:
+    """
+    Construit les faits unitaires indexés pour le chat
+
+    Un fait par année (vue nationale, services, classements), puis un fait par
+    couple année × région/département et année × pathologie.
+    """
+    snippets = []
+    for year, data in data_by_year.items():
+        snippets.append(
+            f"Année {year} — France entière : {_format_number(data['total_hospi'])} hospitalisations "
+            f"(programmées : {_format_number(data['prog_24h'])}, "
+            f"non programmées : {_format_number(data['autres_24h'])}), "
+            f"durée moyenne de séjour {data['avg_duration']:.1f} jours."
+        )
+        if data['services']:
+            services = ', '.join(f"{nom} {_format_number(value)}" for nom, value in data['services'].items())
+            snippets.append(f"Année {year} — hospitalisations par service médical : {services}.")
+        regions = ', '.join(f"{nom} {_format_number(value)}" for nom, value in data['top_regions'].items())
+        snippets.append(f"Année {year} — top 5 des régions avec le plus d'hospitalisations : {regions}.")
+        pathologies = ', '.join(f"{nom} {_format_number(value)}" for nom, value in data['top_pathologies'].items())
+        snippets.append(f"Année {year} — top 10 des pathologies les plus fréquentes : {pathologies}.")
+
+    hospi_years = df_nbr_hospi['year'].dt.year.rename('annee_contexte')
+    duree_years = df_duree_hospi['year'].dt.year.rename('annee_contexte')
+    for column, label in [('nom_region', ''), ('nom_pathologie', 'pathologie ')]:
+        totals = df_nbr_hospi.groupby([hospi_years, column], observed=True)['nbr_hospi'].sum()
+        durations = df_duree_hospi.groupby([duree_years, column], observed=True)['AVG_duree_hospi'].mean()
+        facts = pd.concat([totals, durations], axis=1)
+        for (year, key), (total, duration) in facts.iterrows():
+            if pd.isna(total):
+                continue
+            text = f"Année {year} — {label}{key} : {_format_number(total)} hospitalisations"
+            if not pd.isna(duration):
+                text += f", durée moyenne de séjour {duration:.1f} jours"
+            snippets.append(text + ".")
+
+    return snippets
+
+
+class FactIndex:
+    """
+    Index TF-IDF en mémoire des faits du contexte.
+
+    Construit une fois par jeu de données, il permet de n'envoyer au LLM que
+    les faits pertinents pour la question au lieu de l'ensemble des années.
+    """
+
+    def __init__(self, snippets: List[str]):
+        """
+        Indexe les faits
+
+        Args:
+            snippets: Liste des faits (une phrase chacun)
+        """
+        self.snippets = list(snippets)
+        postings: Dict[str, Dict[int, int]] = {}
+        for doc_id, snippet in enumerate(self.snippets):
+            for term in tokenize(snippet):
+                postings.setdefault(term, {})
+                postings[term][doc_id] = postings[term].get(doc_id, 0) + 1
+
+        n_docs = max(len(self.snippets), 1)
+        self.idf = {term: np.log((1 + n_docs) / (1 + len(docs))) + 1 for term, docs in postings.items()}
+
+        # Poids TF-IDF normalisés par document (norme L2)
+        norms = np.zeros(n_docs)
+        for term, docs in postings.items():
+            for doc_id, count in docs.items():
+                norms[doc_id] += (count * self.idf[term]) ** 2
+        norms = np.sqrt(np.where(norms > 0, norms, 1))
+
+        self.postings = {
+            term: (
+                np.fromiter(docs.keys(), dtype=np.int32, count=len(docs)),
+                np.fromiter(docs.values(), dtype=np.float32, count=len(docs))
+                * self.idf[term] / norms[list(docs.keys())]
+            )
+            for term, docs in postings.items()
+        }
+
+    def search(self, question: str, top_k: int = 8) -> List[str]:
+        """
+        Retourne les faits les plus proches de la question (similarité cosinus)
+
+        Args:
+            question: Question de l'utilisateur
+            top_k: Nombre maximum de faits
+
+        Returns:
+            Faits triés par pertinence ; liste vide si aucun terme ne correspond
+        """
+        scores = np.zeros(len(self.snippets), dtype=np.float32)
+        for term in set(tokenize(question)):
+            if term in self.postings:
+                doc_ids, weights = self.postings[term]
+                np.add.at(scores, doc_ids, weights * self.idf[term])
+
+        candidates = np.flatnonzero(scores)
+        if candidates.size == 0:
+            return []
+        best = candidates[np.argsort(-scores[candidates], kind='stable')[:top_k]]
+        return [self.snippets[i] for i in best]
+
+
+def select_context(
+    index: FactIndex,
+    question: str,
+    data_by_year: Dict[int, Dict],
+    token_budget: int = 1200,
+    top_k: int = 12
+) -> str:
+    """
+    Rend le contexte limité aux faits pertinents pour la question
+
+    Sans correspondance, la vue nationale de chaque année est utilisée.
+    Les faits sont ajoutés par ordre de pertinence jusqu'à épuisement du budget.
+    """
+    years = list(data_by_year)
+    header = [
+        "📊 Données hospitalières disponibles :",
+        f"- Période couverte: de {min(years)} à {max(years)}",
+        "- Seuls les faits pertinents pour la question sont fournis ci-dessous.",
+        "\nFaits sélectionnés:"
+    ]
+    facts = index.search(question, top_k=top_k)
+    if not facts:
+        facts = [snippet for snippet in index.snippets if 'France entière' in snippet]
+
+    budget = token_budget - estimate_tokens("\n".join(header))
+    selected = []
+    for fact in facts:
+        cost = estimate_tokens(fact) + 1
+        if cost > budget:
+            break
+        selected.append(f"- {fact}")
+        budget -= cost
+    return "\n".join(header + selected)
+
+
+# --- Historique de conversation glissant ---
+
+def _condense(message: Dict[str, str], max_words: int = 25) -> str:
+    words = message['content'].split()
+    text = ' '.join(words[:max_words]) + (' …' if len(words) > max_words else '')
+    role = "Assistant" if message['role'] == 'assistant' else "Patient"
+    return f"- {role} : {text}"
+
+
+def build_history(messages: List[Dict[str, str]], token_budget: int = 600) -> str:
+    """
+    Construit l'historique envoyé au LLM dans un budget de tokens
+
+    Les échanges les plus récents sont repris tels quels ; les plus anciens
+    sont condensés en un résumé (début de chaque message), lui-même tronqué
+    aux échanges les plus récents s'il dépasse le budget restant.
+
+    Args:
+        messages: Messages de la session ({'role', 'content'})
+        token_budget: Nombre maximum de tokens estimés pour l'historique
+
+    Returns:
+        Texte de l'historique
+    """
+    summary_title = "Résumé des échanges précédents :"
+    recent = []
+    budget = token_budget - estimate_tokens(summary_title) - 1
+    split = len(messages)
+    for message in reversed(messages):
+        role = "Assistant" if message['role'] == 'assistant' else "Patient"
+        line = f"{role}: {message['content']}"
+        cost = estimate_tokens(line) + 1
+        # Garde au moins une part du budget pour le résumé des échanges anciens
+        if cost > budget - token_budget // 4 and recent:
+            break
+        if cost > budget:
+            break
+        recent.append(line)
+        budget -= cost
+        split -= 1
+
+    summary = []
+    for message in reversed(messages[:split]):
+        line = _condense(message)
+        cost = estimate_tokens(line) + 1
+        if cost > budget:
+            break
+        summary.append(line)
+        budget -= cost
+
+    parts = []
+    if summary:
+        parts.append(summary_title + "\n" + "\n".join(reversed(summary)))
+    if recent:
+        parts.append("\n".join(reversed(recent)))
+    return "\n".join(parts)
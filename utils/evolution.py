@@ -0,0 +1,56 @@
+from typing import Dict, Optional, Sequence
+
+import pandas as pd
+
+
+def evolution_table(
+    df: pd.DataFrame,
+    by: Sequence[str] = ('nom_pathologie',),
+    value: str = 'nbr_hospi',
+    year_col: str = 'annee',
+    labels: Optional[Dict[str, str]] = None
+) -> pd.DataFrame:
+    """
+    Construit le tableau « Évolution des pathologies » en un seul pivot
+
+    Un unique `pivot_table` (lignes : `by`, colonnes : années) fournit les
+    totaux annuels ; les évolutions d'une année sur l'autre et l'évolution
+    globale (première → dernière année) sont ensuite des opérations
+    vectorisées entre colonnes.
+
+    Args:
+        df: Données filtrées
+        by: Colonnes identifiant une ligne du tableau (ex. pathologie, ou sexe et pathologie)
+        value: Colonne sommée
+        year_col: Colonne de l'année
+        labels: Renommage des colonnes `by` et `value` pour l'affichage
+
+    Returns:
+        DataFrame prêt à afficher : colonnes `by`, total, « Évol. AAAA-AAAA (%) »
+        par paire d'années consécutives et « Évol. globale (%) », trié par
+        évolution globale décroissante
+    """
+    by = list(by)
+    pivot = df.pivot_table(
+        index=by, columns=year_col, values=value, aggfunc='sum', observed=True
+    ).astype('float64')
+    years = sorted(pivot.columns)
+    pivot = pivot[years]
+
+    summary = pd.DataFrame({value: pivot.sum(axis=1)}, index=pivot.index)
+    if years:
+        previous, following = pivot[years[:-1]].to_numpy(), pivot[years[1:]].to_numpy()
+        evolutions = (following - previous) / previous * 100
+        for i, (current_year, next_year) in enumerate(zip(years[:-1], years[1:])):
+            summary[f'Évol. {current_year}-{next_year} (%)'] = evolutions[:, i]
+        summary['Évol. globale (%)'] = (pivot[years[-1]] - pivot[years[0]]) / pivot[years[0]] * 100
+    evolution_columns = [col for col in summary.columns if col != value]
+    # Une pathologie absente d'une des deux années compte comme une évolution nulle
+    summary[evolution_columns] = summary[evolution_columns].fillna(0)
+
+    summary = summary.reset_index()
+    if 'Évol. globale (%)' in summary.columns:
+        summary = summary.sort_values('Évol. globale (%)', ascending=False)
+    if labels:
+        summary = summary.rename(columns=labels)
+    return summary
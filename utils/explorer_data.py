@@ -0,0 +1,155 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Colonnes descriptives : clés possibles d'agrégation, jamais sommées
+DIMENSIONS = ['year', 'annee', 'niveau', 'region', 'nom_region', 'sexe', 'pathologie', 'nom_pathologie', 'classification']
+
+# Granularités proposées dans l'explorateur (None : lignes d'origine)
+GRANULARITIES: Dict[str, Optional[Tuple[str, ...]]] = {
+    "Région × année × pathologie": ('year', 'nom_region', 'nom_pathologie'),
+    "Région × année": ('year', 'nom_region'),
+    "Année × pathologie": ('year', 'nom_pathologie'),
+    "Détail (lignes)": None,
+}
+
+# Nombre maximum de lignes envoyées au navigateur quand le calcul se fait côté client
+EXPLORER_MAX_ROWS = 50_000
+
+# Moyennes pondérées : colonne -> colonne de pondération
+WEIGHTED_MEASURES = {
+    'AVG_duree_hospi': 'nbr_hospi',
+    'tx_brut_tt_age_pour_mille': 'population',
+    'tx_standard_tt_age_pour_mille': 'population',
+    'indice_comparatif_tt_age_percent': 'population',
+}
+
+# La population est répétée pour chaque pathologie d'un même territoire, sexe et année
+POPULATION_KEYS = ['year', 'region', 'sexe']
+
+
+def measure_rule(column: str, columns: Sequence[str]) -> str:
+    """
+    Règle d'agrégation d'une mesure
+
+    Args:
+        column: Nom de la mesure
+        columns: Colonnes disponibles (une pondération absente donne une moyenne simple)
+
+    Returns:
+        'sum', 'mean', 'weighted' ou 'population'
+    """
+    if column == 'population':
+        return 'population'
+    if column in WEIGHTED_MEASURES:
+        return 'weighted' if WEIGHTED_MEASURES[column] in columns else 'mean'
+    if column.startswith('evolution_'):
+        # Les écarts absolus s'additionnent, pas les pourcentages ni les écarts de taux
+        measure = column[len('evolution_'):]
+        if measure.startswith('percent_') or measure in WEIGHTED_MEASURES or measure.startswith('taux_'):
+            return 'mean'
+        return 'sum'
+    if column in ('taux_occupation', 'taux_equipement', 'taux_occupation1', 'taux_equipement1'):
+        return 'mean'
+    return 'sum'
+
+
+def _population(df: pd.DataFrame, keys: Sequence[str]) -> pd.Series:
+    # Une seule population par territoire, sexe et année avant la somme
+    distinct = list(dict.fromkeys([key for key in POPULATION_KEYS if key in df.columns] + list(keys)))
+    unique = df.drop_duplicates(subset=distinct)
+    return unique.groupby(list(keys), observed=True)['population'].sum()
+
+
+def aggregate_view(df: pd.DataFrame, keys: Sequence[str]) -> pd.DataFrame:
+    """
+    Agrège une vue de l'explorateur à la granularité `keys`
+
+    Les effectifs sont sommés, les durées et taux moyennés en pondérant par
+    les hospitalisations ou la population, les pourcentages d'évolution
+    moyennés. Les colonnes descriptives hors de `keys` sont retirées.
+
+    Args:
+        df: Vue au niveau ligne
+        keys: Colonnes de regroupement (ex. année, région, pathologie)
+
+    Returns:
+        DataFrame d'une ligne par combinaison de `keys`
+    """
+    keys = [key for key in keys if key in df.columns]
+    measures = [column for column in df.columns if column not in DIMENSIONS and column not in keys]
+
+    # Une seule passe groupby : produits pondérés et poids préparés colonne par colonne
+    work = {key: df[key] for key in keys}
+    rules = {}
+    for column in measures:
+        rule = measure_rule(column, df.columns)
+        rules[column] = rule
+        if rule == 'population':
+            continue
+        if rule == 'weighted':
+            values = df[column].astype('float64')
+            weights = df[WEIGHTED_MEASURES[column]].astype('float64').where(values.notna(), 0)
+            work[column] = values * weights
+            work[f'__poids_{column}'] = weights
+        elif rule == 'mean':
+            work[column] = df[column].astype('float64')
+            work[f'__nombre_{column}'] = df[column].notna().astype('int64')
+        else:
+            work[column] = df[column]
+
+    grouped = pd.DataFrame(work, copy=False).groupby(keys, observed=True).sum()
+    result = pd.DataFrame(index=grouped.index)
+    for column in measures:
+        rule = rules[column]
+        if rule == 'population':
+            result[column] = _population(df, keys)
+        elif rule == 'weighted':
+            result[column] = grouped[column] / grouped[f'__poids_{column}'].replace(0, np.nan)
+        elif rule == 'mean':
+            result[column] = grouped[column] / grouped[f'__nombre_{column}'].replace(0, np.nan)
+        else:
+            result[column] = grouped[column]
+    return result.reset_index()
+
+
+def downsample(df: pd.DataFrame, max_rows: int = EXPLORER_MAX_ROWS, seed: int = 0) -> pd.DataFrame:
+    """
+    Échantillon reproductible d'au plus `max_rows` lignes
+
+    Args:
+        df: Vue au niveau ligne
+        max_rows: Nombre maximum de lignes
+        seed: Graine de l'échantillonnage
+
+    Returns:
+        `df` lui-même s'il est assez petit, sinon un échantillon dans l'ordre d'origine
+    """
+    if len(df) <= max_rows:
+        return df
+    return df.sample(n=max_rows, random_state=seed).sort_index()
+
+
+def explorer_dataset(
+    df: pd.DataFrame,
+    keys: Optional[Sequence[str]],
+    max_rows: Optional[int] = EXPLORER_MAX_ROWS
+) -> pd.DataFrame:
+    """
+    Prépare les données transmises à PyGWalker
+
+    Args:
+        df: Vue au niveau ligne
+        keys: Granularité (None : lignes d'origine)
+        max_rows: Plafond de lignes (None : aucun, ex. calcul côté serveur)
+
+    Returns:
+        Vue agrégée, éventuellement sous-échantillonnée
+    """
+    dataset = df if keys is None else aggregate_view(df, keys)
+    if max_rows is not None:
+        dataset = downsample(dataset, max_rows)
+    if dataset is not df:
+        dataset.attrs = dict(df.attrs)
+    return dataset
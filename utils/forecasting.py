@@ -0,0 +1,242 @@
+from typing import Dict, Iterable, NamedTuple, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Horizons proposés par la page de prédictions, en mois après la dernière année observée
+HORIZONS = {"1 mois": 1, "3 mois": 3, "6 mois": 6, "1 an": 12}
+
+# Mesures prévues : hospitalisations (flux annuel) et lits d'hospitalisation complète
+MEASURES = ['nbr_hospi', 'lit_hospi_complete']
+
+# Spécialités de la page et codes `classification` des marts
+SERVICES = {
+    'Médecine': 'M',
+    'Chirurgie': 'C',
+    'Obstétrique': 'O',
+    'SSR': 'SSR',
+    'Psychiatrie': 'PSY',
+}
+ALL_REGIONS = "Toutes les régions"
+ALL_SERVICES = "Toutes les spécialités"
+
+# Grilles des paramètres de lissage, parcourues pour toutes les séries à la fois
+ALPHAS = np.round(np.linspace(0.1, 1.0, 10), 2)
+BETAS = np.round(np.linspace(0.0, 1.0, 11), 2)
+
+# Quantile de l'intervalle de prévision (95 %)
+Z_95 = 1.96
+
+
+class HoltFit(NamedTuple):
+    """Paramètres et état final du lissage de Holt, une valeur par série"""
+    alpha: np.ndarray
+    beta: np.ndarray
+    level: np.ndarray
+    trend: np.ndarray
+    sigma: np.ndarray
+
+
+def _holt_pass(values: np.ndarray, alpha: float, beta: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Lissage de Holt de toutes les séries (lignes) pour un couple de paramètres ;
+    # renvoie niveau, tendance et somme des erreurs de prévision à un pas
+    # Initialisation sur les deux premières années : niveau de la seconde, pente entre les deux
+    if values.shape[1] > 1:
+        level, trend = values[:, 1].copy(), values[:, 1] - values[:, 0]
+    else:
+        level, trend = values[:, 0].copy(), np.zeros(len(values))
+    sse = np.zeros(len(values))
+    for t in range(2, values.shape[1]):
+        prediction = level + trend
+        sse += (values[:, t] - prediction) ** 2
+        new_level = alpha * values[:, t] + (1 - alpha) * prediction
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        level = new_level
+    return level, trend, sse
+
+
+def fit_holt(values: np.ndarray, alphas: Iterable[float] = ALPHAS, betas: Iterable[float] = BETAS) -> HoltFit:
+    """
+    Ajuste un lissage exponentiel de Holt (tendance linéaire) sur chaque série
+
+    Toutes les séries sont traitées ensemble : chaque couple (alpha, beta)
+    de la grille est évalué en une passe vectorisée, puis chaque série
+    retient le couple minimisant ses erreurs de prévision à un pas.
+
+    Args:
+        values: Matrice (séries × années), sans valeur manquante
+        alphas: Valeurs candidates du lissage du niveau
+        betas: Valeurs candidates du lissage de la tendance
+
+    Returns:
+        Paramètres retenus, niveau et tendance en fin de série, écart-type des erreurs
+    """
+    values = np.asarray(values, dtype='float64')
+    n_series, n_years = values.shape
+    best = None
+    for alpha in alphas:
+        for beta in betas:
+            level, trend, sse = _holt_pass(values, alpha, beta)
+            if best is None:
+                best = [np.full(n_series, alpha), np.full(n_series, beta), level, trend, sse]
+                continue
+            better = sse < best[4]
+            for current, candidate in zip(best, [alpha, beta, level, trend, sse]):
+                current[better] = candidate[better] if isinstance(candidate, np.ndarray) else candidate
+    alpha, beta, level, trend, sse = best
+    sigma = np.sqrt(sse / max(n_years - 2, 1))
+    return HoltFit(alpha, beta, level, trend, sigma)
+
+
+def forecast_holt(fit: HoltFit, steps: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Prévisions et intervalles à 95 % pour des horizons exprimés en années
+
+    Args:
+        fit: Résultat de `fit_holt`
+        steps: Horizons en années (fractionnaires pour les mois)
+
+    Returns:
+        Prévision, borne basse et borne haute, matrices (séries × horizons)
+    """
+    steps = np.asarray(steps, dtype='float64')[np.newaxis, :]
+    alpha, beta = fit.alpha[:, np.newaxis], (fit.alpha * fit.beta)[:, np.newaxis]
+    mean = fit.level[:, np.newaxis] + steps * fit.trend[:, np.newaxis]
+
+    # Variance du modèle ETS(A,A,N) au-delà d'un an ; en deçà, croissance en racine de l'horizon
+    h = np.maximum(steps, 1)
+    variance_factor = 1 + (h - 1) * (alpha ** 2 + alpha * beta * h + beta ** 2 * h * (2 * h - 1) / 6)
+    variance_factor = np.where(steps < 1, steps, variance_factor)
+    spread = Z_95 * fit.sigma[:, np.newaxis] * np.sqrt(variance_factor)
+    return mean, np.maximum(mean - spread, 0), mean + spread
+
+
+def build_series(df: pd.DataFrame, measures: Iterable[str] = MEASURES, year_col: str = 'annee') -> pd.DataFrame:
+    """
+    Séries annuelles par région et spécialité, totaux compris
+
+    Args:
+        df: Mart de capacité (colonnes nom_region, classification, année et mesures)
+        measures: Mesures sommées
+        year_col: Colonne de l'année
+
+    Returns:
+        DataFrame indexé par (nom_region, service), colonnes (mesure, année) ;
+        les lignes « Toutes les régions » et « Toutes les spécialités » sont des sommes
+    """
+    measures = list(measures)
+    codes = {code: service for service, code in SERVICES.items()}
+    scope = df[df['classification'].isin(codes)]
+    service = scope['classification'].astype(str).map(codes).rename('service')
+    region = scope['nom_region'].astype(str)
+
+    base = scope.groupby([region, service, scope[year_col].rename('annee')], observed=True)[measures].sum()
+    by_service = base.groupby(level=['service', 'annee']).sum()
+    by_region = base.groupby(level=['nom_region', 'annee']).sum()
+    total = base.groupby(level='annee').sum()
+
+    levels = pd.concat([
+        base,
+        pd.concat({ALL_REGIONS: by_service}, names=['nom_region']),
+        pd.concat({ALL_SERVICES: by_region}, names=['service']).reorder_levels(['nom_region', 'service', 'annee']),
+        pd.concat({(ALL_REGIONS, ALL_SERVICES): total}, names=['nom_region', 'service']),
+    ])
+    return levels.unstack('annee').sort_index()
+
+
+def _complete(values: pd.DataFrame) -> pd.DataFrame:
+    # Années manquantes d'une série : dernière valeur connue (ou première pour le début)
+    return values.ffill(axis=1).bfill(axis=1)
+
+
+def backtest_metrics(values: np.ndarray, tolerance: float = 0.1) -> Dict[str, float]:
+    """
+    Évalue le modèle en prévoyant la dernière année à partir des précédentes
+
+    Args:
+        values: Matrice (séries × années), sans valeur manquante
+        tolerance: Écart relatif toléré pour la précision
+
+    Returns:
+        Précision (part des séries prévues à ±10 %), MAE et R² sur l'année retenue
+    """
+    values = np.asarray(values, dtype='float64')
+    if values.shape[1] < 3:
+        return {'precision': np.nan, 'mae': np.nan, 'r2': np.nan}
+    actual = values[:, -1]
+    predicted, _, _ = forecast_holt(fit_holt(values[:, :-1]), np.array([1.0]))
+    predicted = predicted[:, 0]
+    errors = actual - predicted
+    with np.errstate(divide='ignore', invalid='ignore'):
+        within = np.abs(errors) <= tolerance * np.abs(actual)
+    total = ((actual - actual.mean()) ** 2).sum()
+    return {
+        'precision': float(within.mean()),
+        'mae': float(np.abs(errors).mean()),
+        'r2': float(1 - (errors ** 2).sum() / total) if total > 0 else np.nan,
+    }
+
+
+class HospitalForecasts:
+    """
+    Prévisions par région et spécialité, calculées une seule fois.
+
+    Un modèle de Holt est ajusté sur chaque série (région × spécialité ×
+    mesure) en un seul lot vectorisé ; les prévisions mensuelles de chaque
+    horizon sont précalculées, la page ne fait ensuite que des lectures.
+    """
+
+    def __init__(self, df: pd.DataFrame, measures: Iterable[str] = MEASURES, year_col: str = 'annee'):
+        """
+        Ajuste les modèles et précalcule les prévisions
+
+        Args:
+            df: Mart de capacité au niveau régional
+            measures: Mesures prévues
+            year_col: Colonne de l'année
+        """
+        self.measures = list(measures)
+        series = build_series(df, self.measures, year_col)
+        self.years = sorted({year for _, year in series.columns})
+        self.history = series
+        self.last_date = pd.Timestamp(year=int(self.years[-1]), month=12, day=31)
+
+        self.fits: Dict[str, HoltFit] = {}
+        self.backtest: Dict[str, Dict[str, float]] = {}
+        for measure in self.measures:
+            values = _complete(series[measure]).to_numpy(dtype='float64')
+            self.fits[measure] = fit_holt(values)
+            self.backtest[measure] = backtest_metrics(values)
+
+        self.forecasts = {label: self._forecast(months) for label, months in HORIZONS.items()}
+
+    def _forecast(self, months: int) -> pd.DataFrame:
+        steps = np.arange(1, months + 1)
+        dates = [self.last_date + pd.DateOffset(months=int(step)) for step in steps]
+        frames = {}
+        for measure in self.measures:
+            mean, low, high = forecast_holt(self.fits[measure], steps / 12)
+            frames[measure] = pd.DataFrame({
+                'date': np.tile(dates, len(self.history)),
+                'prevision': mean.ravel(),
+                'borne_basse': low.ravel(),
+                'borne_haute': high.ravel(),
+            }, index=self.history.index.repeat(len(steps)))
+        return pd.concat(frames, names=['mesure']).sort_index()
+
+    def history_for(self, region: str, service: str, measure: str) -> pd.DataFrame:
+        """
+        Historique annuel d'une série (dates au 31 décembre)
+        """
+        values = self.history.loc[(region, service), measure]
+        return pd.DataFrame({
+            'date': [pd.Timestamp(year=int(year), month=12, day=31) for year in values.index],
+            'valeur': values.to_numpy()
+        })
+
+    def forecast_for(self, region: str, service: str, measure: str, horizon: str) -> pd.DataFrame:
+        """
+        Prévisions mensuelles précalculées d'une série pour un horizon de `HORIZONS`
+        """
+        forecast = self.forecasts[horizon].loc[[(measure, region, service)]]
+        return forecast.sort_values('date').reset_index(drop=True)
@@ -0,0 +1,274 @@
+import functools
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.projection import enable_copy_on_write
+from utils.snapshot import snapshot_version
+
+# Les résultats sont rendus sous forme de copies superficielles : avec le mode
+# copy-on-write, les modifier n'altère jamais l'entrée du cache
+enable_copy_on_write()
+
+# Attribut (DataFrame.attrs) portant la version de l'instantané ; pandas le
+# propage aux filtres, projections et copies du DataFrame
+SNAPSHOT_ATTR = 'snapshot_version'
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+class FrameToken(NamedTuple):
+    """Identifiant d'un DataFrame dans les clés de cache"""
+    version: Optional[str]  # None : DataFrame non marqué par `stamp_snapshot`
+    columns: Tuple
+    rows: int
+    digest: str  # 'lignes:' étiquettes de lignes de l'instantané, 'contenu:' valeurs et index
+
+
+# Nombre de lignes comparées à l'instantané pour reconnaître un filtre
+SAMPLE_ROWS = 32
+
+# Instantanés marqués encore chargés, par version
+_snapshots: Dict[str, "weakref.ref[pd.DataFrame]"] = {}
+
+# Empreintes de contenu déjà calculées, par objet DataFrame vivant
+_digests: Dict[int, str] = {}
+_digests_lock = threading.Lock()
+
+
+def _index_digest(index: pd.Index) -> str:
+    # Un RangeIndex se résume à ses bornes ; sinon seules les étiquettes sont
+    # hachées (directement leurs octets pour un index numérique)
+    if isinstance(index, pd.RangeIndex):
+        return f"{index.start}:{index.stop}:{index.step}"
+    values = index.to_numpy()
+    if values.dtype.kind not in 'iuf':
+        values = pd.util.hash_array(values)
+    return hashlib.sha1(np.ascontiguousarray(values).tobytes()).hexdigest()[:16]
+
+
+def _is_row_subset(df: pd.DataFrame, snapshot: pd.DataFrame) -> bool:
+    """
+    Vérifie par échantillon que `df` est un filtre ou une projection de l'instantané
+
+    Les attrs (donc la version) se propagent aussi aux agrégats et aux
+    `reset_index` : on compare quelques lignes réparties de `df` aux lignes
+    de mêmes étiquettes de l'instantané. Un agrégat, une colonne recalculée
+    ou convertie n'y correspondent pas.
+    """
+    if not snapshot.index.is_unique or not df.columns.isin(snapshot.columns).all():
+        return False
+    if df.empty:
+        return True
+    positions = np.unique(np.linspace(0, len(df) - 1, min(len(df), SAMPLE_ROWS)).astype(np.int64))
+    sample = df.iloc[positions]
+    rows = snapshot.index.get_indexer(sample.index)
+    if (rows < 0).any():
+        return False
+    reference = snapshot.iloc[rows][list(df.columns)]
+    return all(
+        sample[column].dtype == reference[column].dtype
+        and np.array_equal(
+            pd.util.hash_pandas_object(sample[column], index=False).to_numpy(),
+            pd.util.hash_pandas_object(reference[column], index=False).to_numpy()
+        )
+        for column in df.columns
+    )
+
+
+def _content_digest(df: pd.DataFrame) -> str:
+    # Empreinte complète (valeurs et index), calculée une fois par objet
+    key = id(df)
+    with _digests_lock:
+        digest = _digests.get(key)
+    if digest is not None:
+        return digest
+
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes()).hexdigest()[:16]
+    with _digests_lock:
+        if key not in _digests:
+            _digests[key] = digest
+            weakref.finalize(df, _digests.pop, key, None)
+    return digest
+
+
+def frame_token(df: pd.DataFrame) -> FrameToken:
+    """
+    Clé de cache d'un DataFrame
+
+    Pour un filtre ou une projection d'un instantané marqué par
+    `stamp_snapshot`, la clé combine la version de l'instantané, les
+    colonnes et les étiquettes des lignes retenues : le contenu n'est pas
+    haché. Le DataFrame est reconnu comme tel par un échantillon de lignes
+    comparé à l'instantané (`_is_row_subset`). Sinon (DataFrame non marqué,
+    agrégat ou colonnes recalculées héritant de la version), le contenu
+    est haché, une fois par objet.
+
+    Args:
+        df: DataFrame, considéré comme non modifié une fois passé au cache
+
+    Returns:
+        Identifiant hachable des données
+    """
+    version = df.attrs.get(SNAPSHOT_ATTR)
+    reference = _snapshots.get(version) if version is not None else None
+    snapshot = reference() if reference is not None else None
+    if snapshot is not None and _is_row_subset(df, snapshot):
+        digest = f"lignes:{_index_digest(df.index)}"
+    else:
+        digest = f"contenu:{_content_digest(df)}"
+    return FrameToken(version, tuple(df.columns), len(df), digest)
+
+
+def stamp_snapshot(df: pd.DataFrame, source: str, version: Optional[str] = None) -> pd.DataFrame:
+    """
+    Marque un DataFrame chargé avec la version de son instantané
+
+    À appeler une fois, à la fin du chargement. Si la version d'une source
+    change (nouveau chargement aux valeurs différentes), les entrées du cache
+    calculées sur l'ancienne version sont supprimées.
+
+    Args:
+        df: DataFrame chargé (après conversion des types)
+        source: Nom de la source (ex. page ou table)
+        version: Version déjà connue (sinon calculée sur le contenu)
+
+    Returns:
+        Le même DataFrame, marqué
+    """
+    version = version or snapshot_version(df)
+    df.attrs[SNAPSHOT_ATTR] = version
+    _snapshots[version] = weakref.ref(df)
+    frame_cache.set_version(source, version)
+    return df
+
+
+def _key_part(value: Any) -> Hashable:
+    if isinstance(value, pd.DataFrame):
+        return frame_token(value)
+    if isinstance(value, pd.Series):
+        return frame_token(value.to_frame())
+    if isinstance(value, dict):
+        return tuple(sorted((key, _key_part(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = sorted(value) if isinstance(value, (set, frozenset)) else value
+        return tuple(_key_part(item) for item in items)
+    return value
+
+
+def _shared(result: Any) -> Any:
+    # Copie superficielle des DataFrames et Series rendus (sans copie des
+    # données, grâce au copy-on-write) : l'appelant peut les modifier
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return result.copy(deep=False)
+    if isinstance(result, tuple) and not hasattr(result, '_fields'):
+        return tuple(_shared(item) for item in result)
+    if isinstance(result, list):
+        return [_shared(item) for item in result]
+    if isinstance(result, dict):
+        return {key: _shared(item) for key, item in result.items()}
+    return result
+
+
+def _key_versions(key: Any) -> Set[str]:
+    # Versions d'instantané référencées par une clé (pour l'invalidation)
+    if isinstance(key, FrameToken):
+        return {key.version} if key.version else set()
+    if isinstance(key, tuple):
+        versions = set()
+        for part in key:
+            versions |= _key_versions(part)
+        return versions
+    return set()
+
+
+class SnapshotCache:
+    """
+    Cache des calculs sur DataFrames indexé par version et paramètres.
+
+    Les arguments DataFrame sont remplacés dans la clé par `frame_token` :
+    pour les filtres d'un instantané marqué, version, colonnes et étiquettes
+    des lignes retenues, sans hacher les valeurs ; pour les autres
+    DataFrames, empreinte complète du contenu (coût de `st.cache_data`).
+    Les DataFrames, Series
+    et conteneurs rendus sont des copies superficielles, modifiables sans
+    altérer le cache ; les autres objets rendus sont partagés entre les
+    appels (comme `st.cache_resource`) et doivent être traités en lecture seule.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Initialise le cache
+
+        Args:
+            max_entries: Nombre maximum de résultats conservés (LRU)
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Set[str]]]" = OrderedDict()
+        self._versions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def set_version(self, source: str, version: str):
+        """
+        Enregistre la version courante d'une source ; invalide l'ancienne si elle change
+        """
+        with self._lock:
+            previous = self._versions.get(source)
+            self._versions[source] = version
+        if previous is not None and previous != version:
+            self.invalidate(previous)
+
+    def invalidate(self, version: Optional[str] = None):
+        """
+        Supprime les entrées calculées sur une version (toutes si None)
+        """
+        with self._lock:
+            if version is None:
+                self._entries.clear()
+                return
+            for key in [key for key, (_, versions) in self._entries.items() if version in versions]:
+                del self._entries[key]
+
+    def memoize(self, fn: Callable) -> Callable:
+        """
+        Décorateur : met en cache `fn` selon ses arguments (DataFrames via `frame_token`)
+        """
+        # Les pages Streamlit s'exécutent toutes sous le module '__main__' : le
+        # fichier source distingue les fonctions homonymes de pages différentes
+        name = (fn.__code__.co_filename, fn.__qualname__)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (name, _key_part(args), _key_part(kwargs))
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return _shared(self._entries[key][0])
+                self.misses += 1
+
+            result = fn(*args, **kwargs)
+            with self._lock:
+                self._entries[key] = (result, _key_versions(key))
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return _shared(result)
+
+        wrapper.cache = self
+        return wrapper
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# Cache unique du processus, partagé par toutes les sessions et les pages
+frame_cache = SnapshotCache()
@@ -0,0 +1,259 @@
+import contextvars
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from utils.tracing import Tracer
+from utils.worker_pool import SessionWorkerPool
+
+logger = logging.getLogger(__name__)
+
+# Marqueur de fin de génération dans la file de tokens
+_DONE = object()
+
+
+class TokenStream:
+    """
+    Flux de tokens à passer à `st.write_stream`.
+
+    Mesure le temps jusqu'au premier token et la durée totale de génération,
+    et conserve le texte produit.
+    """
+
+    def __init__(self, tokens: Callable[['TokenStream'], Iterable[str]], name: str = 'llm'):
+        """
+        Initialise le flux
+
+        Args:
+            tokens: Fonction appelée au début de l'itération et renvoyant les tokens
+            name: Nom du flux utilisé dans les logs
+        """
+        self._tokens = tokens
+        self.name = name
+        self.chunks = []
+        self.output: Optional[str] = None
+        self.time_to_first_token: Optional[float] = None
+        self.total_time: Optional[float] = None
+
+    def __iter__(self) -> Iterator[str]:
+        start = time.perf_counter()
+        for token in self._tokens(self):
+            if not token:
+                continue
+            if self.time_to_first_token is None:
+                self.time_to_first_token = time.perf_counter() - start
+                logger.info("%s : premier token après %.2f s", self.name, self.time_to_first_token)
+            self.chunks.append(token)
+            yield token
+        self.total_time = time.perf_counter() - start
+        logger.info("%s : réponse complète en %.2f s", self.name, self.total_time)
+
+    @property
+    def text(self) -> str:
+        return ''.join(self.chunks)
+
+
+class _Cancelled(Exception):
+    """Interrompt un appel dont le lecteur a abandonné le flux (délai dépassé)"""
+
+
+def _worker_tokens(
+    task: Callable[[Callable[[str], None]], Any],
+    stream: 'TokenStream',
+    pool: Optional[SessionWorkerPool],
+    session_id: str,
+    timeout: Optional[float],
+    cancelled: threading.Event
+) -> Iterator[str]:
+    """
+    Exécute `task(emit)` dans un thread du pool (ou un thread dédié sans pool)
+    et relaie les tokens émis ; la valeur retournée par `task` devient
+    `stream.output`.
+    """
+    pending = queue.Queue()
+    result = {}
+
+    def run():
+        try:
+            result['output'] = task(pending.put)
+        except Exception as e:
+            result['error'] = e
+        finally:
+            pending.put(_DONE)
+
+    # Le contexte (traceur courant) est propagé au thread d'exécution
+    runner = contextvars.copy_context().run
+    if pool is None:
+        threading.Thread(target=runner, args=(run,), daemon=True).start()
+    else:
+        pool.submit(session_id, runner, run)
+
+    deadline = time.monotonic() + timeout if timeout else None
+    try:
+        while True:
+            try:
+                token = pending.get(timeout=max(deadline - time.monotonic(), 0) if deadline else None)
+            except queue.Empty:
+                raise TimeoutError(f"Pas de réponse après {timeout:.0f} s : veuillez reformuler ou réessayer.")
+            if token is _DONE:
+                break
+            yield token
+    finally:
+        # Délai dépassé, erreur ou flux abandonné par le lecteur (GeneratorExit) :
+        # l'appel est interrompu à son prochain token et libère le thread
+        cancelled.set()
+
+    if 'error' in result:
+        raise result['error']
+    stream.output = result.get('output')
+
+
+def stream_llm(
+    llm: Any,
+    prompt: str,
+    pool: Optional[SessionWorkerPool] = None,
+    session_id: str = 'default',
+    timeout: Optional[float] = None
+) -> TokenStream:
+    """
+    Diffuse la réponse d'un modèle de chat LangChain token par token
+
+    Args:
+        llm: Modèle de chat (AzureChatOpenAI ou modèle de test)
+        prompt: Prompt complet
+        pool: Pool borné où exécuter l'appel (dans le thread appelant si None)
+        session_id: Session à laquelle rattacher l'appel dans le pool
+        timeout: Délai maximal de la génération en secondes
+
+    Returns:
+        Flux des tokens de la réponse
+    """
+    def tokens(stream: TokenStream):
+        if pool is None and timeout is None:
+            for chunk in llm.stream(prompt):
+                yield str(getattr(chunk, 'content', chunk))
+            stream.output = stream.text
+            return
+
+        cancelled = threading.Event()
+
+        def task(emit):
+            chunks = []
+            for chunk in llm.stream(prompt):
+                if cancelled.is_set():
+                    raise _Cancelled()
+                chunks.append(str(getattr(chunk, 'content', chunk)))
+                emit(chunks[-1])
+            return ''.join(chunks)
+
+        yield from _worker_tokens(task, stream, pool, session_id, timeout, cancelled)
+
+    return TokenStream(tokens, name='llm')
+
+
+class _QueueCallbackHandler(BaseCallbackHandler):
+    """Transmet les tokens générés par le LLM de l'agent ; interrompt l'agent une fois le flux abandonné"""
+
+    # Les exceptions des callbacks sont ignorées par LangChain sauf avec raise_error
+    raise_error = True
+
+    def __init__(self, emit: Callable[[str], None], cancelled: threading.Event):
+        self.emit = emit
+        self.cancelled = cancelled
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if self.cancelled.is_set():
+            raise _Cancelled()
+        self.emit(token)
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Enregistre dans un traceur un span par appel au LLM (réflexion de l'agent)
+    et par appel d'outil, rattachés par run_id LangChain
+    """
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self.step = 0
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID,
+                     parent_run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        self.step += 1
+        self.tracer.start_span(
+            f"réflexion (étape {self.step})", 'llm', key=run_id, parent_key=parent_run_id,
+            step=self.step, prompt_chars=sum(len(prompt) for prompt in prompts)
+        )
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        usage = (getattr(response, 'llm_output', None) or {}).get('token_usage') or {}
+        self.tracer.end_span(
+            run_id,
+            prompt_tokens=usage.get('prompt_tokens'),
+            completion_tokens=usage.get('completion_tokens')
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self.tracer.end_span(run_id, status='error', error=str(error))
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID,
+                      parent_run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        name = (serialized or {}).get('name') or kwargs.get('name') or 'outil'
+        self.tracer.start_span(
+            name, 'tool', key=run_id, parent_key=parent_run_id,
+            step=self.step, input=str(input_str)[:500]
+        )
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self.tracer.end_span(run_id, output_chars=len(str(output)))
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self.tracer.end_span(run_id, status='error', error=str(error))
+
+
+def stream_agent(
+    agent: Any,
+    prompt: str,
+    callbacks: Optional[List[BaseCallbackHandler]] = None,
+    pool: Optional[SessionWorkerPool] = None,
+    session_id: str = 'default',
+    timeout: Optional[float] = None
+) -> TokenStream:
+    """
+    Diffuse les tokens produits par un agent LangChain pendant son exécution
+
+    L'agent est exécuté dans un thread du pool ; les tokens de son LLM (créé
+    avec `streaming=True`) sont relayés par un callback. La réponse finale de
+    l'agent est disponible dans `output` une fois le flux consommé ; si aucun
+    token n'a été diffusé, elle est émise en un seul bloc.
+
+    Args:
+        agent: Agent exposant `invoke(input, config)` (AgentExecutor)
+        prompt: Question de l'utilisateur
+        callbacks: Callbacks LangChain supplémentaires (traçage par exemple)
+        pool: Pool borné où exécuter l'agent (thread dédié si None)
+        session_id: Session à laquelle rattacher l'appel dans le pool
+        timeout: Délai maximal de la réponse en secondes ; au-delà, l'agent est
+            interrompu à son prochain token et TimeoutError est levée
+
+    Returns:
+        Flux des tokens de la réponse
+    """
+    def tokens(stream: TokenStream):
+        cancelled = threading.Event()
+
+        def task(emit):
+            handlers = [_QueueCallbackHandler(emit, cancelled)] + list(callbacks or [])
+            response = agent.invoke(prompt, config={'callbacks': handlers})
+            return response.get('output') if isinstance(response, dict) else str(response)
+
+        yield from _worker_tokens(task, stream, pool, session_id, timeout, cancelled)
+        if not stream.chunks and stream.output:
+            yield stream.output
+
+    return TokenStream(tokens, name='agent')
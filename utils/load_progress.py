@@ -0,0 +1,114 @@
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Part de la barre de progression attribuée à chaque phase du chargement
+QUERY_SHARE = 0.3      # soumission et exécution des requêtes
+DOWNLOAD_SHARE = 0.4   # téléchargement des lignes
+CONVERSION_SHARE = 0.15
+METRICS_SHARE = 0.15
+
+
+class LoadProgress:
+    """
+    Suivi des étapes réelles du chargement des données.
+
+    Reçoit les étapes de `load_tables` ('submitted', 'executed', 'downloaded'),
+    puis 'converted' par table et 'metrics'/'done' ; met à jour la barre de
+    progression en conséquence et mesure la durée de chaque étape, publiée
+    comme métriques de démarrage.
+    """
+
+    def __init__(self, tables: Iterable[str], progress_bar: Optional[Any] = None):
+        """
+        Initialise le suivi
+
+        Args:
+            tables: Noms des tables chargées
+            progress_bar: Élément `st.progress` à mettre à jour (optionnel)
+        """
+        self.tables = list(tables)
+        self.progress_bar = progress_bar
+        self.start = time.perf_counter()
+        self.stages: Dict[str, set] = {'submitted': set(), 'executed': set(), 'downloaded': set(), 'converted': set()}
+        self.total_rows: Dict[str, int] = {}
+        self.rows: Dict[str, int] = {}
+        self.timestamps: Dict[str, float] = {}
+        self.fraction = 0.0
+
+    def __call__(self, stage: str, table: Optional[str] = None, info: Optional[Dict[str, Any]] = None):
+        """
+        Enregistre une étape (signature compatible avec `load_tables(on_stage=...)`)
+        """
+        info = info or {}
+        now = time.perf_counter() - self.start
+        self.timestamps[f"{stage}:{table}" if table else stage] = now
+
+        if table is not None:
+            self.stages.setdefault(stage, set()).add(table)
+        if stage == 'executed':
+            self.total_rows[table] = info.get('total_rows', 0)
+        elif stage == 'downloaded':
+            self.rows[table] = info.get('rows', 0)
+
+        self.fraction = max(self.fraction, self._fraction(stage))
+        self._render(stage, table)
+
+    def _fraction(self, stage: str) -> float:
+        n = max(len(self.tables), 1)
+        if stage == 'done':
+            return 1.0
+        if stage == 'metrics':
+            return QUERY_SHARE + DOWNLOAD_SHARE + CONVERSION_SHARE
+        if stage == 'converted':
+            return QUERY_SHARE + DOWNLOAD_SHARE + CONVERSION_SHARE * len(self.stages['converted']) / n
+
+        queries = (len(self.stages['submitted']) + 2 * len(self.stages['executed'])) / (3 * n)
+        total_rows = sum(self.total_rows.values())
+        if len(self.total_rows) == n and total_rows:
+            downloads = sum(self.rows.values()) / total_rows
+        else:
+            downloads = len(self.stages['downloaded']) / n
+        return QUERY_SHARE * queries + DOWNLOAD_SHARE * downloads
+
+    def _render(self, stage: str, table: Optional[str]):
+        if self.progress_bar is None:
+            return
+        total_rows = sum(self.total_rows.values())
+        texts = {
+            'submitted': f"Requête envoyée : {table}",
+            'executed': f"Requête exécutée : {table} ({self.total_rows.get(table, 0):,} lignes)",
+            'downloaded': f"Téléchargement : {sum(self.rows.values()):,} / {total_rows:,} lignes",
+            'converted': f"Conversion des types : {table}",
+            'metrics': "Calcul des métriques...",
+            'done': "Chargement terminé !"
+        }
+        text = texts.get(stage, stage).replace(',', ' ')
+        self.progress_bar.progress(int(self.fraction * 100), text=text)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Durées des étapes du démarrage (secondes depuis le début du chargement)
+        """
+        stamps = self.timestamps
+        last = lambda prefix: max((t for key, t in stamps.items() if key.startswith(prefix)), default=None)
+        metrics = {
+            'queries_executed_s': last('executed:'),
+            'downloads_done_s': last('downloaded:'),
+            'conversion_done_s': last('converted:'),
+            'metrics_done_s': stamps.get('done'),
+            'rows': sum(self.rows.values())
+        }
+        for table in self.tables:
+            if f"downloaded:{table}" in stamps:
+                metrics[f"{table}_s"] = stamps[f"downloaded:{table}"]
+        return {key: value for key, value in metrics.items() if value is not None}
+
+    def log_metrics(self):
+        metrics = self.metrics()
+        logger.info("Métriques de démarrage : %s", {
+            key: round(value, 3) if isinstance(value, float) else value for key, value in metrics.items()
+        })
+        return metrics
@@ -0,0 +1,84 @@
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+# Années affichées dans les métriques de la page principale
+METRIC_YEARS = range(2018, 2023)
+
+
+def _year_values(series: pd.Series) -> pd.Series:
+    # Année entière quel que soit le type de la colonne (date, entier ou texte)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.year
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype('int64')
+    return pd.to_datetime(series).dt.year
+
+
+class MainMetrics:
+    """
+    Totaux annuels de la page principale, calculés en un seul passage.
+
+    Les hospitalisations sont agrégées par sexe et par année en un groupby,
+    les lits par année en un autre ; `for_sex` ne fait ensuite que des
+    lectures dans ces tables, sans reparcourir les données.
+
+    L'année est extraite de la colonne `year` quel que soit son type (dates
+    BigQuery, datetime, entiers) : `lits_{année}` est la somme réelle des
+    lits de l'année. L'ancien calcul de `utils/data_loader.py` comparait
+    des dates à des entiers et renvoyait toujours 0.
+    """
+
+    def __init__(
+        self,
+        df_nbr_hospi: pd.DataFrame,
+        df_capacite_hospi: pd.DataFrame,
+        lits_column: str = 'lit_hospi_complete',
+        niveau: Optional[str] = 'Départements',
+        years: Iterable[int] = METRIC_YEARS
+    ):
+        """
+        Calcule les tables de totaux
+
+        Args:
+            df_nbr_hospi: Hospitalisations (colonnes year, sexe, niveau, nbr_hospi)
+            df_capacite_hospi: Capacités (colonnes year, niveau et `lits_column`)
+            lits_column: Colonne du nombre de lits
+            niveau: Niveau administratif retenu (None : toutes les lignes)
+            years: Années des métriques
+        """
+        self.years = list(years)
+        if niveau is not None:
+            df_nbr_hospi = df_nbr_hospi[df_nbr_hospi['niveau'] == niveau]
+            df_capacite_hospi = df_capacite_hospi[df_capacite_hospi['niveau'] == niveau]
+
+        self.hospi = df_nbr_hospi.groupby(
+            [df_nbr_hospi['sexe'], _year_values(df_nbr_hospi['year']).rename('annee')], observed=True
+        )['nbr_hospi'].sum().unstack(fill_value=0)
+        self.lits = df_capacite_hospi.groupby(
+            _year_values(df_capacite_hospi['year']).rename('annee'), observed=True
+        )[lits_column].sum()
+
+    def for_sex(self, selected_sex: Optional[str] = 'Ensemble') -> Dict[str, float]:
+        """
+        Métriques `hospi_{année}` et `lits_{année}` pour une valeur de sexe
+
+        Args:
+            selected_sex: Valeur de la colonne sexe (None : somme de toutes les valeurs)
+
+        Returns:
+            Dictionnaire des métriques (0 pour une année absente)
+        """
+        if selected_sex is None:
+            hospi = self.hospi.sum()
+        elif selected_sex in self.hospi.index:
+            hospi = self.hospi.loc[selected_sex]
+        else:
+            hospi = pd.Series(dtype='int64')
+
+        metrics = {}
+        for year in self.years:
+            metrics[f"hospi_{year}"] = hospi.get(year, 0)
+        for year in self.years:
+            metrics[f"lits_{year}"] = self.lits.get(year, 0)
+        return metrics
@@ -0,0 +1,43 @@
+from typing import Optional
+
+import pandas as pd
+
+
+def pathology_year_facts(df: pd.DataFrame, year_col: str = 'annee') -> pd.DataFrame:
+    """
+    Construit la table pathologie × année des graphiques animés
+
+    Un seul groupby fournit les trois mesures des nuages de points et du
+    graphique 3D : total des hospitalisations, durée moyenne de séjour et
+    indice comparatif moyen.
+
+    Args:
+        df: Données au niveau ligne (une ligne par territoire, sexe, pathologie et année)
+        year_col: Colonne de l'année ('annee' ou 'year')
+
+    Returns:
+        DataFrame (nom_pathologie, année, nbr_hospi, AVG_duree_hospi,
+        indice_comparatif_tt_age_percent)
+    """
+    return df.groupby(['nom_pathologie', year_col], observed=True).agg(
+        nbr_hospi=('nbr_hospi', 'sum'),
+        AVG_duree_hospi=('AVG_duree_hospi', 'mean'),
+        indice_comparatif_tt_age_percent=('indice_comparatif_tt_age_percent', 'mean')
+    ).reset_index()
+
+
+def top_pathologies(facts: pd.DataFrame, n: int, ranking: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Restreint la table aux `n` pathologies les plus fréquentes
+
+    Args:
+        facts: Table issue de `pathology_year_facts`
+        n: Nombre de pathologies conservées
+        ranking: Données servant au classement (par défaut `facts` elle-même)
+
+    Returns:
+        Lignes de `facts` des `n` pathologies totalisant le plus d'hospitalisations
+    """
+    ranking = facts if ranking is None else ranking
+    top = ranking.groupby('nom_pathologie', observed=True)['nbr_hospi'].sum().nlargest(n).index
+    return facts[facts['nom_pathologie'].isin(top)]
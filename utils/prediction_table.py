@@ -0,0 +1,85 @@
+import os
+from typing import Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Table des prédictions précalculées par le traitement par lots
+# (machine_learning/hospitalisation_prediction/batch_scoring.py)
+PREDICTIONS_PATH = os.path.join('data', 'predictions', 'hospitalisations_regions.parquet')
+
+# Années couvertes par les prédictions
+PREDICTION_YEARS = (2023, 2024, 2025, 2026)
+
+
+def compact_predictions(grid: pd.DataFrame, predictions: Iterable[float]) -> pd.DataFrame:
+    """
+    Met les prédictions au format compact de la table
+
+    Args:
+        grid: Combinaisons prédites (colonnes annee, nom_pathologie, nom_region)
+        predictions: Nombre d'hospitalisations prédit pour chaque ligne de `grid`
+
+    Returns:
+        DataFrame (nom_region et nom_pathologie en catégories, annee en int16,
+        prediction en float32), trié par région, pathologie et année
+    """
+    table = pd.DataFrame({
+        'nom_region': pd.Categorical(grid['nom_region'].astype(str)),
+        'nom_pathologie': pd.Categorical(grid['nom_pathologie'].astype(str)),
+        'annee': grid['annee'].to_numpy().astype('int16'),
+        'prediction': np.asarray(predictions, dtype='float32'),
+    })
+    return table.sort_values(['nom_region', 'nom_pathologie', 'annee'], ignore_index=True)
+
+
+class PredictionTable:
+    """
+    Prédictions précalculées, consultées sans le modèle.
+
+    La table est rangée dans un tableau (région × pathologie × année) : une
+    consultation se réduit à deux recherches dans des dictionnaires et à une
+    lecture de tableau, sans PyCaret ni DataFrame intermédiaire.
+    """
+
+    def __init__(self, table: pd.DataFrame):
+        """
+        Range la table dans le tableau de consultation
+
+        Args:
+            table: Table au format de `compact_predictions`
+        """
+        self.regions: List[str] = sorted(table['nom_region'].astype(str).unique())
+        self.pathologies: List[str] = sorted(table['nom_pathologie'].astype(str).unique())
+        self.years: List[int] = sorted(int(year) for year in table['annee'].unique())
+        self._region_index = {region: i for i, region in enumerate(self.regions)}
+        self._pathology_index = {pathology: i for i, pathology in enumerate(self.pathologies)}
+        self._year_index = {year: i for i, year in enumerate(self.years)}
+
+        self.values = np.full((len(self.regions), len(self.pathologies), len(self.years)), np.nan, dtype='float32')
+        regions = pd.Categorical(table['nom_region'].astype(str), categories=self.regions).codes
+        pathologies = pd.Categorical(table['nom_pathologie'].astype(str), categories=self.pathologies).codes
+        years = np.searchsorted(self.years, table['annee'].to_numpy())
+        self.values[regions, pathologies, years] = table['prediction'].to_numpy()
+
+    @classmethod
+    def load(cls, path: str = PREDICTIONS_PATH) -> 'PredictionTable':
+        return cls(pd.read_parquet(path))
+
+    def lookup(self, region: str, pathology: str, years: Sequence[int]) -> np.ndarray:
+        """
+        Prédictions d'une région et d'une pathologie pour plusieurs années
+
+        Args:
+            region: Nom de la région
+            pathology: Nom de la pathologie
+            years: Années demandées (parmi `years`)
+
+        Returns:
+            Nombre d'hospitalisations prédit par année (NaN si la combinaison n'a pas été prédite)
+
+        Raises:
+            KeyError: Région, pathologie ou année absente de la table
+        """
+        year_index = [self._year_index[year] for year in years]
+        return self.values[self._region_index[region], self._pathology_index[pathology], year_index]
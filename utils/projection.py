@@ -0,0 +1,110 @@
+import argparse
+import logging
+import tracemalloc
+from typing import Dict, Iterable, List
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def enable_copy_on_write():
+    """
+    Active le mode copy-on-write de pandas (déjà le comportement par défaut à partir de pandas 3)
+
+    Avec ce mode, un filtre ou une projection ne recopie pas les données :
+    la copie n'a lieu qu'en cas d'écriture, et n'affecte jamais la table de
+    base. Les copies défensives (`.copy()`) deviennent inutiles.
+    """
+    if int(pd.__version__.split('.')[0]) < 3:
+        pd.set_option('mode.copy_on_write', True)
+
+
+# Activé à l'import : les pages qui projettent leurs tables importent ce module
+enable_copy_on_write()
+
+
+def project(df: pd.DataFrame, columns: Iterable[str]) -> pd.DataFrame:
+    """
+    Projection d'un DataFrame sur des colonnes, sans copie des données
+
+    Contrairement à `df[columns]`, qui recopie les colonnes non contiguës d'un
+    même bloc, la projection est construite colonne par colonne : chaque
+    colonne partage le tampon de la table de base. Les attributs (`attrs`,
+    dont la version de l'instantané) sont conservés.
+
+    Args:
+        df: Table de base
+        columns: Colonnes retenues (les doublons sont ignorés)
+
+    Returns:
+        DataFrame partageant ses données avec `df`
+    """
+    view = pd.DataFrame({column: df[column] for column in dict.fromkeys(columns)}, copy=False)
+    view.attrs = dict(df.attrs)
+    return view
+
+
+def allocated_bytes(build) -> int:
+    """
+    Mémoire allouée par la construction d'objets (mesurée avec tracemalloc)
+
+    Args:
+        build: Fonction sans argument construisant les objets (conservés jusqu'à la mesure)
+
+    Returns:
+        Nombre d'octets alloués et encore référencés après l'appel
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = build()
+        allocated = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del objects
+    return allocated
+
+
+def projection_benchmark(df: pd.DataFrame, views: Dict[str, List[str]]) -> pd.DataFrame:
+    """
+    Compare la mémoire des projections copiées (`df[colonnes].copy()`) et partagées (`project`)
+
+    Args:
+        df: Table de base
+        views: Dictionnaire {nom de la vue: colonnes}
+
+    Returns:
+        DataFrame par vue (Mo copiés, Mo partagés), avec une ligne TOTAL
+    """
+    rows = {}
+    for name, columns in views.items():
+        columns = [column for column in dict.fromkeys(columns) if column in df.columns]
+        rows[name] = {
+            'Mo_copie': allocated_bytes(lambda: df[columns].copy()) / 1024 ** 2,
+            'Mo_partage': allocated_bytes(lambda: project(df, columns)) / 1024 ** 2
+        }
+    report = pd.DataFrame.from_dict(rows, orient='index')
+    report.loc['TOTAL'] = report.sum()
+    report['Mo_base'] = df.memory_usage(deep=True).sum() / 1024 ** 2
+    return report
+
+
+if __name__ == '__main__':
+    # Mesure sur le jeu complet : python -m utils.projection data/snapshot/class_join_total_morbidite_sexe_population.parquet
+    from utils.schema import apply_schema, MORBIDITE_SCHEMA
+
+    parser = argparse.ArgumentParser(description="Mémoire des projections copiées et partagées")
+    parser.add_argument('path', help="Fichier Parquet de la table class_join_total_morbidite_sexe_population")
+    args = parser.parse_args()
+
+    df_complet = apply_schema(pd.read_parquet(args.path), MORBIDITE_SCHEMA, 'class_join_total_morbidite_sexe_population')
+    base_columns = ['year', 'region', 'nom_region', 'sexe', 'pathologie', 'nom_pathologie']
+    report = projection_benchmark(df_complet, {
+        'nbr_hospi': base_columns + ['nbr_hospi', 'hospi_prog_24h', 'hospi_autres_24h', 'hospi_total_24h', 'evolution_nbr_hospi'],
+        'duree_hospi': base_columns + ['AVG_duree_hospi', 'evolution_AVG_duree_hospi', 'evolution_percent_AVG_duree_hospi'],
+        'tranche_age': base_columns + ['tx_brut_tt_age_pour_mille', 'tx_standard_tt_age_pour_mille', 'indice_comparatif_tt_age_percent'],
+        'taux': base_columns + ['tx_brut_tt_age_pour_mille', 'tx_standard_tt_age_pour_mille', 'population']
+    })
+    print(f"{len(df_complet):,} lignes".replace(',', ' '))
+    print(report.round(2).to_string())
@@ -0,0 +1,166 @@
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Schéma de types commun aux tables de morbidité et de capacité.
+# Les requêtes BigQuery renvoient des colonnes object/float64 (la mart de capacité
+# caste tout en FLOAT64) : ce schéma est appliqué une seule fois au chargement.
+
+CATEGORY_COLUMNS = ['niveau', 'sexe', 'nom_region', 'nom_pathologie', 'classification']
+
+AGE_COLUMNS = [
+    'tranche_age_0_1', 'tranche_age_1_4', 'tranche_age_5_14',
+    'tranche_age_15_24', 'tranche_age_25_34', 'tranche_age_35_44',
+    'tranche_age_45_54', 'tranche_age_55_64', 'tranche_age_65_74',
+    'tranche_age_75_84', 'tranche_age_85_et_plus'
+]
+
+HOSPI_COLUMNS = [
+    'hospi_prog_24h', 'hospi_autres_24h', 'hospi_total_24h',
+    'hospi_1J', 'hospi_2J', 'hospi_3J', 'hospi_4J', 'hospi_5J',
+    'hospi_6J', 'hospi_7J', 'hospi_8J', 'hospi_9J',
+    'hospi_10J_19J', 'hospi_20J_29J', 'hospi_30J',
+    'hospi_total_jj', 'total_hospi'
+]
+
+RATE_COLUMNS = [
+    'AVG_duree_hospi', 'tx_brut_tt_age_pour_mille', 'tx_standard_tt_age_pour_mille',
+    'indice_comparatif_tt_age_percent'
+]
+
+CAPACITY_COUNT_COLUMNS = [
+    'lit_hospi_complete', 'sejour_hospi_complete', 'journee_hospi_complete',
+    'place_hospi_partielle', 'sejour_hospi_partielle', 'passage_urgence'
+]
+
+CAPACITY_RATE_COLUMNS = [
+    'taux_occupation', 'taux_equipement', 'taux_occupation1', 'taux_equipement1'
+]
+
+EVOLUTION_MEASURES = (
+    ['nbr_hospi', 'hospi_total_24h', 'hospi_total_jj', 'total_hospi']
+    + RATE_COLUMNS + CAPACITY_COUNT_COLUMNS + ['taux_occupation1', 'taux_equipement1']
+)
+EVOLUTION_COLUMNS = (
+    [f'evolution_{measure}' for measure in EVOLUTION_MEASURES]
+    + [f'evolution_percent_{measure}' for measure in EVOLUTION_MEASURES]
+)
+
+MORBIDITE_SCHEMA = {
+    **{column: 'category' for column in CATEGORY_COLUMNS},
+    'annee': 'int16',
+    'nbr_hospi': 'int32',
+    'population': 'int32',
+    **{column: 'float32' for column in HOSPI_COLUMNS + AGE_COLUMNS + RATE_COLUMNS},
+    **{column: 'float32' for column in EVOLUTION_COLUMNS},
+}
+
+CAPACITE_SCHEMA = {
+    **MORBIDITE_SCHEMA,
+    **{column: 'int32' for column in CAPACITY_COUNT_COLUMNS},
+    **{column: 'float32' for column in CAPACITY_RATE_COLUMNS},
+}
+
+
+def _convert(series: pd.Series, dtype: str) -> pd.Series:
+    """
+    Convertit une colonne vers le type déclaré.
+
+    Les colonnes entières ne sont converties en int que si elles ne contiennent
+    ni valeur manquante ni décimale ; sinon elles passent en float32.
+    """
+    if dtype == 'category':
+        return series.astype('category')
+
+    values = pd.to_numeric(series, errors='coerce')
+    if dtype.startswith('int'):
+        info = np.iinfo(dtype)
+        is_integral = (
+            values.notna().all()
+            and (values % 1 == 0).all()
+            and (values.empty or (values.min() >= info.min and values.max() <= info.max))
+        )
+        if not is_integral:
+            dtype = 'float32'
+    return values.astype(dtype)
+
+
+def _footprint(df: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({
+        'dtype': df.dtypes.astype(str),
+        'octets': df.memory_usage(deep=True, index=False)
+    })
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compare l'empreinte mémoire par colonne avant et après conversion
+
+    Args:
+        before: Empreinte initiale (colonnes 'dtype' et 'octets')
+        after: Empreinte après application du schéma
+
+    Returns:
+        DataFrame par colonne (Mo avant/après et gain), avec une ligne TOTAL
+    """
+    report = before.join(after, lsuffix='_avant', rsuffix='_apres')
+    report['Mo_avant'] = report.pop('octets_avant') / 1024 ** 2
+    report['Mo_apres'] = report.pop('octets_apres') / 1024 ** 2
+    report.loc['TOTAL', ['Mo_avant', 'Mo_apres']] = report[['Mo_avant', 'Mo_apres']].sum()
+    report['gain_percent'] = (1 - report['Mo_apres'] / report['Mo_avant']) * 100
+    return report
+
+
+def apply_schema(df: pd.DataFrame, schema: dict, name: str = 'dataframe') -> pd.DataFrame:
+    """
+    Applique le schéma déclaré aux colonnes présentes du DataFrame
+
+    Args:
+        df: DataFrame issu de BigQuery (modifié sur place)
+        schema: Dictionnaire {colonne: type}
+        name: Nom de la table, utilisé dans le rapport mémoire
+
+    Returns:
+        Le DataFrame converti
+    """
+    before = _footprint(df)
+    for column, dtype in schema.items():
+        if column in df.columns:
+            df[column] = _convert(df[column], dtype)
+
+    report = memory_report(before, _footprint(df))
+    logger.info(
+        "Schéma appliqué à %s : %.1f Mo -> %.1f Mo (%.0f%% de gain)",
+        name, *report.loc['TOTAL', ['Mo_avant', 'Mo_apres', 'gain_percent']]
+    )
+    logger.debug("Empreinte mémoire de %s :\n%s", name, report.to_string())
+    return df
+
+
+def rename_value(series: pd.Series, old, new) -> pd.Series:
+    """
+    Remplace une valeur dans une colonne, catégorielle ou non
+
+    Sur une colonne catégorielle, `replace` vers une valeur absente des
+    catégories échoue (pandas 3) ; la catégorie est alors renommée, ou
+    fusionnée avec `new` si celle-ci existe déjà.
+
+    Args:
+        series: Colonne à corriger
+        old: Valeur à remplacer
+        new: Valeur de remplacement
+
+    Returns:
+        Nouvelle colonne, du même type que `series`
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.replace(old, new)
+    categories = series.cat.categories
+    if old not in categories:
+        return series
+    if new not in categories:
+        return series.cat.rename_categories({old: new})
+    merged = series.astype(object).replace(old, new)
+    return merged.astype(pd.CategoricalDtype(categories.drop(old), ordered=series.cat.ordered))
@@ -0,0 +1,26 @@
+import hashlib
+import pandas as pd
+
+
+def snapshot_version(*frames: pd.DataFrame) -> str:
+    """
+    Calcule une empreinte courte des données chargées
+
+    Calculée une fois au chargement, elle identifie l'instantané de données
+    dans les clés de cache : un nouveau chargement aux valeurs différentes
+    produit une autre version.
+
+    Args:
+        frames: DataFrames composant l'instantané
+
+    Returns:
+        Empreinte hexadécimale de 16 caractères
+    """
+    digest = hashlib.sha1()
+    for df in frames:
+        if df is None:
+            digest.update(b'none')
+            continue
+        digest.update(repr((df.shape, list(df.columns))).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()[:16]
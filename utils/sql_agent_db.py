@@ -0,0 +1,191 @@
+import argparse
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_community.utilities import SQLDatabase
+from sqlalchemy import event
+from sqlalchemy.engine import create_engine
+
+from utils.sql_cache import QueryResultCache, normalize_sql, is_read_query
+from utils.sql_dialect import bigquery_to_duckdb, DUCKDB_MACROS
+from utils.tracing import current_tracer, annotate_current_span
+
+logger = logging.getLogger(__name__)
+
+# Tables interrogées par l'agent (nom court -> table BigQuery)
+AGENT_TABLES = {
+    'class_join_total_morbidite_sexe_population':
+        'projet-jbn-data-le-wagon.dbt_medical_analysis_join_total_morbidite.class_join_total_morbidite_sexe_population',
+    'class_join_total_morbidite_capacite_kpi':
+        'projet-jbn-data-le-wagon.dbt_medical_analysis_join_total_morbidite_capacite.class_join_total_morbidite_capacite_kpi'
+}
+
+# Répertoire par défaut de l'instantané local (un fichier Parquet par table)
+DEFAULT_SNAPSHOT_DIR = os.path.join('data', 'snapshot')
+
+
+class CachedSQLDatabase(SQLDatabase):
+    """
+    Base SQL de l'agent avec schémas mémorisés et cache des résultats.
+
+    Les descriptions de tables (schéma et lignes d'exemple) sont calculées une
+    seule fois au démarrage ; les résultats des requêtes de lecture sont mis en
+    cache sous leur SQL normalisé, ce qui évite un aller-retour vers l'entrepôt
+    pour les questions répétées.
+    """
+
+    def __init__(self, *args, result_cache: Optional[QueryResultCache] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.result_cache = result_cache or QueryResultCache()
+        self._table_info: Dict[str, str] = {}
+        event.listen(self._engine, 'after_cursor_execute', _record_cursor_stats)
+
+    def warm_schema_cache(self):
+        """
+        Calcule et mémorise la description de chaque table utilisable
+        """
+        for table in self.get_usable_table_names():
+            if table not in self._table_info:
+                self._table_info[table] = super().get_table_info([table])
+        logger.info("Schémas mémorisés pour %d tables", len(self._table_info))
+
+    def get_table_info(self, table_names: Optional[List[str]] = None) -> str:
+        names = list(table_names) if table_names is not None else list(self.get_usable_table_names())
+        for name in names:
+            # Le parent valide le nom (ValueError si la table est inconnue)
+            if name not in self._table_info:
+                self._table_info[name] = super().get_table_info([name])
+        return "\n\n".join(self._table_info[name] for name in names)
+
+    def run(self, command: Any, fetch: str = "all", include_columns: bool = False, **kwargs) -> Any:
+        tracer = current_tracer.get()
+        if tracer is None:
+            return self._cached_run(command, fetch, include_columns, **kwargs)
+        with tracer.span("requête SQL", 'sql', sql=str(command)[:2000], backend=self.dialect):
+            return self._cached_run(command, fetch, include_columns, **kwargs)
+
+    def _cached_run(self, command: Any, fetch: str, include_columns: bool, **kwargs) -> Any:
+        if not isinstance(command, str) or fetch == "cursor" or kwargs.get('parameters') or not is_read_query(command):
+            return super().run(command, fetch=fetch, include_columns=include_columns, **kwargs)
+
+        key = (normalize_sql(command), fetch, include_columns)
+        result = self.result_cache.get(key)
+        annotate_current_span(cache_hit=result is not None)
+        if result is None:
+            result = super().run(command, fetch=fetch, include_columns=include_columns, **kwargs)
+            self.result_cache.set(key, result)
+        return result
+
+    def _execute(self, command: Any, *args, **kwargs) -> Any:
+        result = super()._execute(command, *args, **kwargs)
+        annotate_current_span(rows=len(result) if isinstance(result, list) else None)
+        return result
+
+
+def _record_cursor_stats(conn, cursor, statement, parameters, context, executemany):
+    # Volume lu par BigQuery (None pour les moteurs qui ne l'exposent pas)
+    job = getattr(cursor, 'query_job', None)
+    annotate_current_span(bytes_scanned=getattr(job, 'total_bytes_processed', None))
+
+
+class DuckDBSQLDatabase(CachedSQLDatabase):
+    """
+    Base SQL locale DuckDB pour l'agent.
+
+    Les requêtes écrites en SQL BigQuery sont traduites avant exécution.
+    """
+
+    def run(self, command: Any, fetch: str = "all", include_columns: bool = False, **kwargs) -> Any:
+        if isinstance(command, str):
+            command = bigquery_to_duckdb(command)
+        return super().run(command, fetch=fetch, include_columns=include_columns, **kwargs)
+
+
+def export_snapshot(client: Any, directory: str = DEFAULT_SNAPSHOT_DIR, tables: Optional[Dict[str, str]] = None):
+    """
+    Exporte les tables de l'agent depuis BigQuery vers des fichiers Parquet
+
+    Args:
+        client: Client BigQuery
+        directory: Répertoire de l'instantané
+        tables: Dictionnaire {nom court: table BigQuery} (AGENT_TABLES par défaut)
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name, table_id in (tables or AGENT_TABLES).items():
+        df = client.query(f"SELECT * FROM `{table_id}`").to_dataframe()
+        path = os.path.join(directory, f"{name}.parquet")
+        df.to_parquet(path, index=False)
+        logger.info("Instantané %s : %d lignes -> %s", name, len(df), path)
+
+
+def data_version(backend: str, directory: str = DEFAULT_SNAPSHOT_DIR) -> str:
+    """
+    Version des données interrogées par l'agent, utilisée dans les clés de cache
+
+    Pour DuckDB, date de modification la plus récente des fichiers de
+    l'instantané ; pour BigQuery (tables dbt rafraîchies au plus une fois par
+    jour), la date du jour.
+    """
+    if backend == "duckdb":
+        mtimes = [
+            os.path.getmtime(os.path.join(directory, f"{name}.parquet"))
+            for name in AGENT_TABLES
+            if os.path.exists(os.path.join(directory, f"{name}.parquet"))
+        ]
+        return f"duckdb:{max(mtimes, default=0):.0f}"
+    return f"{backend}:{time.strftime('%Y-%m-%d')}"
+
+
+def create_duckdb_database(
+    directory: str = DEFAULT_SNAPSHOT_DIR,
+    result_cache: Optional[QueryResultCache] = None
+) -> DuckDBSQLDatabase:
+    """
+    Expose l'instantané local dans une base DuckDB en mémoire
+
+    Les tables sont des vues sur les fichiers Parquet de l'instantané : rien
+    n'est recopié ni écrit sur disque, et un nouvel instantané est lu dès la
+    requête suivante. Les vues et les macros de compatibilité BigQuery sont
+    créées sur chaque connexion du pool (une base en mémoire par connexion).
+
+    Args:
+        directory: Répertoire contenant les fichiers Parquet de l'instantané
+        result_cache: Cache des résultats de requêtes
+
+    Returns:
+        La base SQL prête pour l'agent
+    """
+    statements = []
+    for name in AGENT_TABLES:
+        path = os.path.abspath(os.path.join(directory, f"{name}.parquet")).replace("'", "''")
+        statements.append(f'CREATE OR REPLACE VIEW "{name}" AS SELECT * FROM read_parquet(\'{path}\')')
+    statements += DUCKDB_MACROS
+
+    engine = create_engine("duckdb:///:memory:")
+
+    @event.listens_for(engine, 'connect')
+    def create_views(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    return DuckDBSQLDatabase(
+        engine, include_tables=list(AGENT_TABLES), view_support=True, result_cache=result_cache
+    )
+
+
+if __name__ == '__main__':
+    # Export de l'instantané : python -m utils.sql_agent_db --dir data/snapshot
+    from google.cloud import bigquery
+
+    parser = argparse.ArgumentParser(description="Exporte les tables de l'agent SQL vers un instantané local")
+    parser.add_argument('--dir', default=DEFAULT_SNAPSHOT_DIR, help="Répertoire de l'instantané")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    export_snapshot(bigquery.Client(), args.dir)
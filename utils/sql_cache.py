@@ -0,0 +1,110 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Commentaires SQL, chaînes entre quotes et identifiants entre backticks
+_SQL_TOKENS = re.compile(r"(--[^\n]*|/\*.*?\*/|'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`)", re.S)
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Normalise une requête SQL pour servir de clé de cache
+
+    Supprime les commentaires, les espaces superflus et le point-virgule final,
+    et passe en minuscules tout ce qui n'est pas une chaîne littérale.
+    """
+    parts = []
+    for i, part in enumerate(_SQL_TOKENS.split(sql)):
+        if i % 2 == 0:
+            parts.append(part.lower())
+        elif not part.startswith(('--', '/*')):
+            parts.append(part)
+        else:
+            parts.append(' ')
+    normalized = re.sub(r'\s+', ' ', ''.join(parts)).strip()
+    normalized = re.sub(r'\s*([(),=<>])\s*', r'\1', normalized)
+    return normalized.rstrip('; ')
+
+
+def is_read_query(sql: str) -> bool:
+    return normalize_sql(sql).startswith(('select', 'with'))
+
+
+class QueryResultCache:
+    """
+    Cache LRU des résultats de requêtes, avec durée de vie et taille maximale.
+
+    Les entrées expirent après `ttl` secondes ; les moins récemment utilisées
+    sont évincées au-delà de `max_entries` entrées ou de `max_bytes` octets.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 20 * 1024 ** 2, ttl: float = 3600):
+        """
+        Initialise le cache
+
+        Args:
+            max_entries: Nombre maximum de résultats conservés
+            max_bytes: Taille cumulée maximale des résultats (estimée sur leur texte)
+            ttl: Durée de vie d'une entrée en secondes
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any):
+        size = len(str(value).encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic(), size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Hashable):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate
+        }
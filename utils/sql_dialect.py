@@ -0,0 +1,125 @@
+import re
+
+# Chaînes littérales (laissées intactes par la traduction) et identifiants entre backticks
+_LITERALS = re.compile(r"('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")", re.S)
+_BACKTICKS = re.compile(r"`([^`]*)`")
+
+# Types BigQuery sans équivalent direct dans DuckDB
+_TYPES = {
+    'INT64': 'BIGINT',
+    'FLOAT64': 'DOUBLE',
+    'NUMERIC': 'DECIMAL(38, 9)',
+    'BIGNUMERIC': 'DOUBLE',
+    'STRING': 'VARCHAR',
+    'BOOL': 'BOOLEAN',
+    'BYTES': 'BLOB'
+}
+
+# Fonctions BigQuery renommées
+_FUNCTIONS = {
+    'SAFE_CAST': 'TRY_CAST',
+    'COUNTIF': 'count_if',
+    'FORMAT_DATE': 'bq_format_date',
+    'SAFE_DIVIDE': 'bq_safe_divide',
+    'LOGICAL_OR': 'bool_or',
+    'LOGICAL_AND': 'bool_and'
+}
+
+# Macros DuckDB à créer dans la base pour les fonctions renommées
+DUCKDB_MACROS = [
+    "CREATE OR REPLACE MACRO bq_date(x) AS CAST(x AS DATE)",
+    "CREATE OR REPLACE MACRO bq_format_date(fmt, x) AS strftime(CAST(x AS DATE), fmt)",
+    "CREATE OR REPLACE MACRO bq_safe_divide(a, b) AS CASE WHEN b = 0 THEN NULL ELSE a / b END"
+]
+
+
+def _translate_identifier(match: re.Match) -> str:
+    # `projet.dataset.table` -> table ; `colonne` -> "colonne"
+    name = match.group(1).split('.')[-1]
+    return f'"{name}"'
+
+
+# Parenthèses, appels de conversion et types (`AS <TYPE>`) du SQL hors chaînes
+_CAST_TOKENS = re.compile(r"\b(?:SAFE_CAST|TRY_CAST|CAST)\s*\(|\(|\)|\bAS\s+(\w+)\b", re.I)
+_DATE_CALL = re.compile(r"\bDATE\s*\(", re.I)
+
+# Remplace les chaînes littérales pendant la traduction du code
+_PLACEHOLDER = re.compile(r"\x00(\d+)\x00")
+
+
+def _translate_cast_types(code: str) -> str:
+    # Seuls les types d'un CAST (et non les alias `AS nom`) sont traduits :
+    # la pile indique, pour chaque parenthèse ouverte, s'il s'agit d'un CAST
+    parts, position, casts = [], 0, []
+    for match in _CAST_TOKENS.finditer(code):
+        token = match.group(0)
+        if token.endswith('('):
+            casts.append(len(token) > 1)
+        elif token == ')':
+            if casts:
+                casts.pop()
+        elif casts and casts[-1] and match.group(1).upper() in _TYPES:
+            parts.append(code[position:match.start()])
+            parts.append(f'AS {_TYPES[match.group(1).upper()]}')
+            position = match.end()
+    parts.append(code[position:])
+    return ''.join(parts)
+
+
+def _argument_count(code: str, start: int) -> int:
+    # Nombre d'arguments de l'appel dont la parenthèse ouvrante précède `start`
+    depth, commas = 0, 0
+    for index in range(start, len(code)):
+        char = code[index]
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            if depth == 0:
+                return commas + 1 if code[start:index].strip() else 0
+            depth -= 1
+        elif char == ',' and depth == 0:
+            commas += 1
+    return commas + 1
+
+
+def _translate_date_calls(code: str) -> str:
+    # DATE(expr) -> bq_date(expr) ; DATE(année, mois, jour) -> make_date(...)
+    for match in reversed(list(_DATE_CALL.finditer(code))):
+        name = 'make_date' if _argument_count(code, match.end()) == 3 else 'bq_date'
+        code = f'{code[:match.start()]}{name}({code[match.end():]}'
+    return code
+
+
+def _translate_code(code: str) -> str:
+    code = _BACKTICKS.sub(_translate_identifier, code)
+    for name, replacement in _FUNCTIONS.items():
+        code = re.sub(rf'\b{name}\s*\(', f'{replacement}(', code, flags=re.I)
+    code = _translate_date_calls(code)
+    return _translate_cast_types(code)
+
+
+def _translate_literal(literal: str) -> str:
+    # Les chaînes BigQuery entre guillemets doubles sont des identifiants pour DuckDB
+    if literal.startswith('"'):
+        content = literal[1:-1].replace('\\"', '"').replace("'", "''")
+        return f"'{content}'"
+    return literal
+
+
+def bigquery_to_duckdb(sql: str) -> str:
+    """
+    Traduit les particularités BigQuery d'une requête vers la syntaxe DuckDB
+
+    Gère les identifiants entre backticks (y compris `projet.dataset.table`),
+    les types des CAST et SAFE_CAST et les fonctions courantes (SAFE_CAST,
+    COUNTIF, DATE à un ou trois arguments, FORMAT_DATE, SAFE_DIVIDE...).
+    Les chaînes littérales ne sont pas modifiées, hormis le passage des
+    guillemets doubles aux guillemets simples.
+    Les fonctions renommées en `bq_*` reposent sur `DUCKDB_MACROS`.
+    """
+    # Les chaînes sont remplacées par des marqueurs le temps de la traduction,
+    # pour que les appels qui les contiennent restent d'un seul tenant
+    parts = _LITERALS.split(sql)
+    literals = [_translate_literal(part) for part in parts[1::2]]
+    code = ''.join(part if i % 2 == 0 else f'\x00{i // 2}\x00' for i, part in enumerate(parts))
+    return _PLACEHOLDER.sub(lambda match: literals[int(match.group(1))], _translate_code(code))
@@ -0,0 +1,151 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Hashable, List, Optional
+
+import pandas as pd
+
+# Journal local des traces (une ligne JSON par span)
+TRACE_LOG_PATH = os.path.join('logs', 'agent_traces.jsonl')
+
+# Traceur de la question en cours, propagé au thread de l'agent
+current_tracer: contextvars.ContextVar[Optional['Tracer']] = contextvars.ContextVar('current_tracer', default=None)
+
+_log_lock = threading.Lock()
+
+
+class Tracer:
+    """
+    Enregistre les spans d'une question : étapes de l'agent, appels au LLM,
+    outils, requêtes SQL et rendu.
+
+    Chaque span est un dictionnaire (nom, type, parent, début, durée en ms,
+    statut et attributs) ; les spans terminés peuvent être ajoutés à un
+    journal JSONL pour analyse hors ligne.
+    """
+
+    def __init__(self, name: str = 'question', log_path: Optional[str] = TRACE_LOG_PATH):
+        """
+        Initialise le traceur
+
+        Args:
+            name: Nom de la trace (page ou type de requête)
+            log_path: Fichier JSONL où écrire les spans (None pour ne rien écrire)
+        """
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.log_path = log_path
+        self.spans: List[Dict[str, Any]] = []
+        self._open: Dict[Hashable, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, kind: str, key: Optional[Hashable] = None,
+                   parent_key: Optional[Hashable] = None, **attributes) -> Dict[str, Any]:
+        """
+        Ouvre un span
+
+        Args:
+            name: Nom du span
+            kind: Type ('question', 'llm', 'tool', 'sql', 'render'...)
+            key: Identifiant permettant de le fermer (run_id LangChain par exemple)
+            parent_key: Identifiant du span parent ; à défaut, le dernier span ouvert
+            attributes: Attributs initiaux
+
+        Returns:
+            Le span
+        """
+        with self._lock:
+            parent = self._open.get(parent_key) if parent_key is not None else None
+            if parent is None and self._open:
+                parent = next(reversed(self._open.values()))
+            span = {
+                'trace_id': self.trace_id,
+                'span_id': uuid.uuid4().hex[:16],
+                'parent_id': parent['span_id'] if parent else None,
+                'name': name,
+                'kind': kind,
+                'start': datetime.now(timezone.utc).isoformat(),
+                'duration_ms': None,
+                'status': 'ok',
+                'attributes': dict(attributes),
+                '_t0': time.perf_counter()
+            }
+            self._open[key if key is not None else span['span_id']] = span
+            return span
+
+    def end_span(self, key: Hashable, status: str = 'ok', **attributes):
+        """
+        Ferme un span ouvert (par sa clé ou le span lui-même)
+        """
+        with self._lock:
+            if isinstance(key, dict):
+                key = next((k for k, span in self._open.items() if span is key), None)
+            span = self._open.pop(key, None)
+            if span is None:
+                return
+            span['duration_ms'] = round((time.perf_counter() - span.pop('_t0')) * 1000, 2)
+            span['status'] = status
+            span['attributes'].update(attributes)
+            self.spans.append(span)
+
+    def current_span(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return next(reversed(self._open.values())) if self._open else None
+
+    @contextmanager
+    def span(self, name: str, kind: str, **attributes):
+        span = self.start_span(name, kind, **attributes)
+        try:
+            yield span
+        except Exception as e:
+            self.end_span(span, status='error', error=str(e))
+            raise
+        self.end_span(span)
+
+    def flush(self):
+        """
+        Ajoute les spans terminés au journal JSONL
+        """
+        if not self.log_path or not self.spans:
+            return
+        os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+        lines = ''.join(json.dumps({'trace': self.name, **span}, ensure_ascii=False, default=str) + '\n'
+                        for span in self.spans)
+        with _log_lock, open(self.log_path, 'a', encoding='utf-8') as log:
+            log.write(lines)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Spans terminés sous forme de tableau (attributs aplatis), par ordre de début
+        """
+        if not self.spans:
+            return pd.DataFrame(columns=['name', 'kind', 'start', 'duration_ms', 'status'])
+        df = pd.json_normalize(self.spans).rename(columns=lambda c: c.replace('attributes.', ''))
+        return df.sort_values('start').reset_index(drop=True)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Temps total, nombre de spans et part du temps de la question par type de span
+        """
+        df = self.to_dataframe()
+        if df.empty:
+            return pd.DataFrame(columns=['spans', 'duration_ms', 'part_percent'])
+        total = df.loc[df['parent_id'].isna(), 'duration_ms'].sum()
+        summary = df.groupby('kind').agg(spans=('span_id', 'size'), duration_ms=('duration_ms', 'sum'))
+        summary['part_percent'] = summary['duration_ms'] / total * 100 if total else 0.0
+        return summary.sort_values('duration_ms', ascending=False)
+
+
+def annotate_current_span(**attributes):
+    """
+    Ajoute des attributs (non nuls) au span ouvert du traceur courant, s'il existe
+    """
+    tracer = current_tracer.get()
+    span = tracer.current_span() if tracer is not None else None
+    if span is not None:
+        span['attributes'].update({key: value for key, value in attributes.items() if value is not None})
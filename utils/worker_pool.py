@@ -0,0 +1,138 @@
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+# Dimensionnement par défaut du pool partagé par les pages de chat
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_PENDING = 16
+DEFAULT_MAX_PENDING_PER_SESSION = 2
+
+# Délai et nombre de reprises d'une requête HTTP au LLM : un appel bloqué
+# dans le client OpenAI ne peut pas être interrompu de l'extérieur, il
+# occuperait un thread du pool indéfiniment (à passer à AzureChatOpenAI)
+LLM_REQUEST_TIMEOUT = 30
+LLM_MAX_RETRIES = 2
+
+
+class PoolBusyError(RuntimeError):
+    """Levée quand le pool refuse une requête (file pleine)"""
+
+
+class SessionWorkerPool:
+    """
+    Pool borné de threads pour les appels au LLM et à l'agent.
+
+    Les requêtes d'une même session sont exécutées dans l'ordre, une à la
+    fois ; celles de sessions différentes s'exécutent en parallèle dans la
+    limite de `max_workers` threads. Au-delà de `max_pending` requêtes en
+    attente au total, ou de `max_pending_per_session` pour une session, les
+    nouvelles requêtes sont refusées (PoolBusyError) plutôt que mises en file
+    sans limite.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        max_pending_per_session: int = DEFAULT_MAX_PENDING_PER_SESSION
+    ):
+        """
+        Initialise le pool
+
+        Args:
+            max_workers: Nombre maximum d'appels exécutés simultanément
+            max_pending: Nombre maximum de requêtes admises (en cours ou en attente)
+            max_pending_per_session: Nombre maximum de requêtes admises par session
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_pending_per_session = max_pending_per_session
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm-worker')
+        self._queues: Dict[str, Deque[Tuple[Future, Callable, tuple]]] = {}
+        self._running: Dict[str, Future] = {}
+        self._admitted = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def submit(self, session_id: str, fn: Callable, *args: Any) -> Future:
+        """
+        Soumet un appel pour une session
+
+        Args:
+            session_id: Identifiant de la session Streamlit
+            fn: Fonction à exécuter
+            args: Arguments de la fonction
+
+        Returns:
+            Future du résultat
+
+        Raises:
+            PoolBusyError: Si le pool ou la file de la session est plein
+        """
+        future = Future()
+        with self._lock:
+            session_queue = self._queues.setdefault(session_id, deque())
+            in_session = len(session_queue) + (session_id in self._running)
+            if self._admitted >= self.max_pending or in_session >= self.max_pending_per_session:
+                self.rejected += 1
+                if not session_queue and session_id not in self._running:
+                    del self._queues[session_id]
+                raise PoolBusyError(
+                    "Le service est très sollicité : veuillez réessayer dans quelques instants."
+                )
+            self._admitted += 1
+            session_queue.append((future, fn, args))
+            if session_id not in self._running:
+                self._start_next(session_id)
+        return future
+
+    def _start_next(self, session_id: str):
+        # Appelée sous verrou : lance la prochaine requête non annulée de la session
+        session_queue = self._queues.get(session_id)
+        while session_queue:
+            future, fn, args = session_queue.popleft()
+            if future.set_running_or_notify_cancel():
+                self._running[session_id] = future
+                self._executor.submit(self._run, session_id, future, fn, args)
+                return
+            self._admitted -= 1
+        self._queues.pop(session_id, None)
+
+    def _run(self, session_id: str, future: Future, fn: Callable, args: tuple):
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._admitted -= 1
+                self._running.pop(session_id, None)
+                self._start_next(session_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'running': len(self._running),
+                'waiting': sum(len(queue) for queue in self._queues.values()),
+                'admitted': self._admitted,
+                'rejected': self.rejected
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+_shared_pool: Optional[SessionWorkerPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def shared_pool() -> SessionWorkerPool:
+    """
+    Pool unique du processus, partagé par toutes les sessions et les pages de chat
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = SessionWorkerPool()
+        return _shared_pool